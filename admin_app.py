@@ -1,12 +1,17 @@
 import os
-from flask import Flask, redirect, url_for, request
+from flask import Flask, redirect, url_for, request, send_from_directory
+from markupsafe import Markup
 from flask_sqlalchemy import SQLAlchemy
 from flask_admin import Admin, AdminIndexView, expose
 from flask_admin.contrib.sqla import ModelView
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
+from sqlalchemy import inspect
 from werkzeug.security import generate_password_hash, check_password_hash
+from wtforms.validators import ValidationError
 from database.models import Base, Product, Order, OrderItem, Cart, TelegramUser, AdminToken
-from config import SECRET_KEY, DATABASE_URL
+from config import SECRET_KEY, DATABASE_URL, IMAGES_DIR
+from src.utils.images import thumbnail_path
+from src.utils.image_processing import normalize_image_file
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = SECRET_KEY
@@ -44,12 +49,25 @@ class MyAdminIndexView(AdminIndexView):
         return current_user.is_authenticated
 
 
+def thumbnail_formatter(view, context, model, name):
+    """Показать миниатюру товара вместо пути к файлу"""
+    image = model.image
+    if not image:
+        return ''
+    thumbnail = thumbnail_path(image)
+    if not os.path.exists(thumbnail):
+        return image
+    relative = os.path.relpath(thumbnail, IMAGES_DIR)
+    return Markup(f'<img src="{url_for("thumbnail", filename=relative)}" height="64">')
+
+
 class ProductModelView(ModelView):
     column_list = ['id', 'name', 'description', 'price', 'available', 'category', 'image']
     column_searchable_list = ['name', 'description', 'category']
     column_filters = ['price', 'name', 'category', 'available']
     column_editable_list = ['price', 'name', 'available']
     form_columns = ['name', 'description', 'price', 'category', 'available', 'image']
+    column_formatters = {'image': thumbnail_formatter}
 
     column_labels = {
         'id': 'ID',
@@ -61,6 +79,15 @@ class ProductModelView(ModelView):
         'category': 'Категория'
     }
 
+    def on_model_change(self, form, model, is_created):
+        if not is_created and not inspect(model).attrs.image.history.has_changes():
+            return
+        # Новый локальный файл приводим к нормализованному JPEG с миниатюрой
+        try:
+            model.image = normalize_image_file(model.image, IMAGES_DIR)
+        except OSError as e:
+            raise ValidationError(f'Не удалось обработать изображение: {e}')
+
     def is_accessible(self):
         return current_user.is_authenticated
 
@@ -278,6 +305,12 @@ def login():
     ''')
 
 
+@app.route('/thumbnails/<path:filename>')
+@login_required
+def thumbnail(filename):
+    return send_from_directory(os.path.abspath(IMAGES_DIR), filename)
+
+
 @app.route('/logout')
 @login_required
 def logout():
@@ -0,0 +1,5 @@
+"""
+Нагрузочные тесты и замеры (не входят в пакет бота)
+
+Запуск из корня репозитория: python -m benchmarks.<имя> --help
+"""
@@ -0,0 +1,139 @@
+"""
+Обновлений в секунду: синхронная сессия в цикле событий против AsyncSession
+
+Каждое «обновление» повторяет работу обработчика корзины: добавляет товар
+(UPSERT), пересчитывает итог корзины и ждет ответа Telegram (--rtt мс).
+Обновления выполняются конкурентно (--concurrency). С синхронной сессией
+запрос к БД блокирует цикл событий и ожидание ответов остальных
+пользователей, с асинхронной - нет.
+
+Запуск:
+    python -m benchmarks.async_bench --updates 5000 --concurrency 100
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from typing import Awaitable, Callable, List, Tuple
+
+from sqlalchemy.dialects import sqlite
+
+from src.services.cart_service import select_cart_summary
+from src.utils.money import Money
+from src.database.models import (
+    Base, Cart, Product, get_engine, get_session_factory,
+    get_async_engine, get_async_session_factory
+)
+
+PRODUCTS = 50
+
+
+def _seed(database_url: str):
+    engine = get_engine(database_url, 'production')
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(Product.__table__.insert(), [
+            {'name': f'Пицца {i}', 'price': Money((500 + i) * 100), 'available': True}
+            for i in range(PRODUCTS)
+        ])
+    engine.dispose()
+
+
+def _statements(rng: random.Random):
+    user_id = rng.randint(1, 5000)
+    # Тот же запрос, что в CartService.add_to_cart
+    upsert = sqlite.insert(Cart).values(
+        user_id=user_id, product_id=rng.randint(1, PRODUCTS), quantity=1
+    )
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[Cart.user_id, Cart.product_id],
+        set_={'quantity': Cart.quantity + upsert.excluded.quantity}
+    )
+    # Итоги корзины - запрос CartService.get_cart_summary
+    return upsert, select_cart_summary(user_id)
+
+
+async def _run(
+    update: Callable[[random.Random], Awaitable[None]],
+    updates: int,
+    concurrency: int
+) -> Tuple[float, List[float]]:
+    latencies: List[float] = []
+    remaining = iter(range(updates))
+
+    async def worker(seed: int):
+        rng = random.Random(seed)
+        for _ in remaining:
+            started = time.perf_counter()
+            await update(rng)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(seed) for seed in range(concurrency)))
+    return time.perf_counter() - started, latencies
+
+
+async def _bench_sync(database_url: str, args) -> Tuple[float, List[float]]:
+    engine = get_engine(database_url, 'production')
+    session_factory = get_session_factory(engine)
+
+    async def update(rng: random.Random):
+        upsert, summary = _statements(rng)
+        # Как было: синхронная сессия прямо в обработчике
+        with session_factory() as session:
+            session.execute(upsert)
+            session.execute(summary).one()
+            session.commit()
+        await asyncio.sleep(args.rtt / 1000)
+
+    try:
+        return await _run(update, args.updates, args.concurrency)
+    finally:
+        engine.dispose()
+
+
+async def _bench_async(database_url: str, args) -> Tuple[float, List[float]]:
+    engine = get_async_engine(database_url, 'production')
+    session_factory = get_async_session_factory(engine)
+
+    async def update(rng: random.Random):
+        upsert, summary = _statements(rng)
+        async with session_factory() as session:
+            await session.execute(upsert)
+            (await session.execute(summary)).one()
+            await session.commit()
+        await asyncio.sleep(args.rtt / 1000)
+
+    try:
+        return await _run(update, args.updates, args.concurrency)
+    finally:
+        await engine.dispose()
+
+
+def _report(label: str, elapsed: float, latencies: List[float]):
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{label:<8}{len(latencies) / elapsed:>14.0f}{p50:>10.1f}{p99:>10.1f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Синхронная и асинхронная работа с БД в боте')
+    parser.add_argument('--updates', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--rtt', type=float, default=20, help='ответ Telegram, мс')
+    args = parser.parse_args(argv)
+
+    print(f"{'сессия':<8}{'обновлений/с':>14}{'p50, мс':>10}{'p99, мс':>10}")
+    for label, bench in (('sync', _bench_sync), ('async', _bench_async)):
+        with tempfile.TemporaryDirectory() as tmp:
+            database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            _seed(database_url)
+            _report(label, *asyncio.run(bench(database_url, args)))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,115 @@
+"""
+Рассылка на заглушке Bot API: скорость, итоги и продолжение после прерывания
+
+Создает временную SQLite-базу с users пользователями (часть забанена
+администратором, часть заблокировала бота), поднимает заглушку
+benchmarks.fake_telegram и рассылает через планировщик исходящих запросов.
+С --interrupt рассылка прерывается через указанное число секунд и
+продолжается с сохраненного места.
+
+Запуск:
+    python -m benchmarks.broadcast_bench --users 100000
+    python -m benchmarks.broadcast_bench --users 5000 --interrupt 30
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from sqlalchemy import insert
+
+from src.config import BROADCAST_CHUNK_SIZE, BROADCAST_CONCURRENCY, BROADCAST_RATE
+from src.database.models import (
+    TelegramUser, create_tables_async, get_async_engine, get_async_session_factory
+)
+from src.bot.broadcast import BroadcastEngine
+from src.bot.outbound import OutboundScheduler
+from .fake_telegram import FIRST_USER_ID, FakeTelegram
+
+# Telegram: не больше 30 сообщений в секунду на бота
+TELEGRAM_GLOBAL_LIMIT = 30
+
+
+async def _seed(engine, users: int, banned_every: int):
+    await create_tables_async(engine)
+    async with engine.begin() as conn:
+        for start in range(0, users, 10_000):
+            await conn.execute(insert(TelegramUser), [
+                {
+                    'user_id': FIRST_USER_ID + i, 'first_name': f'User{i}',
+                    'is_banned': banned_every > 0 and i % banned_every == 0
+                }
+                for i in range(start, min(users, start + 10_000))
+            ])
+
+
+async def run(args) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = get_async_engine(f"sqlite:///{os.path.join(tmp, 'broadcast.db')}", 'production')
+        await _seed(engine, args.users, args.banned_every)
+        session_factory = get_async_session_factory(engine)
+
+        api = FakeTelegram()
+        if args.blocked_every:
+            api.blocked = {FIRST_USER_ID + i for i in range(1, args.users, args.blocked_every)}
+        runner = await api.serve('127.0.0.1', args.port)
+
+        session = AiohttpSession(api=TelegramAPIServer.from_base(f'http://127.0.0.1:{args.port}'))
+        scheduler = OutboundScheduler(global_rate=TELEGRAM_GLOBAL_LIMIT)
+        session.middleware(scheduler)
+        bot = Bot('123456:TEST', session=session)
+
+        broadcasts = BroadcastEngine(
+            session_factory, bot,
+            chunk_size=args.chunk_size, concurrency=args.concurrency, rate=args.rate
+        )
+        try:
+            broadcast_id = await broadcasts.create('Промо: пицца дня со скидкой 20%')
+            started = time.perf_counter()
+            if args.interrupt:
+                try:
+                    await asyncio.wait_for(broadcasts.run(broadcast_id), args.interrupt)
+                except asyncio.TimeoutError:
+                    print(f"Рассылка прервана через {args.interrupt} с, продолжаем")
+            progress = await broadcasts.run(broadcast_id)
+            elapsed = time.perf_counter() - started
+        finally:
+            await scheduler.close()
+            await bot.session.close()
+            await runner.cleanup()
+            await engine.dispose()
+
+    expected = args.users - (len(range(0, args.users, args.banned_every)) if args.banned_every else 0)
+    sent = sum(api.sends_per_second.values())
+    peak = max(api.sends_per_second.values(), default=0)
+    print(f"получателей: {expected}, отправлено запросов: {sent}")
+    print(f"доставлено: {progress.delivered}, заблокировали бота: {progress.blocked}, "
+          f"ошибок: {progress.failed}")
+    print(f"время: {elapsed:.1f} с, в среднем {sent / elapsed:.1f} сообщ./с, "
+          f"пик за секунду: {peak} (лимит Telegram {TELEGRAM_GLOBAL_LIMIT})")
+    return 0 if peak <= TELEGRAM_GLOBAL_LIMIT else 1
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Рассылка на заглушке Telegram Bot API')
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--banned-every', type=int, default=100,
+                        help='каждый N-й пользователь забанен (0 - никто)')
+    parser.add_argument('--blocked-every', type=int, default=50,
+                        help='каждый N-й пользователь заблокировал бота (0 - никто)')
+    parser.add_argument('--chunk-size', type=int, default=BROADCAST_CHUNK_SIZE)
+    parser.add_argument('--concurrency', type=int, default=BROADCAST_CONCURRENCY)
+    parser.add_argument('--rate', type=float, default=BROADCAST_RATE)
+    parser.add_argument('--interrupt', type=float, default=0,
+                        help='прервать рассылку через N секунд и продолжить')
+    parser.add_argument('--port', type=int, default=8081)
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,98 @@
+"""
+Проверка конкурентного добавления в корзину и скорость CartService.add_to_cart
+
+Сначала --taps параллельных нажатий «Добавить в корзину» для одной пары
+(пользователь, товар), каждое в своей сессии: должна остаться одна строка
+с суммарным количеством. Затем измеряется число добавлений в секунду.
+
+Запуск:
+    python -m benchmarks.cart_bench --taps 50 --adds 20000
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import insert, select
+
+from src.services import CartService
+from src.utils.money import Money
+from src.database.models import (
+    Cart, Product, create_tables_async, get_async_engine, get_async_session_factory
+)
+
+PRODUCTS = 50
+
+
+async def _add(session_factory, user_id: int, product_id: int, quantity: int):
+    async with session_factory() as session:
+        await CartService(session).add_to_cart(user_id, product_id, quantity)
+        await session.commit()
+
+
+async def check_concurrent_adds(session_factory, taps: int) -> bool:
+    """Параллельные нажатия для одной пары дают одну строку с суммой"""
+    user_id, product_id = 1, 1
+    quantities = [tap % 3 + 1 for tap in range(taps)]
+    await asyncio.gather(*(
+        _add(session_factory, user_id, product_id, quantity) for quantity in quantities
+    ))
+
+    async with session_factory() as session:
+        rows = list(await session.scalars(
+            select(Cart.quantity).filter_by(user_id=user_id, product_id=product_id)
+        ))
+    ok = rows == [sum(quantities)]
+    print(f"{taps} параллельных нажатий: строк {len(rows)}, количество {rows}, "
+          f"ожидалось [{sum(quantities)}] - {'OK' if ok else 'ОШИБКА'}")
+    return ok
+
+
+async def measure_adds(session_factory, adds: int, concurrency: int) -> float:
+    """Добавлений в секунду для случайных пользователей и товаров"""
+    remaining = iter(range(adds))
+
+    async def worker(seed: int):
+        rng = random.Random(seed)
+        for _ in remaining:
+            await _add(session_factory, rng.randint(2, 5000), rng.randint(1, PRODUCTS), 1)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(seed) for seed in range(concurrency)))
+    return adds / (time.perf_counter() - started)
+
+
+async def run(args) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = get_async_engine(f"sqlite:///{os.path.join(tmp, 'cart.db')}", 'production')
+        await create_tables_async(engine)
+        async with engine.begin() as conn:
+            await conn.execute(insert(Product), [
+                {'name': f'Пицца {i}', 'price': Money((500 + i) * 100), 'available': True}
+                for i in range(PRODUCTS)
+            ])
+        session_factory = get_async_session_factory(engine)
+
+        try:
+            ok = await check_concurrent_adds(session_factory, args.taps)
+            for concurrency in (1, args.concurrency):
+                rate = await measure_adds(session_factory, args.adds, concurrency)
+                print(f"добавлений в секунду (параллельно {concurrency}): {rate:.0f}")
+        finally:
+            await engine.dispose()
+    return 0 if ok else 1
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Конкурентное добавление в корзину')
+    parser.add_argument('--taps', type=int, default=50)
+    parser.add_argument('--adds', type=int, default=20_000)
+    parser.add_argument('--concurrency', type=int, default=20)
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,101 @@
+"""
+Память FSM при одновременном просмотре каталога
+
+Сравнивает прежнюю схему (каждый пользователь хранит в FSM свой список
+ORM-объектов Product) и общий снимок каталога (в FSM только версия
+снимка и индекс). Считается память, удерживаемая хранилищем после того,
+как --users пользователей открыли меню.
+
+Запуск:
+    python -m benchmarks.catalog_bench --users 10000 --products 30
+"""
+import argparse
+import asyncio
+import gc
+import os
+import tempfile
+import tracemalloc
+from typing import Awaitable, Callable
+
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from sqlalchemy import insert, select
+
+from src.database.models import (
+    Product, create_tables_async, get_async_engine, get_async_session_factory
+)
+from src.services import CatalogService
+from src.utils.money import Money
+
+BOT_ID = 1
+
+
+async def _seed(engine, products: int):
+    await create_tables_async(engine)
+    async with engine.begin() as conn:
+        await conn.execute(insert(Product), [
+            {
+                'name': f'Пицца {i}', 'description': 'Тесто, соус, сыр моцарелла, ' * 3,
+                'price': Money((500 + i) * 100), 'available': True, 'category': 'Пицца',
+                'image': f'images/pizza_{i}.jpg'
+            }
+            for i in range(products)
+        ])
+
+
+async def _measure(users: int, open_menu: Callable[[MemoryStorage, StorageKey], Awaitable[None]]) -> float:
+    """Память (МБ), которую удерживает хранилище FSM после открытия меню"""
+    storage = MemoryStorage()
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for user_id in range(users):
+        await open_menu(storage, StorageKey(bot_id=BOT_ID, chat_id=user_id, user_id=user_id))
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    await storage.close()
+    return (after - before) / 1024 / 1024
+
+
+async def run(args) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = get_async_engine(f"sqlite:///{os.path.join(tmp, 'catalog.db')}")
+        await _seed(engine, args.products)
+        session_factory = get_async_session_factory(engine)
+
+        async def per_user_products(storage: MemoryStorage, key: StorageKey):
+            # Как было: menu_command загружал товары и клал их в FSM пользователя
+            async with session_factory() as session:
+                products = list(await session.scalars(select(Product).filter_by(available=True)))
+            await storage.set_data(key, {'products': products, 'current_index': 0})
+
+        async def shared_snapshot(storage: MemoryStorage, key: StorageKey):
+            async with session_factory() as session:
+                snapshot = await CatalogService(session).get_snapshot()
+            await storage.set_data(
+                key, {'catalog_version': snapshot.version, 'current_index': 0, 'quantity': 1}
+            )
+
+        try:
+            legacy = await _measure(args.users, per_user_products)
+            shared = await _measure(args.users, shared_snapshot)
+        finally:
+            await engine.dispose()
+
+    print(f"пользователей: {args.users}, товаров: {args.products}")
+    print(f"товары в FSM каждого пользователя: {legacy:8.1f} МБ")
+    print(f"общий снимок каталога:             {shared:8.1f} МБ")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Память FSM при просмотре каталога')
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--products', type=int, default=30)
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
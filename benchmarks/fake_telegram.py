@@ -0,0 +1,347 @@
+"""
+Заглушка Telegram Bot API для нагрузочного тестирования на своей машине
+
+Сервер отвечает на методы Bot API, которые вызывает бот, а генератор
+нагрузки изображает пользователей: каждый отправляет команду или нажимает
+кнопку и ждет ответа бота, прежде чем отправить следующее обновление.
+Если бот зарегистрировал вебхук, обновления отправляются на него
+POST-запросом, иначе отдаются через getUpdates.
+
+Запуск заглушки и бота (в соседнем терминале) для каждого режима:
+    python -m benchmarks.fake_telegram --users 200 --duration 60
+    TELEGRAM_API_URL=http://127.0.0.1:8081 BOT_MODE=polling python main.py
+    TELEGRAM_API_URL=http://127.0.0.1:8081 BOT_MODE=webhook \\
+        WEBHOOK_URL=http://127.0.0.1:8080 python main.py
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter, deque
+from itertools import islice
+from typing import Any, Deque, Dict, List, Optional, Set
+
+import aiohttp
+from aiohttp import web
+
+BOT_USER = {'id': 1, 'is_bot': True, 'first_name': 'Pizza Bot', 'username': 'fake_pizza_bot'}
+
+# Первый пользователь; остальные идут подряд
+FIRST_USER_ID = 10_000_000
+
+# Сценарий пользователя: команды и нажатия кнопок, на каждое бот отвечает
+SCENARIO = (
+    ('message', '/start'),
+    ('message', '/menu'),
+    ('callback', 'qty_plus:0'),
+    ('callback', 'catalog_page:1'),
+    ('callback', 'show_cart'),
+    ('callback', 'main_menu'),
+)
+
+# Методы, которые возвращают сообщение, а не True
+MESSAGE_METHODS = ('send', 'edit')
+
+
+class FakeTelegram:
+    """Минимальный Bot API: очередь обновлений, вебхук и учет вызовов"""
+
+    def __init__(self, api_latency: float = 0.0):
+        self.api_latency = api_latency
+        self.calls: Counter = Counter()
+        # Отправленные сообщения по секундам: проверка лимитов Telegram
+        self.sends_per_second: Counter = Counter()
+        # Пользователи, заблокировавшие бота: отправка им вернет 403
+        self.blocked: Set[int] = set()
+        self.updates: Deque[Dict[str, Any]] = deque()
+        self.webhook_url: Optional[str] = None
+        self.webhook_secret: Optional[str] = None
+        self.connected = asyncio.Event()
+        self._new_updates = asyncio.Event()
+        self._webhook_slots = asyncio.Semaphore(40)
+        self._waiters: Dict[int, asyncio.Event] = {}
+        self._http: Optional[aiohttp.ClientSession] = None
+        self._update_id = 0
+        self._message_id = 0
+
+    async def serve(self, host: str, port: int) -> web.AppRunner:
+        """Запустить HTTP-сервер; остановка - runner.cleanup()"""
+        runner = web.AppRunner(self.create_app())
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route('*', '/bot{token}/{method}', self.handle)
+        app.on_startup.append(self._on_startup)
+        app.on_cleanup.append(self._on_cleanup)
+        return app
+
+    async def _on_startup(self, app: web.Application):
+        self._http = aiohttp.ClientSession()
+
+    async def _on_cleanup(self, app: web.Application):
+        await self._http.close()
+
+    # --- Bot API ---
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        params = dict(request.query)
+        if request.can_read_body:
+            if request.content_type == 'application/json':
+                params.update(await request.json())
+            else:
+                params.update(await request.post())
+
+        self.calls[method] += 1
+        if self.api_latency:
+            await asyncio.sleep(self.api_latency)
+
+        name = method.lower()
+        if name == 'getupdates':
+            result = await self._get_updates(params)
+        elif name == 'setwebhook':
+            result = self._set_webhook(params)
+        elif name == 'deletewebhook':
+            result = self._delete_webhook(params)
+        elif name == 'getme':
+            result = BOT_USER
+        elif name == 'getwebhookinfo':
+            result = {
+                'url': self.webhook_url or '',
+                'has_custom_certificate': False,
+                'pending_update_count': len(self.updates)
+            }
+        elif name.startswith(MESSAGE_METHODS):
+            if name.startswith('send'):
+                self.sends_per_second[int(time.time())] += 1
+                if int(params.get('chat_id') or 0) in self.blocked:
+                    return web.json_response({
+                        'ok': False, 'error_code': 403,
+                        'description': 'Forbidden: bot was blocked by the user'
+                    }, status=403)
+            result = self._message(params, photo=name in ('sendphoto', 'editmessagemedia'))
+        else:
+            result = True
+
+        self._notify(params)
+        return web.json_response({'ok': True, 'result': result})
+
+    async def _get_updates(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        self.connected.set()
+        offset = int(params.get('offset') or 0)
+        while self.updates and self.updates[0]['update_id'] < offset:
+            self.updates.popleft()
+
+        timeout = float(params.get('timeout') or 0)
+        if not self.updates and timeout:
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(self._new_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return list(islice(self.updates, int(params.get('limit') or 100)))
+
+    def _set_webhook(self, params: Dict[str, Any]) -> bool:
+        self.webhook_url = params['url']
+        self.webhook_secret = params.get('secret_token')
+        self._webhook_slots = asyncio.Semaphore(int(params.get('max_connections') or 40))
+        self.updates.clear()
+        self.connected.set()
+        return True
+
+    def _delete_webhook(self, params: Dict[str, Any]) -> bool:
+        self.webhook_url = None
+        if str(params.get('drop_pending_updates')).lower() == 'true':
+            self.updates.clear()
+        return True
+
+    def _message(self, params: Dict[str, Any], photo: bool = False) -> Dict[str, Any]:
+        self._message_id += 1
+        message = {
+            'message_id': int(params.get('message_id') or self._message_id),
+            'date': int(time.time()),
+            'chat': {'id': int(params.get('chat_id') or 0), 'type': 'private'},
+            'from': BOT_USER,
+        }
+        if photo:
+            file_id = f'photo{self._message_id}'
+            message['photo'] = [{
+                'file_id': file_id, 'file_unique_id': file_id, 'width': 800, 'height': 600
+            }]
+            message['caption'] = params.get('caption') or ''
+        else:
+            message['text'] = params.get('text') or params.get('caption') or ''
+        return message
+
+    def _notify(self, params: Dict[str, Any]):
+        """Разбудить пользователя, которому ответил бот"""
+        user_id = params.get('chat_id') or str(params.get('callback_query_id', '')).split('-')[0]
+        if not user_id:
+            return
+        waiter = self._waiters.get(int(user_id))
+        if waiter is not None:
+            waiter.set()
+
+    # --- Генератор нагрузки ---
+
+    def _next_update(self, user_id: int, kind: str, payload: str) -> Dict[str, Any]:
+        self._update_id += 1
+        self._message_id += 1
+        user = {'id': user_id, 'is_bot': False, 'first_name': f'User{user_id}'}
+        chat = {'id': user_id, 'type': 'private'}
+        now = int(time.time())
+
+        if kind == 'message':
+            message = {
+                'message_id': self._message_id, 'date': now,
+                'chat': chat, 'from': user, 'text': payload
+            }
+            if payload.startswith('/'):
+                message['entities'] = [
+                    {'type': 'bot_command', 'offset': 0, 'length': len(payload)}
+                ]
+            return {'update_id': self._update_id, 'message': message}
+
+        return {
+            'update_id': self._update_id,
+            'callback_query': {
+                'id': f'{user_id}-{self._update_id}',
+                'from': user,
+                'chat_instance': str(user_id),
+                'data': payload,
+                'message': {
+                    'message_id': self._message_id, 'date': now,
+                    'chat': chat, 'from': BOT_USER, 'text': 'Меню'
+                }
+            }
+        }
+
+    async def deliver(self, update: Dict[str, Any]) -> bool:
+        """Передать обновление боту: на вебхук или в очередь getUpdates"""
+        if self.webhook_url is None:
+            self.updates.append(update)
+            self._new_updates.set()
+            return True
+
+        headers = {}
+        if self.webhook_secret:
+            headers['X-Telegram-Bot-Api-Secret-Token'] = self.webhook_secret
+        async with self._webhook_slots:
+            try:
+                async with self._http.post(self.webhook_url, json=update, headers=headers) as response:
+                    return response.status == 200
+            except aiohttp.ClientError:
+                return False
+
+    async def run_user(self, user_id: int, stats: 'LoadStats', reply_timeout: float):
+        """Пользователь: отправить обновление и дождаться ответа бота"""
+        waiter = self._waiters[user_id] = asyncio.Event()
+        step = 0
+        while True:
+            kind, payload = SCENARIO[step % len(SCENARIO)]
+            step += 1
+
+            waiter.clear()
+            started = time.perf_counter()
+            if not await self.deliver(self._next_update(user_id, kind, payload)):
+                stats.errors += 1
+                await asyncio.sleep(reply_timeout)
+                continue
+            stats.sent += 1
+            try:
+                await asyncio.wait_for(waiter.wait(), reply_timeout)
+            except asyncio.TimeoutError:
+                stats.timeouts += 1
+            else:
+                stats.latencies.append(time.perf_counter() - started)
+
+    async def load(self, users: int, duration: float, reply_timeout: float) -> 'LoadStats':
+        """Нагрузить подключенного бота users пользователями на duration секунд"""
+        stats = LoadStats()
+        tasks = [
+            asyncio.create_task(self.run_user(FIRST_USER_ID + i, stats, reply_timeout))
+            for i in range(users)
+        ]
+        started = time.perf_counter()
+        await asyncio.sleep(duration)
+        stats.elapsed = time.perf_counter() - started
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return stats
+
+
+class LoadStats:
+    """Итоги нагрузочного прогона"""
+
+    __slots__ = ('sent', 'errors', 'timeouts', 'latencies', 'elapsed')
+
+    def __init__(self):
+        self.sent = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.latencies: List[float] = []
+        self.elapsed = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Обновлений с ответом в секунду"""
+        return len(self.latencies) / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, value: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * value))] * 1000
+
+
+async def run(args) -> int:
+    api = FakeTelegram(api_latency=args.api_latency_ms / 1000)
+    runner = await api.serve(args.host, args.port)
+    print(f"Bot API: http://{args.host}:{args.port}, ожидаем подключения бота...")
+
+    try:
+        await api.connected.wait()
+        # Бот при старте удаляет или ставит вебхук - даем ему закончить
+        await asyncio.sleep(1)
+        mode = 'webhook' if api.webhook_url else 'polling'
+        print(f"Бот подключился ({mode}), нагрузка: {args.users} польз. на {args.duration} с")
+
+        stats = await api.load(args.users, args.duration, args.reply_timeout)
+    finally:
+        await runner.cleanup()
+
+    answered = len(stats.latencies)
+    print(f"\nрежим: {mode}")
+    print(f"обновлений отправлено: {stats.sent}, с ответом: {answered}, "
+          f"без ответа: {stats.timeouts}, ошибок доставки: {stats.errors}")
+    print(f"пропускная способность: {stats.throughput:.1f} обновл./с")
+    print(f"задержка ответа, мс: p50={stats.percentile(0.5):.1f} "
+          f"p95={stats.percentile(0.95):.1f} p99={stats.percentile(0.99):.1f}")
+    print("вызовы API: " + ", ".join(
+        f"{method}={count}" for method, count in api.calls.most_common()
+    ))
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Заглушка Telegram Bot API с генератором нагрузки')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--reply-timeout', type=float, default=5,
+                        help='сколько секунд пользователь ждет ответа бота')
+    parser.add_argument('--api-latency-ms', type=float, default=0,
+                        help='искусственная задержка ответа на каждый вызов API')
+    args = parser.parse_args(argv)
+    try:
+        return asyncio.run(run(args))
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
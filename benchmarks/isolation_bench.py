@@ -0,0 +1,119 @@
+"""
+Проверка изоляции обновлений: серия быстрых нажатий ➕
+
+Обработчик повторяет чтение-изменение-запись количества из quantity_change,
+а хранилище имитирует задержку базы данных. Без изоляции часть нажатий
+теряется; с UserEventIsolation итог у каждого пользователя равен числу
+нажатий, а разные пользователи при этом обрабатываются параллельно.
+
+Запуск:
+    python -m benchmarks.isolation_bench --taps 50 --users 20
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Any, Dict, Optional
+
+from aiogram import Bot, Dispatcher, F, Router, types
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import BaseEventIsolation, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from src.bot.isolation import UserEventIsolation
+
+FIRST_USER_ID = 10_000_000
+
+
+class SlowStorage(MemoryStorage):
+    """MemoryStorage со случайной задержкой чтения и записи"""
+
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        await asyncio.sleep(random.random() * self.delay)
+        return await super().get_data(key)
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        await asyncio.sleep(random.random() * self.delay)
+        await super().set_data(key, data)
+
+
+def _create_router() -> Router:
+    router = Router()
+
+    @router.callback_query(F.data.startswith('qty_plus:'))
+    async def quantity_plus(callback: types.CallbackQuery, state: FSMContext):
+        data = await state.get_data()
+        await state.update_data(quantity=data.get('quantity', 0) + 1)
+
+    return router
+
+
+def _tap(update_id: int, user_id: int) -> Dict[str, Any]:
+    user = {'id': user_id, 'is_bot': False, 'first_name': f'User{user_id}'}
+    return {
+        'update_id': update_id,
+        'callback_query': {
+            'id': str(update_id), 'from': user, 'chat_instance': str(user_id),
+            'data': 'qty_plus:0',
+            'message': {
+                'message_id': 1, 'date': int(time.time()), 'text': 'Меню',
+                'chat': {'id': user_id, 'type': 'private'}
+            }
+        }
+    }
+
+
+async def run(label: str, isolation: Optional[BaseEventIsolation], args):
+    storage = SlowStorage(args.delay_ms / 1000)
+    dp = Dispatcher(storage=storage, events_isolation=isolation)
+    dp.include_router(_create_router())
+    bot = Bot('123456:TEST')
+
+    # Нажатия разных пользователей перемешаны, порядок нажатий одного сохранен
+    updates = [_tap(0, FIRST_USER_ID + user) for user in range(args.users) for _ in range(args.taps)]
+    random.Random(42).shuffle(updates)
+    for update_id, update in enumerate(updates):
+        update['update_id'] = update_id
+
+    started = time.perf_counter()
+    await asyncio.gather(*(dp.feed_raw_update(bot, update) for update in updates))
+    elapsed = (time.perf_counter() - started) * 1000
+
+    totals = []
+    for user in range(args.users):
+        user_id = FIRST_USER_ID + user
+        data = await storage.get_data(StorageKey(bot_id=bot.id, chat_id=user_id, user_id=user_id))
+        totals.append(data.get('quantity', 0))
+    await bot.session.close()
+
+    print(f"{label:<22}{min(totals):>8}{max(totals):>8}{args.taps:>9}{elapsed:>12.1f}")
+    if isinstance(isolation, UserEventIsolation):
+        stats = isolation.stats.as_dict()
+        print(f"  ожиданий: {stats['contended']} из {stats['acquired']}, "
+              f"среднее {stats['avg_wait_ms']:.1f} мс, макс. {stats['max_wait_ms']:.1f} мс, "
+              f"макс. в очереди {stats['max_waiting']}")
+
+
+async def main_async(args) -> int:
+    print(f"{'изоляция':<22}{'мин.':>8}{'макс.':>8}{'ожидаем':>9}{'время, мс':>12}")
+    await run('без изоляции', None, args)
+    await run('UserEventIsolation', UserEventIsolation(), args)
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Проверка последовательной обработки нажатий')
+    parser.add_argument('--taps', type=int, default=50)
+    parser.add_argument('--users', type=int, default=1)
+    parser.add_argument('--delay-ms', type=float, default=2,
+                        help='максимальная задержка чтения и записи хранилища')
+    args = parser.parse_args(argv)
+    return asyncio.run(main_async(args))
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,110 @@
+"""
+Задержка обработчика с логированием и без
+
+Имитирует обработчик нажатия (контекст обновления, несколько записей
+лога, await) и сравнивает три режима: логирование выключено, прежняя
+запись в файл прямо в цикле событий (FileHandler) и очередь с
+QueueListener из src.bot.logging_pipeline. С --fsync каждая запись
+сбрасывается на диск - так видна цена медленного диска.
+
+Запуск:
+    python -m benchmarks.logging_bench --calls 20000
+    python -m benchmarks.logging_bench --calls 5000 --fsync
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+
+from structlog.contextvars import bound_contextvars
+
+from src.bot.logging_pipeline import setup_logging, stop_logging
+
+logger = logging.getLogger('bench.handler')
+
+
+async def _handler(index: int):
+    with bound_contextvars(update_id=index, user_id=1000 + index % 50, handler='add_to_cart'):
+        logger.info("Добавление товара в корзину: product_id=%s, quantity=%s", index % 20, 1)
+        await asyncio.sleep(0)
+        logger.info("Товар добавлен в корзину")
+        logger.debug("Подробности для отладки: %s", index)
+
+
+async def _measure(calls: int) -> List[float]:
+    latencies = []
+    for index in range(calls):
+        started = time.perf_counter()
+        await _handler(index)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def _fsync(handler: logging.Handler):
+    """Сбрасывать файл на диск после каждой записи"""
+    if isinstance(handler, logging.FileHandler):
+        flush = handler.flush
+
+        def flush_and_sync():
+            flush()
+            if handler.stream:
+                os.fsync(handler.stream.fileno())
+
+        handler.flush = flush_and_sync
+
+
+def _setup(mode: str, log_file: str, fsync: bool):
+    root = logging.getLogger()
+    if mode == 'off':
+        logging.disable(logging.CRITICAL)
+        return
+    logging.disable(logging.NOTSET)
+
+    if mode == 'blocking':
+        stop_logging()
+        for old in root.handlers[:]:
+            root.removeHandler(old)
+        handler = logging.FileHandler(log_file)
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+        root.addHandler(handler)
+        root.setLevel(logging.INFO)
+        handlers = [handler]
+    else:
+        listener = setup_logging(log_file=log_file, console=False)
+        root.setLevel(logging.INFO)
+        handlers = listener.handlers
+
+    if fsync:
+        for handler in handlers:
+            _fsync(handler)
+
+
+def _report(mode: str, latencies: List[float]):
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{mode:>9}: среднее {statistics.mean(latencies) * 1e6:8.1f} мкс, "
+          f"p50 {statistics.median(latencies) * 1e6:8.1f} мкс, p99 {p99 * 1e6:8.1f} мкс, "
+          f"max {latencies[-1] * 1e3:7.2f} мс")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Задержка обработчика с логированием и без')
+    parser.add_argument('--calls', type=int, default=20_000)
+    parser.add_argument('--fsync', action='store_true', help='fsync после каждой записи')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ('off', 'blocking', 'queue'):
+            _setup(mode, os.path.join(tmp, f'{mode}.log'), args.fsync)
+            _report(mode, asyncio.run(_measure(args.calls)))
+        stop_logging()
+        logging.getLogger().handlers.clear()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
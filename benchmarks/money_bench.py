@@ -0,0 +1,138 @@
+"""
+Сравнение хранения денег: Float(asdecimal=True) и целые копейки (MoneyType)
+
+Измеряет итог корзины (агрегат в SQL и сумма в Python по строкам)
+и сумму продаж для статистики на одинаковых данных.
+
+Запуск:
+    python -m benchmarks.money_bench --users 2000 --orders 200000
+"""
+import argparse
+import random
+import time
+from decimal import Decimal
+from typing import Callable, Dict
+
+from sqlalchemy import (
+    Column, Float, Integer, MetaData, String, Table, create_engine, func, select
+)
+
+from src.utils.money import Money
+from src.database.models import MoneyType
+
+
+def _tables(money_type) -> Dict[str, Table]:
+    metadata = MetaData()
+    return {
+        'metadata': metadata,
+        'products': Table(
+            'products', metadata,
+            Column('id', Integer, primary_key=True),
+            Column('price', money_type, nullable=False),
+        ),
+        'cart': Table(
+            'cart', metadata,
+            Column('id', Integer, primary_key=True),
+            Column('user_id', Integer, index=True),
+            Column('product_id', Integer),
+            Column('quantity', Integer),
+        ),
+        'orders': Table(
+            'orders', metadata,
+            Column('id', Integer, primary_key=True),
+            Column('status', String(50), index=True),
+            Column('total_price', money_type, nullable=False),
+        ),
+    }
+
+
+def _seed(engine, tables, users: int, orders: int, to_value: Callable[[int], object]):
+    rng = random.Random(42)
+    tables['metadata'].create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(tables['products'].insert(), [
+            {'id': i, 'price': to_value(rng.randint(9900, 149999))} for i in range(1, 201)
+        ])
+        conn.execute(tables['cart'].insert(), [
+            {'user_id': user, 'product_id': rng.randint(1, 200), 'quantity': rng.randint(1, 5)}
+            for user in range(users) for _ in range(rng.randint(1, 6))
+        ])
+        conn.execute(tables['orders'].insert(), [
+            {
+                'status': rng.choice(['pending', 'completed', 'cancelled']),
+                'total_price': to_value(rng.randint(9900, 999999))
+            }
+            for _ in range(orders)
+        ])
+
+
+def _measure(repeat: int, func_: Callable[[], object]) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func_()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def run(label: str, money_type, to_value, zero, users: int, orders: int) -> Dict[str, float]:
+    """Замерить время операций (мс) для одного способа хранения"""
+    engine = create_engine('sqlite://')
+    tables = _tables(money_type)
+    _seed(engine, tables, users, orders, to_value)
+    products, cart, orders_table = tables['products'], tables['cart'], tables['orders']
+
+    with engine.connect() as conn:
+        def cart_totals_sql():
+            for user in range(users):
+                conn.execute(
+                    select(func.sum(products.c.price * cart.c.quantity, type_=money_type))
+                    .join(products, cart.c.product_id == products.c.id)
+                    .where(cart.c.user_id == user)
+                ).scalar()
+
+        def cart_totals_python():
+            for user in range(users):
+                rows = conn.execute(
+                    select(products.c.price, cart.c.quantity)
+                    .join(products, cart.c.product_id == products.c.id)
+                    .where(cart.c.user_id == user)
+                )
+                sum((price * quantity for price, quantity in rows), zero)
+
+        def sales_stats():
+            conn.execute(
+                select(orders_table.c.status, func.sum(orders_table.c.total_price))
+                .group_by(orders_table.c.status)
+            ).all()
+
+        return {
+            'label': label,
+            'cart_sql': _measure(3, cart_totals_sql),
+            'cart_python': _measure(3, cart_totals_python),
+            'stats': _measure(10, sales_stats),
+        }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Сравнение хранения денежных сумм')
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--orders', type=int, default=200_000)
+    args = parser.parse_args(argv)
+
+    results = [
+        run('Float(asdecimal)', Float(asdecimal=True),
+            lambda kopecks: Decimal(kopecks) / 100, Decimal(0), args.users, args.orders),
+        run('MoneyType', MoneyType(),
+            Money, Money(0), args.users, args.orders),
+    ]
+
+    print(f"{'хранение':<18}{'корзины SQL, мс':>17}{'корзины Python, мс':>20}{'статистика, мс':>16}")
+    for result in results:
+        print(
+            f"{result['label']:<18}{result['cart_sql']:>17.1f}"
+            f"{result['cart_python']:>20.1f}{result['stats']:>16.1f}"
+        )
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,239 @@
+"""
+Проверка планов горячих запросов (регрессия индексов)
+
+Для каждого запроса, который выполняют сервисы на горячих путях, строится
+план (EXPLAIN QUERY PLAN в SQLite, EXPLAIN в PostgreSQL). Проверка падает,
+если хотя бы один запрос читает горячую таблицу полным сканированием.
+
+Запуск на синтетической базе с 1 млн заказов:
+    python -m benchmarks.query_plans --database-url sqlite:///data/plan_check.db --seed
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql import Select
+
+from src.utils.money import Money
+from src.database.migrations import upgrade
+from src.database.models import (
+    get_async_engine,
+    Product, TelegramUser, Order, OrderItem, Cart
+)
+from src.services.cart_service import select_cart_lines, select_cart_summary
+from src.services.catalog_service import select_available_products
+from src.services.order_service import (
+    select_order_items, select_order_view, select_orders_by_status,
+    select_orders_count, select_orders_total, select_user_orders
+)
+from src.services.user_service import select_user
+
+HOT_TABLES = ('orders', 'order_items', 'cart', 'products', 'telegram_users')
+ORDER_STATUSES = ('pending', 'paid', 'processing', 'delivering', 'completed', 'cancelled')
+SEED_CHUNK = 10_000
+
+
+class HotQuery(NamedTuple):
+    """Горячий запрос и метод сервиса, который его выполняет"""
+    name: str
+    build: Callable[[int, int], Select]
+
+
+# Запросы строятся теми же функциями, что и в сервисах, поэтому проверка
+# не расходится с тем, что сервисы выполняют на самом деле
+HOT_QUERIES: List[HotQuery] = [
+    HotQuery(
+        'CatalogService._load_products',
+        lambda user_id, order_id: select_available_products()
+    ),
+    HotQuery(
+        'CartService.get_user_cart',
+        lambda user_id, order_id: select_cart_lines(user_id)
+    ),
+    HotQuery(
+        'CartService.get_cart_summary',
+        lambda user_id, order_id: select_cart_summary(user_id)
+    ),
+    HotQuery(
+        'OrderService.get_orders_by_status',
+        lambda user_id, order_id: select_orders_by_status('pending')
+    ),
+    HotQuery(
+        'OrderService.get_user_orders',
+        lambda user_id, order_id: select_user_orders(user_id)
+    ),
+    HotQuery(
+        'OrderService.get_order_view',
+        lambda user_id, order_id: select_order_view(order_id)
+    ),
+    HotQuery(
+        'OrderService.get_order_items',
+        lambda user_id, order_id: select_order_items(order_id)
+    ),
+    HotQuery(
+        'admin_stats_handler (count by status)',
+        lambda user_id, order_id: select_orders_count('pending')
+    ),
+    HotQuery(
+        'admin_stats_handler (sales sum)',
+        lambda user_id, order_id: select_orders_total('completed')
+    ),
+    HotQuery(
+        'UserService.get_user',
+        lambda user_id, order_id: select_user(user_id)
+    ),
+]
+
+
+async def seed_database(engine: AsyncEngine, orders: int, users: int, products: int):
+    """Заполнить базу синтетическими данными"""
+    async with engine.connect() as conn:
+        await conn.run_sync(upgrade)
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    categories = ['Пицца', 'Напитки', 'Закуски', 'Десерты', None]
+
+    async with engine.begin() as conn:
+        await conn.execute(insert(Product), [
+            {
+                'name': f'Товар {i}',
+                'description': 'Синтетический товар',
+                'price': Money(rng.randint(100, 1500) * 100),
+                'available': rng.random() > 0.1,
+                'category': rng.choice(categories),
+                'created_at': now
+            }
+            for i in range(products)
+        ])
+
+    for start in range(0, users, SEED_CHUNK):
+        async with engine.begin() as conn:
+            await conn.execute(insert(TelegramUser), [
+                {'user_id': 10_000_000 + i, 'first_name': f'User {i}', 'created_at': now}
+                for i in range(start, min(start + SEED_CHUNK, users))
+            ])
+
+    async with engine.begin() as conn:
+        await conn.execute(insert(Cart), [
+            {
+                'user_id': 10_000_000 + user,
+                'product_id': rng.randint(1, products),
+                'quantity': rng.randint(1, 5),
+                'created_at': now
+            }
+            for user in rng.sample(range(users), min(users, 50_000))
+        ])
+
+    order_id = 0
+    for start in range(0, orders, SEED_CHUNK):
+        count = min(SEED_CHUNK, orders - start)
+        order_rows, item_rows = [], []
+        for _ in range(count):
+            order_id += 1
+            created_at = now - timedelta(minutes=rng.randint(0, 525_600))
+            order_rows.append({
+                'user_id': 10_000_000 + rng.randrange(users),
+                'status': rng.choice(ORDER_STATUSES),
+                'total_price': Money(0),
+                'created_at': created_at,
+                'updated_at': created_at
+            })
+            for _ in range(rng.randint(1, 3)):
+                item_rows.append({
+                    'order_id': order_id,
+                    'product_id': rng.randint(1, products),
+                    'quantity': rng.randint(1, 3),
+                    'price': Money(rng.randint(100, 1500) * 100)
+                })
+        async with engine.begin() as conn:
+            await conn.execute(insert(Order), order_rows)
+            await conn.execute(insert(OrderItem), item_rows)
+        print(f"  заказов: {start + count}/{orders}", end='\r', flush=True)
+    print()
+
+
+def _full_scans(dialect: str, plan: List[str]) -> List[str]:
+    """Найти строки плана с полным сканированием горячих таблиц"""
+    scans = []
+    for line in plan:
+        if dialect == 'sqlite':
+            # "SCAN orders" - полный проход; "SCAN cart USING INDEX ..." - допустимо
+            words = line.split()
+            if len(words) >= 2 and words[0] == 'SCAN' and 'USING' not in words:
+                if words[1] in HOT_TABLES:
+                    scans.append(line)
+        elif 'Seq Scan on' in line:
+            table = line.split('Seq Scan on', 1)[1].split()[0]
+            if table in HOT_TABLES:
+                scans.append(line)
+    return scans
+
+
+async def explain(engine: AsyncEngine, statement: Select) -> List[str]:
+    """Получить план запроса в виде списка строк"""
+    dialect = engine.dialect.name
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True}))
+
+    async with engine.connect() as conn:
+        if dialect == 'sqlite':
+            rows = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")
+            return [row[-1] for row in rows]
+
+        # Запрещаем Seq Scan: если он все равно выбран, подходящего индекса нет
+        await conn.exec_driver_sql("SET enable_seqscan = off")
+        rows = await conn.exec_driver_sql(f"EXPLAIN {sql}")
+        return [row[0] for row in rows]
+
+
+async def check_query_plans(engine: AsyncEngine) -> bool:
+    """Проверить планы всех горячих запросов, вернуть True если регрессий нет"""
+    async with engine.connect() as conn:
+        user_id = await conn.scalar(select(func.min(Cart.user_id))) or 0
+        order_id = await conn.scalar(select(func.max(Order.id))) or 0
+
+    ok = True
+    for query in HOT_QUERIES:
+        plan = await explain(engine, query.build(user_id, order_id))
+        scans = _full_scans(engine.dialect.name, plan)
+        status = 'FAIL' if scans else 'ok'
+        print(f"[{status:>4}] {query.name}")
+        for line in plan:
+            print(f"         {line}")
+        ok = ok and not scans
+    return ok
+
+
+async def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Проверка планов горячих запросов')
+    parser.add_argument('--database-url', default='sqlite:///data/plan_check.db')
+    parser.add_argument('--seed', action='store_true', help='заполнить базу синтетическими данными')
+    parser.add_argument('--orders', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--products', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    engine = get_async_engine(args.database_url)
+    try:
+        if args.seed:
+            started = time.perf_counter()
+            print(f"Заполнение базы: {args.orders} заказов, {args.users} пользователей")
+            await seed_database(engine, args.orders, args.users, args.products)
+            print(f"Готово за {time.perf_counter() - started:.1f} с")
+
+        if engine.dialect.name == 'sqlite':
+            async with engine.begin() as conn:
+                await conn.exec_driver_sql("ANALYZE")
+
+        return 0 if await check_query_plans(engine) else 1
+    finally:
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,98 @@
+"""
+Сравнение ORM-объектов и моделей чтения: память и время выборки
+
+Запуск:
+    python -m benchmarks.read_model_bench --products 10000 --orders 100000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from src.utils.money import Money
+from src.database.models import Base, Product, Order, get_engine
+from src.database.read_models import ProductView, OrderView, PRODUCT_VIEW_COLUMNS, ORDER_VIEW_COLUMNS
+
+
+def _seed(engine, products: int, orders: int):
+    Base.metadata.create_all(engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(Product), [
+            {
+                'name': f'Товар {i}', 'description': 'Описание товара ' * 4,
+                'price': Money(10000 + i), 'available': True,
+                'category': f'Категория {i % 20}', 'created_at': now
+            }
+            for i in range(products)
+        ])
+        conn.execute(insert(Order), [
+            {
+                'user_id': i % 5000, 'username': f'user{i % 5000}', 'phone': '+79990000000',
+                'total_price': Money(50000 + i), 'status': 'completed',
+                'created_at': now, 'updated_at': now
+            }
+            for i in range(orders)
+        ])
+
+
+def _measure(load: Callable[[], List]) -> Tuple[float, float, int]:
+    """Время (мс) и пиковая память (МБ) одной выборки"""
+    gc.collect()
+    started = time.perf_counter()
+    rows = load()
+    elapsed = (time.perf_counter() - started) * 1000
+    count = len(rows)
+    del rows
+
+    gc.collect()
+    tracemalloc.start()
+    rows = load()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+    return elapsed, peak / 1024 / 1024, count
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='ORM-объекты против моделей чтения')
+    parser.add_argument('--products', type=int, default=10_000)
+    parser.add_argument('--orders', type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    engine = get_engine('sqlite://', 'default')
+    _seed(engine, args.products, args.orders)
+
+    def orm(model):
+        def load():
+            with Session(engine) as session:
+                return list(session.scalars(select(model)))
+        return load
+
+    def view(view_type, columns):
+        def load():
+            with engine.connect() as conn:
+                return [view_type(*row) for row in conn.execute(select(*columns))]
+        return load
+
+    cases = [
+        ('Product ORM', orm(Product)),
+        ('ProductView', view(ProductView, PRODUCT_VIEW_COLUMNS)),
+        ('Order ORM', orm(Order)),
+        ('OrderView', view(OrderView, ORDER_VIEW_COLUMNS)),
+    ]
+
+    print(f"{'выборка':<14}{'строк':>9}{'время, мс':>12}{'пик памяти, МБ':>17}")
+    for label, load in cases:
+        elapsed, peak, count = _measure(load)
+        print(f"{label:<14}{count:>9}{elapsed:>12.1f}{peak:>17.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
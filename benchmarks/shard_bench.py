@@ -0,0 +1,80 @@
+"""
+Масштабирование по процессам: пропускная способность против числа обработчиков
+
+Для каждого значения BOT_WORKERS запускает main.py против заглушки Bot API
+(benchmarks.fake_telegram), нагружает его и останавливает. 0 - один процесс
+без распределения. Бот использует базу из DATABASE_URL; для заметной
+нагрузки на обработчики в ней стоит завести товары.
+
+Запуск:
+    python -m benchmarks.shard_bench --workers 0 1 2 4 8 --users 400 --duration 30
+"""
+import argparse
+import asyncio
+import os
+import signal
+import sys
+
+from .fake_telegram import FakeTelegram
+
+MAIN = os.path.join(os.path.dirname(__file__), os.pardir, 'main.py')
+
+
+async def measure(workers: int, args) -> float:
+    """Пропускная способность бота (обновлений в секунду) с workers процессами"""
+    api = FakeTelegram(api_latency=args.api_latency_ms / 1000)
+    runner = await api.serve('127.0.0.1', args.port)
+    env = {
+        **os.environ,
+        'TELEGRAM_API_URL': f'http://127.0.0.1:{args.port}',
+        'BOT_MODE': args.mode,
+        'BOT_WORKERS': str(workers),
+        'WEBHOOK_URL': f'http://127.0.0.1:{args.webhook_port}',
+        'WEBHOOK_PORT': str(args.webhook_port),
+        'LOG_LEVEL': 'WARNING',
+    }
+    bot = await asyncio.create_subprocess_exec(
+        sys.executable, os.path.abspath(MAIN), env=env,
+        stdout=asyncio.subprocess.DEVNULL
+    )
+    try:
+        await asyncio.wait_for(api.connected.wait(), 60)
+        # Даем запуститься процессам-обработчикам
+        await asyncio.sleep(args.warmup)
+        stats = await api.load(args.users, args.duration, args.reply_timeout)
+    finally:
+        if bot.returncode is None:
+            bot.send_signal(signal.SIGINT)
+        await bot.wait()
+        await runner.cleanup()
+
+    print(f"{workers:>10}{stats.throughput:>16.1f}"
+          f"{stats.percentile(0.5):>10.1f}{stats.percentile(0.95):>10.1f}{stats.timeouts:>12}")
+    return stats.throughput
+
+
+async def run(args) -> int:
+    print(f"режим: {args.mode}, ядер: {os.cpu_count()}")
+    print(f"{'процессов':>10}{'обновл./с':>16}{'p50, мс':>10}{'p95, мс':>10}{'без ответа':>12}")
+    for workers in args.workers:
+        await measure(workers, args)
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Масштабирование бота по процессам')
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4])
+    parser.add_argument('--mode', choices=['polling', 'webhook'], default='polling')
+    parser.add_argument('--users', type=int, default=400)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--warmup', type=float, default=3)
+    parser.add_argument('--reply-timeout', type=float, default=5)
+    parser.add_argument('--api-latency-ms', type=float, default=0)
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--webhook-port', type=int, default=8080)
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
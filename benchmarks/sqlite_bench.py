@@ -0,0 +1,158 @@
+"""
+Нагрузочный тест SQLite при работе из нескольких процессов
+
+Имитирует бота, веб-админку и скрипты, открывающие один файл базы:
+процессы-писатели добавляют товары в корзины и меняют статусы заказов,
+процессы-читатели листают каталог и корзины. Сравнивает профили SQLite.
+
+Запуск:
+    python -m benchmarks.sqlite_bench --writers 4 --readers 4 --duration 10
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.exc import OperationalError
+
+from src.utils.money import Money
+from src.database.migrations import upgrade
+from src.database.models import get_engine, Product, Order, Cart
+
+PROFILES = ('default', 'production')
+
+
+def _prepare(database_url: str, profile: str):
+    """Создать схему и заполнить базу товарами и заказами"""
+    engine = get_engine(database_url, profile)
+    with engine.connect() as conn:
+        upgrade(conn)
+    with engine.begin() as conn:
+        conn.execute(delete(Cart))
+        conn.execute(delete(Order))
+        conn.execute(delete(Product))
+        conn.execute(Product.__table__.insert(), [
+            {'name': f'Пицца {i}', 'price': Money((500 + i) * 100), 'available': True, 'category': 'Пицца'}
+            for i in range(50)
+        ])
+        conn.execute(Order.__table__.insert(), [
+            {'user_id': 1000 + i, 'status': 'pending', 'total_price': Money(100000)}
+            for i in range(1000)
+        ])
+    engine.dispose()
+
+
+def _writer(database_url: str, profile: str, deadline: float, results):
+    engine = get_engine(database_url, profile)
+    rng = random.Random(os.getpid())
+    done = locked = 0
+    while time.monotonic() < deadline:
+        try:
+            with engine.begin() as conn:
+                if rng.random() < 0.7:
+                    # Тот же запрос, что в CartService.add_to_cart
+                    stmt = sqlite.insert(Cart).values(
+                        user_id=rng.randint(1, 5000),
+                        product_id=rng.randint(1, 50),
+                        quantity=1
+                    )
+                    conn.execute(stmt.on_conflict_do_update(
+                        index_elements=[Cart.user_id, Cart.product_id],
+                        set_={'quantity': Cart.quantity + stmt.excluded.quantity}
+                    ))
+                else:
+                    conn.execute(
+                        update(Order)
+                        .where(Order.id == rng.randint(1, 1000))
+                        .values(status=rng.choice(['paid', 'processing', 'completed']))
+                    )
+            done += 1
+        except OperationalError:
+            locked += 1
+    engine.dispose()
+    results.put(('writer', done, locked))
+
+
+def _reader(database_url: str, profile: str, deadline: float, results):
+    engine = get_engine(database_url, profile)
+    rng = random.Random(os.getpid())
+    done = locked = 0
+    while time.monotonic() < deadline:
+        try:
+            with engine.connect() as conn:
+                conn.execute(
+                    select(Product.id, Product.name, Product.price)
+                    .filter_by(available=True)
+                    .order_by(Product.category, Product.name)
+                ).all()
+                conn.execute(
+                    select(func.count(Cart.id), func.sum(Cart.quantity))
+                    .where(Cart.user_id == rng.randint(1, 5000))
+                ).one()
+            done += 1
+        except OperationalError:
+            locked += 1
+    engine.dispose()
+    results.put(('reader', done, locked))
+
+
+def run_benchmark(database_url: str, profile: str, writers: int, readers: int,
+                  duration: float) -> Dict[str, int]:
+    """Запустить процессы-писатели и читатели, вернуть суммарные счетчики"""
+    _prepare(database_url, profile)
+
+    results = multiprocessing.Queue()
+    deadline = time.monotonic() + duration
+    processes: List[multiprocessing.Process] = [
+        multiprocessing.Process(target=_writer, args=(database_url, profile, deadline, results))
+        for _ in range(writers)
+    ] + [
+        multiprocessing.Process(target=_reader, args=(database_url, profile, deadline, results))
+        for _ in range(readers)
+    ]
+    for process in processes:
+        process.start()
+
+    totals = {'writer': 0, 'writer_locked': 0, 'reader': 0, 'reader_locked': 0}
+    for _ in processes:
+        role, done, locked = results.get()
+        totals[role] += done
+        totals[f'{role}_locked'] += locked
+    for process in processes:
+        process.join()
+    return totals
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Нагрузочный тест SQLite из нескольких процессов')
+    parser.add_argument('--database-url', help='по умолчанию временный файл')
+    parser.add_argument('--profile', choices=PROFILES + ('all',), default='all')
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    profiles = PROFILES if args.profile == 'all' else (args.profile,)
+    print(f"{'профиль':<12}{'запись/с':>10}{'locked':>8}{'чтение/с':>10}{'locked':>8}")
+    for profile in profiles:
+        with tempfile.TemporaryDirectory() as tmp:
+            # Для каждого профиля свежий файл: journal_mode=WAL сохраняется в файле
+            database_url = args.database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            totals = run_benchmark(
+                database_url, profile, args.writers, args.readers, args.duration
+            )
+        print(
+            f"{profile:<12}"
+            f"{totals['writer'] / args.duration:>10.0f}{totals['writer_locked']:>8}"
+            f"{totals['reader'] / args.duration:>10.0f}{totals['reader_locked']:>8}"
+        )
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -24,4 +24,7 @@ ADMIN_URL = 'http://localhost:5000'
 TOKEN_LIFETIME_HOURS = 1
 
 # Запрещенные слова для фильтра
-RESTRICTED_WORDS = {'какашка', 'попа', 'нафиг'}
\ No newline at end of file
+RESTRICTED_WORDS = {'какашка', 'попа', 'нафиг'}
+
+# Каталог нормализованных изображений товаров (и миниатюр *_thumb.jpg)
+IMAGES_DIR = 'data/images'
\ No newline at end of file
@@ -8,6 +8,8 @@ class Base(DeclarativeBase):
     ... 
 
 
+# Схема старых приложений (config.DATABASE_URL): цены в рублях (REAL).
+# Миграции src/database/migrations.py эту базу не затрагивают.
 class Product(Base):
     __tablename__ = 'product'
 
@@ -11,8 +11,10 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 from src.bot import (
     setup_logging, create_bot, create_dispatcher,
-    setup_bot_commands, get_db_manager
+    setup_bot_commands, get_db_manager, get_image_pipeline, run_webhook,
+    run_sharded
 )
+from src.config import DB_AUTO_MIGRATE, BOT_MODE, BOT_WORKERS
 
 
 async def main():
@@ -26,16 +28,32 @@ async def main():
     try:
         # Инициализация базы данных
         db_manager = get_db_manager()
-        logger.info("База данных инициализирована")
+        schema_version = await db_manager.ensure_schema(DB_AUTO_MIGRATE)
+        logger.info(f"База данных инициализирована (схема v{schema_version})")
 
-        # Создание бота и диспетчера
+        # Создание бота
         bot = create_bot()
-        dp = create_dispatcher()
 
         # Настройка команд бота
         await setup_bot_commands(bot)
         logger.info("Команды бота настроены")
 
+        if BOT_WORKERS > 0:
+            # Этот процесс только принимает обновления, обрабатывают их воркеры
+            logger.info(f"Бот запущен с {BOT_WORKERS} процессами-обработчиками ({BOT_MODE})")
+            print("Bot successfully started! Press Ctrl+C to stop.")
+            await run_sharded(bot, BOT_WORKERS)
+            return
+
+        # Создание диспетчера
+        dp = create_dispatcher()
+
+        if BOT_MODE == 'webhook':
+            logger.info("Бот запущен в режиме webhook!")
+            print("Bot successfully started! Press Ctrl+C to stop.")
+            await run_webhook(dp, bot)
+            return
+
         # Очистка вебхуков
         await bot.delete_webhook(drop_pending_updates=True)
         logger.info("Вебхуки очищены")
@@ -50,6 +68,8 @@ async def main():
         raise
     finally:
         logger.info("Бот завершает работу...")
+        await get_db_manager().dispose()
+        get_image_pipeline().shutdown()
 
 
 if __name__ == "__main__":
@@ -2,4 +2,9 @@
 Модуль бота
 """
 from .setup import setup_logging, create_bot, create_dispatcher, setup_bot_commands
-from .dependencies import get_db_manager, get_db_session
\ No newline at end of file
+from .webhook import run_webhook
+from .sharding import run_sharded
+from .dependencies import (
+    get_db_manager, get_db_session, get_image_pipeline, get_fsm_storage, get_event_isolation,
+    get_edit_coalescer, get_outbound_scheduler, get_throttling
+)
\ No newline at end of file
@@ -0,0 +1,166 @@
+"""
+Рассылка сообщений всем пользователям бота
+"""
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import List, NamedTuple, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramForbiddenError
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.database.models import Broadcast, TelegramUser
+from src.utils.rate_limit import TokenBucket
+from .outbound import PRIORITY_BULK, send_priority
+
+logger = logging.getLogger(__name__)
+
+DELIVERED = 'delivered'
+BLOCKED = 'blocked'
+FAILED = 'failed'
+
+
+class BroadcastProgress(NamedTuple):
+    """Итоги рассылки"""
+    broadcast_id: int
+    status: str
+    delivered: int
+    blocked: int
+    failed: int
+
+
+class BroadcastEngine:
+    """Рассылка с постраничной выборкой получателей и сохранением прогресса
+
+    Получатели читаются из telegram_users пачками по chunk_size в порядке
+    user_id (keyset: WHERE user_id > последний обработанный), заблокированные
+    пропускаются. Пачку отправляют concurrency воркеров не чаще rate
+    сообщений в секунду с низким приоритетом, чтобы не задерживать ответы
+    пользователям. После каждой пачки курсор и счетчики фиксируются в
+    broadcasts: прерванная рассылка продолжается с места остановки, а
+    повторно могут уйти только сообщения незафиксированной пачки.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        bot: Bot,
+        chunk_size: int = 500,
+        concurrency: int = 20,
+        rate: float = 25
+    ):
+        self.session_factory = session_factory
+        self.bot = bot
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self._bucket = TokenBucket(rate, 1)
+
+    async def create(self, text: str, created_by: Optional[int] = None) -> int:
+        """Создать рассылку; отправка - run()"""
+        async with self.session_factory() as session:
+            broadcast = Broadcast(text=text, created_by=created_by, status='pending')
+            session.add(broadcast)
+            await session.commit()
+            return broadcast.id
+
+    async def unfinished(self) -> List[int]:
+        """ID рассылок, которые не были доведены до конца"""
+        async with self.session_factory() as session:
+            ids = await session.scalars(
+                select(Broadcast.id)
+                .where(Broadcast.status.in_(['pending', 'running']))
+                .order_by(Broadcast.id)
+            )
+            return list(ids)
+
+    async def run(self, broadcast_id: int) -> BroadcastProgress:
+        """Отправить рассылку (или продолжить прерванную)"""
+        async with self.session_factory() as session:
+            broadcast = await session.get(Broadcast, broadcast_id)
+            if broadcast is None:
+                raise ValueError(f"Рассылка {broadcast_id} не найдена")
+            text, cursor = broadcast.text, broadcast.last_user_id
+            broadcast.status = 'running'
+            await session.commit()
+
+        logger.info(f"Рассылка {broadcast_id}: старт после user_id={cursor}")
+        with send_priority(PRIORITY_BULK):
+            while True:
+                recipients = await self._recipients(cursor)
+                if not recipients:
+                    break
+                outcomes = await self._send_chunk(text, recipients)
+                cursor = recipients[-1]
+                await self._checkpoint(broadcast_id, cursor, outcomes)
+
+        return await self._checkpoint(broadcast_id, cursor, Counter(), status='completed')
+
+    async def _recipients(self, after: int) -> List[int]:
+        async with self.session_factory() as session:
+            rows = await session.scalars(
+                select(TelegramUser.user_id)
+                .where(TelegramUser.user_id > after, TelegramUser.is_banned.isnot(True))
+                .order_by(TelegramUser.user_id)
+                .limit(self.chunk_size)
+            )
+            return list(rows)
+
+    async def _send_chunk(self, text: str, recipients: List[int]) -> Counter:
+        outcomes: Counter = Counter()
+        queue: asyncio.Queue = asyncio.Queue()
+        for user_id in recipients:
+            queue.put_nowait(user_id)
+
+        async def worker():
+            while not queue.empty():
+                user_id = queue.get_nowait()
+                delay = self._bucket.reserve()
+                if delay:
+                    await asyncio.sleep(delay)
+                outcomes[await self._send(user_id, text)] += 1
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(recipients)))))
+        return outcomes
+
+    async def _send(self, user_id: int, text: str) -> str:
+        try:
+            # Текст администратора отправляется как есть, без разметки HTML
+            await self.bot.send_message(user_id, text, parse_mode=None)
+            return DELIVERED
+        except TelegramForbiddenError:
+            # Пользователь заблокировал бота или удалил аккаунт
+            return BLOCKED
+        except TelegramAPIError as e:
+            logger.debug(f"Рассылка: не удалось отправить {user_id}: {e}")
+            return FAILED
+
+    async def _checkpoint(
+        self,
+        broadcast_id: int,
+        cursor: int,
+        outcomes: Counter,
+        status: str = 'running'
+    ) -> BroadcastProgress:
+        async with self.session_factory() as session:
+            await session.execute(
+                update(Broadcast)
+                .where(Broadcast.id == broadcast_id)
+                .values(
+                    last_user_id=cursor,
+                    status=status,
+                    delivered=Broadcast.delivered + outcomes[DELIVERED],
+                    blocked=Broadcast.blocked + outcomes[BLOCKED],
+                    failed=Broadcast.failed + outcomes[FAILED],
+                    updated_at=datetime.utcnow()
+                )
+            )
+            row = (await session.execute(
+                select(Broadcast.id, Broadcast.status, Broadcast.delivered,
+                       Broadcast.blocked, Broadcast.failed)
+                .where(Broadcast.id == broadcast_id)
+            )).one()
+            await session.commit()
+        return BroadcastProgress(*row)
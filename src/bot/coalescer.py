@@ -0,0 +1,99 @@
+"""
+Склейка частых правок клавиатуры одного сообщения
+"""
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import InlineKeyboardMarkup, Message
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingEdit:
+    """Отложенная правка: исходное сообщение и последняя клавиатура"""
+
+    __slots__ = ('message', 'markup', 'task')
+
+    def __init__(self, message: Message, markup: InlineKeyboardMarkup):
+        self.message = message
+        self.markup = markup
+        self.task: Optional[asyncio.Task] = None
+
+
+class EditCoalescer:
+    """Отложенный edit_reply_markup с объединением правок
+
+    Первая правка сообщения откладывается на window секунд; правки того же
+    сообщения, пришедшие за это время, только заменяют клавиатуру. По
+    истечении окна отправляется один запрос с последней клавиатурой, а если
+    она совпала с исходной - ни одного.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._pending: Dict[Tuple[int, int], _PendingEdit] = {}
+        self.requested = 0
+        self.sent = 0
+        self.failed = 0
+
+    @property
+    def saved(self) -> int:
+        """Сколько запросов к API не понадобилось"""
+        return self.requested - self.sent - self.failed - len(self._pending)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'requested': self.requested,
+            'sent': self.sent,
+            'failed': self.failed,
+            'saved': self.saved,
+            'pending': len(self._pending),
+        }
+
+    def edit_reply_markup(self, message: Message, reply_markup: InlineKeyboardMarkup):
+        """Запланировать замену клавиатуры сообщения"""
+        self.requested += 1
+        key = (message.chat.id, message.message_id)
+        pending = self._pending.get(key)
+        if pending is not None:
+            pending.markup = reply_markup
+            return
+
+        pending = self._pending[key] = _PendingEdit(message, reply_markup)
+        pending.task = asyncio.create_task(self._flush_later(key, pending))
+
+    def discard(self, message: Message):
+        """Отменить отложенную правку: сообщение меняется целиком"""
+        pending = self._pending.pop((message.chat.id, message.message_id), None)
+        if pending is not None:
+            pending.task.cancel()
+
+    async def _flush_later(self, key: Tuple[int, int], pending: _PendingEdit):
+        await asyncio.sleep(self.window)
+        await self._flush(key, pending)
+
+    async def _flush(self, key: Tuple[int, int], pending: _PendingEdit):
+        if self._pending.get(key) is not pending:
+            return
+        del self._pending[key]
+        if pending.markup == pending.message.reply_markup:
+            # Нажатия взаимно погасились - клавиатура не изменилась
+            return
+        try:
+            await pending.message.edit_reply_markup(reply_markup=pending.markup)
+            self.sent += 1
+        except TelegramBadRequest as e:
+            # Сообщение удалено или уже содержит эту клавиатуру
+            self.failed += 1
+            logger.debug(f"Правка клавиатуры не применена: {e}")
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Ошибка правки клавиатуры: {e}", exc_info=True)
+
+    async def close(self):
+        """Отправить отложенные правки, не дожидаясь окна"""
+        for key, pending in list(self._pending.items()):
+            pending.task.cancel()
+            await self._flush(key, pending)
@@ -1,22 +1,148 @@
 """
 Зависимости для бота
 """
-from sqlalchemy.orm import Session
-from src.database.database import DatabaseManager
-from src.config import DATABASE_URL
+from aiogram import Bot
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database.database import AsyncDatabaseManager
+from src.services.image_service import ImagePipeline
+from src.bot.storage import DatabaseStorage
+from src.bot.isolation import UserEventIsolation
+from src.bot.coalescer import EditCoalescer
+from src.bot.outbound import OutboundScheduler
+from src.bot.broadcast import BroadcastEngine
+from src.bot.middlewares.throttling import (
+    ThrottlingMiddleware, SlidingWindowLimiter, RedisSlidingWindowLimiter,
+    parse_rate, parse_rates
+)
+from src.config import (
+    DATABASE_URL, DB_WRITE_QUEUE, DB_WRITE_BATCH_SIZE, DB_WRITE_LINGER_MS,
+    FSM_STATE_TTL, FSM_FLUSH_INTERVAL, FSM_CACHE_TTL, QTY_EDIT_WINDOW_MS,
+    BOT_WORKERS, OUTBOUND_GLOBAL_RATE, OUTBOUND_CHAT_RATE, OUTBOUND_CHAT_BURST,
+    OUTBOUND_GROUP_RATE, OUTBOUND_MAX_RETRIES,
+    BROADCAST_CHUNK_SIZE, BROADCAST_CONCURRENCY, BROADCAST_RATE,
+    THROTTLE_DEFAULT_RATE, THROTTLE_RATES, THROTTLE_REDIS_URL
+)
 
 # Глобальный менеджер БД
 _db_manager = None
 
+# Глобальный конвейер обработки изображений
+_image_pipeline = None
 
-def get_db_manager() -> DatabaseManager:
-    """Получить менеджер базы данных"""
+# Глобальное хранилище FSM
+_fsm_storage = None
+
+# Глобальная изоляция обновлений пользователей
+_event_isolation = None
+
+# Глобальная склейка правок клавиатуры
+_edit_coalescer = None
+
+# Глобальный планировщик исходящих запросов
+_outbound_scheduler = None
+
+# Глобальный анти-флуд
+_throttling = None
+
+# Глобальный движок рассылок
+_broadcast_engine = None
+
+
+def get_db_manager() -> AsyncDatabaseManager:
+    """Получить асинхронный менеджер базы данных"""
     global _db_manager
     if _db_manager is None:
-        _db_manager = DatabaseManager(DATABASE_URL)
+        _db_manager = AsyncDatabaseManager(
+            DATABASE_URL,
+            write_queue=DB_WRITE_QUEUE,
+            write_batch_size=DB_WRITE_BATCH_SIZE,
+            write_linger=DB_WRITE_LINGER_MS / 1000
+        )
     return _db_manager
 
 
-def get_db_session() -> Session:
-    """Получить сессию базы данных"""
-    return get_db_manager().get_session()
\ No newline at end of file
+def get_db_session() -> AsyncSession:
+    """Получить асинхронную сессию базы данных"""
+    return get_db_manager().get_session()
+
+
+def get_fsm_storage() -> DatabaseStorage:
+    """Получить постоянное хранилище FSM"""
+    global _fsm_storage
+    if _fsm_storage is None:
+        _fsm_storage = DatabaseStorage(
+            get_db_manager().engine,
+            state_ttl=FSM_STATE_TTL,
+            flush_interval=FSM_FLUSH_INTERVAL,
+            cache_ttl=FSM_CACHE_TTL
+        )
+    return _fsm_storage
+
+
+def get_event_isolation() -> UserEventIsolation:
+    """Получить изоляцию обновлений пользователей"""
+    global _event_isolation
+    if _event_isolation is None:
+        _event_isolation = UserEventIsolation()
+    return _event_isolation
+
+
+def get_edit_coalescer() -> EditCoalescer:
+    """Получить склейку правок клавиатуры"""
+    global _edit_coalescer
+    if _edit_coalescer is None:
+        _edit_coalescer = EditCoalescer(QTY_EDIT_WINDOW_MS / 1000)
+    return _edit_coalescer
+
+
+def get_outbound_scheduler() -> OutboundScheduler:
+    """Получить планировщик исходящих запросов"""
+    global _outbound_scheduler
+    if _outbound_scheduler is None:
+        _outbound_scheduler = OutboundScheduler(
+            global_rate=OUTBOUND_GLOBAL_RATE / max(1, BOT_WORKERS),
+            chat_rate=OUTBOUND_CHAT_RATE,
+            chat_burst=OUTBOUND_CHAT_BURST,
+            group_rate=OUTBOUND_GROUP_RATE,
+            max_retries=OUTBOUND_MAX_RETRIES
+        )
+    return _outbound_scheduler
+
+
+def get_throttling() -> ThrottlingMiddleware:
+    """Получить middleware ограничения частоты"""
+    global _throttling
+    if _throttling is None:
+        limiter = (
+            RedisSlidingWindowLimiter(THROTTLE_REDIS_URL) if THROTTLE_REDIS_URL
+            else SlidingWindowLimiter()
+        )
+        _throttling = ThrottlingMiddleware(
+            limiter, parse_rates(THROTTLE_RATES), parse_rate(THROTTLE_DEFAULT_RATE)
+        )
+    return _throttling
+
+
+def get_broadcast_engine(bot: Bot) -> BroadcastEngine:
+    """Получить движок рассылок
+
+    Один на процесс: одновременные рассылки делят его корзину токенов
+    и вместе не превышают BROADCAST_RATE.
+    """
+    global _broadcast_engine
+    if _broadcast_engine is None:
+        _broadcast_engine = BroadcastEngine(
+            get_db_manager().session_factory, bot,
+            chunk_size=BROADCAST_CHUNK_SIZE,
+            concurrency=BROADCAST_CONCURRENCY,
+            rate=BROADCAST_RATE
+        )
+    return _broadcast_engine
+
+
+def get_image_pipeline() -> ImagePipeline:
+    """Получить конвейер обработки изображений"""
+    global _image_pipeline
+    if _image_pipeline is None:
+        _image_pipeline = ImagePipeline()
+    return _image_pipeline
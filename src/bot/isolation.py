@@ -0,0 +1,97 @@
+"""
+Последовательная обработка обновлений одного пользователя
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, Dict
+
+from aiogram.fsm.storage.base import BaseEventIsolation, StorageKey
+
+
+class IsolationStats:
+    """Метрики ожидания блокировок пользователей"""
+
+    __slots__ = ('acquired', 'contended', 'wait_time', 'max_wait', 'max_waiting')
+
+    def __init__(self):
+        self.acquired = 0
+        # Сколько раз обновлению пришлось ждать предыдущее того же пользователя
+        self.contended = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.max_waiting = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'acquired': self.acquired,
+            'contended': self.contended,
+            'contention_rate': self.contended / self.acquired if self.acquired else 0.0,
+            'avg_wait_ms': self.wait_time / self.contended * 1000 if self.contended else 0.0,
+            'max_wait_ms': self.max_wait * 1000,
+            'max_waiting': self.max_waiting,
+        }
+
+
+class _KeyLock:
+    """Блокировка ключа и число обновлений, которые ее держат или ждут"""
+
+    __slots__ = ('lock', 'holders')
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.holders = 0
+
+
+class UserEventIsolation(BaseEventIsolation):
+    """Изоляция событий FSM по ключу пользователя в чате
+
+    Диспетчер берет блокировку до чтения состояния и держит ее до конца
+    обработки, поэтому обновления одного пользователя выполняются строго
+    по очереди (asyncio.Lock пропускает ожидающих в порядке прихода),
+    а разные пользователи - параллельно. В отличие от SimpleEventIsolation
+    блокировка удаляется, как только ее никто не держит и не ждет.
+    """
+
+    def __init__(self):
+        self._locks: Dict[StorageKey, _KeyLock] = {}
+        self.stats = IsolationStats()
+
+    @property
+    def active(self) -> int:
+        """Сколько пользователей сейчас обрабатывается"""
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def lock(self, key: StorageKey) -> AsyncGenerator[None, None]:
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = _KeyLock()
+        entry.holders += 1
+        try:
+            if entry.lock.locked():
+                self.stats.contended += 1
+                self.stats.max_waiting = max(self.stats.max_waiting, entry.holders - 1)
+                started = time.perf_counter()
+                await entry.lock.acquire()
+                waited = time.perf_counter() - started
+                self.stats.wait_time += waited
+                self.stats.max_wait = max(self.stats.max_wait, waited)
+            else:
+                await entry.lock.acquire()
+            self.stats.acquired += 1
+            try:
+                yield
+            finally:
+                entry.lock.release()
+        finally:
+            entry.holders -= 1
+            # После close() ключ может отсутствовать или принадлежать новой записи
+            if entry.holders == 0 and self._locks.get(key) is entry:
+                del self._locks[key]
+
+    async def close(self) -> None:
+        # Записи, которые еще держат или ждут обновления, удалятся при выходе из lock()
+        for key, entry in list(self._locks.items()):
+            if entry.holders == 0:
+                del self._locks[key]
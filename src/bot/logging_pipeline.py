@@ -0,0 +1,198 @@
+"""
+Неблокирующее структурированное логирование
+"""
+import atexit
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+from typing import Any, Dict, List, Optional
+
+import orjson
+import structlog
+from structlog.contextvars import get_contextvars, merge_contextvars
+from structlog.stdlib import ProcessorFormatter
+
+from src.config import (
+    LOG_LEVEL, LOG_FILE, LOG_FORMAT, LOG_ROTATION, LOG_MAX_BYTES,
+    LOG_ROTATE_WHEN, LOG_BACKUP_COUNT
+)
+
+_listeners: List[QueueListener] = []
+
+
+def _dumps(event_dict: Dict[str, Any], **kwargs) -> str:
+    return orjson.dumps(event_dict, option=orjson.OPT_NON_STR_KEYS, **kwargs).decode()
+
+
+def _add_record_context(logger, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Контекст обновления, снятый в потоке цикла событий (см. ContextQueueHandler)"""
+    record = event_dict.get('_record')
+    for key, value in getattr(record, 'context', {}).items():
+        event_dict.setdefault(key, value)
+    return event_dict
+
+
+# Общая часть цепочки для записей stdlib logging и structlog
+_PRE_CHAIN = [
+    structlog.stdlib.add_log_level,
+    structlog.stdlib.add_logger_name,
+    structlog.processors.TimeStamper(fmt='iso', utc=True),
+]
+
+
+class _Formatter(ProcessorFormatter):
+    """ProcessorFormatter, пропускающий записи, уже отрисованные в процессе-обработчике"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, 'rendered', False):
+            return record.msg
+        return super().format(record)
+
+
+def _formatter(json: bool) -> logging.Formatter:
+    processors = [_add_record_context, ProcessorFormatter.remove_processors_meta]
+    if json:
+        processors += [
+            structlog.processors.format_exc_info,
+            structlog.processors.JSONRenderer(serializer=_dumps),
+        ]
+    else:
+        # ConsoleRenderer сам оформляет исключения
+        processors.append(structlog.dev.ConsoleRenderer(colors=False))
+    return _Formatter(processors=processors, foreign_pre_chain=_PRE_CHAIN)
+
+
+class ContextQueueHandler(QueueHandler):
+    """Кладет запись в очередь, не выполняя ввод-вывод в потоке цикла событий
+
+    contextvars недоступны в потоке QueueListener, поэтому контекст
+    обновления (user_id, handler, update_id) снимается здесь.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if not isinstance(record.msg, dict):
+            # Запись stdlib: подставляем аргументы сейчас, пока они не изменились
+            record.msg = record.getMessage()
+            record.args = None
+        record.context = get_contextvars()
+        return record
+
+
+class RenderingQueueHandler(ContextQueueHandler):
+    """Для процессов-обработчиков: отрисовывает запись в JSON до передачи в главный процесс
+
+    Через multiprocessing.Queue записи передаются с pickle, поэтому
+    отправляется готовая строка, а пишет в файл только главный процесс.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = super().prepare(record)
+        return logging.makeLogRecord({
+            'name': record.name,
+            'levelno': record.levelno,
+            'levelname': record.levelname,
+            'created': record.created,
+            'msg': self.format(record),
+            'rendered': True,
+        })
+
+
+def _file_handler(log_file: str) -> logging.Handler:
+    directory = os.path.dirname(log_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if LOG_ROTATION == 'size':
+        return RotatingFileHandler(
+            log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+        )
+    if LOG_ROTATION == 'time':
+        return TimedRotatingFileHandler(
+            log_file, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+        )
+    return logging.FileHandler(log_file, encoding='utf-8')
+
+
+def _configure_structlog():
+    structlog.configure(
+        processors=[
+            merge_contextvars,
+            structlog.stdlib.filter_by_level,
+            *_PRE_CHAIN,
+            structlog.stdlib.PositionalArgumentsFormatter(),
+            ProcessorFormatter.wrap_for_formatter,
+        ],
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.stdlib.BoundLogger,
+        cache_logger_on_first_use=True,
+    )
+
+
+def _install(handler: logging.Handler):
+    root = logging.getLogger()
+    for old in root.handlers[:]:
+        root.removeHandler(old)
+        old.close()
+    root.addHandler(handler)
+    root.setLevel(getattr(logging, LOG_LEVEL))
+
+
+def setup_logging(
+    worker_queue=None,
+    log_file: Optional[str] = LOG_FILE,
+    console: bool = True
+) -> Optional[QueueListener]:
+    """Настроить логирование через очередь
+
+    Обработчики пишут записи в очередь, файл и консоль обслуживает поток
+    QueueListener. worker_queue - multiprocessing.Queue главного процесса
+    для процессов-обработчиков (см. attach_worker_queue).
+    """
+    _configure_structlog()
+
+    if worker_queue is not None:
+        handler = RenderingQueueHandler(worker_queue)
+        handler.setFormatter(_formatter(json=True))
+        _install(handler)
+        return None
+
+    stop_logging()
+    handlers = []
+    if log_file:
+        file_handler = _file_handler(log_file)
+        file_handler.setFormatter(_formatter(json=True))
+        handlers.append(file_handler)
+    if console:
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(_formatter(json=LOG_FORMAT == 'json'))
+        handlers.append(stream_handler)
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    _install(ContextQueueHandler(records))
+    return listener
+
+
+def attach_worker_queue(worker_queue) -> QueueListener:
+    """Писать записи процессов-обработчиков теми же обработчиками, что и главный процесс"""
+    if not _listeners:
+        raise RuntimeError("Сначала нужно вызвать setup_logging()")
+    listener = QueueListener(worker_queue, *_listeners[0].handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    return listener
+
+
+def stop_logging():
+    """Дописать записи из очередей и закрыть файлы"""
+    while _listeners:
+        listener = _listeners.pop()
+        listener.stop()
+        if not _listeners:
+            for handler in listener.handlers:
+                handler.close()
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,7 @@
+"""
+Middleware бота
+"""
+from .database import DatabaseMiddleware
+from .throttling import ThrottlingMiddleware
+from .roles import RoleMiddleware
+from .logging_context import LoggingContextMiddleware
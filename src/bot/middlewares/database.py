@@ -0,0 +1,70 @@
+"""
+Middleware сессии базы данных (одна сессия и одна транзакция на обновление)
+"""
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from src.database.database import AsyncDatabaseManager
+from src.services import (
+    UserService, ProductService, OrderService, CartService,
+    CatalogService, MediaService
+)
+
+
+class DatabaseMiddleware(BaseMiddleware):
+    """Unit of work: открывает сессию на обновление и коммитит один раз
+
+    В данные обработчика передаются ``session`` и готовые сервисы
+    (``user_service``, ``product_service``, ``order_service``,
+    ``cart_service``, ``catalog_service``, ``media_service``). Сервисы только выполняют flush, фиксация
+    транзакции происходит здесь после успешного завершения обработчика.
+    При исключении транзакция откатывается, сессия всегда закрывается.
+
+    ``db_write(operation)`` - горячие записи: без очереди записи операция
+    выполняется в этой же сессии, с очередью - уходит единственному писателю.
+    ``db_manager`` передается для доступа к метрикам очереди.
+
+    Отправитель события сохраняется в telegram_users через
+    ``UserService.touch_user``: знакомые процессу пользователи запросов не делают.
+    """
+
+    def __init__(self, db_manager: AsyncDatabaseManager):
+        self.db_manager = db_manager
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        async with self.db_manager.get_session() as session:
+            data['session'] = session
+            data['user_service'] = UserService(session)
+            data['product_service'] = ProductService(session)
+            data['order_service'] = OrderService(session)
+            data['cart_service'] = CartService(session)
+            data['catalog_service'] = CatalogService(session)
+            data['media_service'] = MediaService(session)
+            data['db_write'] = partial(self.db_manager.write, session=session)
+            data['db_manager'] = self.db_manager
+
+            try:
+                user = data.get('event_from_user')
+                if user is not None:
+                    await data['user_service'].touch_user({
+                        'user_id': user.id,
+                        'username': user.username,
+                        'first_name': user.first_name,
+                        'last_name': user.last_name
+                    })
+                result = await handler(event, data)
+            except Exception:
+                await session.rollback()
+                raise
+
+            if session.in_transaction():
+                await session.commit()
+            return result
@@ -0,0 +1,36 @@
+"""
+Middleware контекста логирования
+"""
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+from structlog.contextvars import bound_contextvars
+
+
+class LoggingContextMiddleware(BaseMiddleware):
+    """Привязывает к записям лога update_id, user_id и имя обработчика
+
+    На dp.update (внешний middleware) добавляет update_id и user_id,
+    на событиях (внутренний) - имя обработчика. Контекст хранится в
+    contextvars и попадает во все записи, сделанные при обработке обновления.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        context = {}
+        if isinstance(event, Update):
+            context['update_id'] = event.update_id
+            user = data.get('event_from_user')
+            if user is not None:
+                context['user_id'] = user.id
+        handler_object = data.get('handler')
+        if handler_object is not None:
+            context['handler'] = handler_object.callback.__name__
+
+        with bound_contextvars(**context):
+            return await handler(event, data)
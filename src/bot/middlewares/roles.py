@@ -0,0 +1,44 @@
+"""
+Middleware ролей пользователя
+"""
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, TelegramObject
+
+from src.database.database import AsyncDatabaseManager
+from src.services import is_admin, is_banned
+from src.services.role_service import refresh_roles
+
+
+class RoleMiddleware(BaseMiddleware):
+    """Проверка ролей по множествам в памяти, без запросов на обновление
+
+    События заблокированных пользователей отбрасываются, в данные
+    обработчика передается ``is_admin``. Множества перечитываются из БД
+    только если их изменил другой процесс или истек ROLES_REFRESH_INTERVAL.
+    """
+
+    def __init__(self, db_manager: AsyncDatabaseManager):
+        self.db_manager = db_manager
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        await refresh_roles(self.db_manager.get_session)
+
+        user = data.get('event_from_user')
+        if user is None:
+            data['is_admin'] = False
+            return await handler(event, data)
+
+        if is_banned(user.id):
+            if isinstance(event, CallbackQuery):
+                await event.answer("🚫 Вы заблокированы", show_alert=True)
+            return None
+
+        data['is_admin'] = is_admin(user.id)
+        return await handler(event, data)
@@ -0,0 +1,155 @@
+"""
+Middleware ограничения частоты запросов одного пользователя
+"""
+import os
+import time
+from collections import Counter, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, TelegramObject
+
+# Лимит: не больше limit событий за period секунд; limit 0 - без ограничения
+Rate = Tuple[int, float]
+
+# Очищать простаивающие окна, когда их накопилось больше
+MAX_WINDOWS = 50_000
+
+# Атомарное скользящее окно на sorted set Redis
+_REDIS_HIT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, ARGV[1] - ARGV[2])
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[1], ARGV[4])
+redis.call('PEXPIRE', KEYS[1], math.ceil(ARGV[2] * 1000))
+return 1
+"""
+
+
+def parse_rate(spec: str) -> Rate:
+    """'5/1' -> 5 событий за 1 секунду"""
+    limit, _, period = spec.partition('/')
+    return int(limit), float(period or 1)
+
+
+def parse_rates(spec: str) -> Dict[str, Rate]:
+    """'show_cart=2/1,catalog_navigation=4/1' -> лимиты по обработчикам"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, rate = item.partition('=')
+        rates[name.strip()] = parse_rate(rate)
+    return rates
+
+
+class SlidingWindowLimiter:
+    """Скользящее окно в памяти процесса
+
+    При распределении обновлений по процессам (BOT_WORKERS) пользователь
+    всегда попадает в один процесс, поэтому окна в памяти точны.
+    """
+
+    def __init__(self):
+        self._windows: Dict[str, Deque[float]] = {}
+        self._max_period = 0.0
+
+    async def hit(self, key: str, limit: int, period: float) -> bool:
+        """Учесть событие; False - лимит исчерпан"""
+        now = time.monotonic()
+        window = self._windows.get(key)
+        if window is None:
+            if len(self._windows) >= MAX_WINDOWS:
+                self._purge(now)
+            window = self._windows[key] = deque()
+            self._max_period = max(self._max_period, period)
+
+        while window and window[0] <= now - period:
+            window.popleft()
+        if len(window) >= limit:
+            return False
+        window.append(now)
+        return True
+
+    def _purge(self, now: float):
+        threshold = now - self._max_period
+        for key in [key for key, window in self._windows.items()
+                    if not window or window[-1] <= threshold]:
+            del self._windows[key]
+
+
+class RedisSlidingWindowLimiter:
+    """Скользящее окно в Redis: общий лимит для нескольких экземпляров бота
+
+    Требует пакет redis (в requirements не входит).
+    """
+
+    def __init__(self, url: str, prefix: str = 'throttle:'):
+        try:
+            from redis.asyncio import Redis
+        except ImportError as e:
+            raise RuntimeError("Для THROTTLE_REDIS_URL нужен пакет redis: pip install redis") from e
+        self.redis = Redis.from_url(url)
+        self.prefix = prefix
+        self._script = self.redis.register_script(_REDIS_HIT)
+        self._sequence = 0
+
+    async def hit(self, key: str, limit: int, period: float) -> bool:
+        self._sequence += 1
+        now = time.time()
+        # Уникальный член множества: одинаковые метки времени не склеиваются
+        member = f'{now}:{os.getpid()}:{self._sequence}'
+        return bool(await self._script(keys=[self.prefix + key], args=[now, period, limit, member]))
+
+
+class ThrottlingStats:
+    """Пропущенные и отклоненные события по обработчикам"""
+
+    __slots__ = ('passed', 'rejected')
+
+    def __init__(self):
+        self.passed: Counter = Counter()
+        self.rejected: Counter = Counter()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'passed': dict(self.passed),
+            'rejected': dict(self.rejected.most_common()),
+            'rejected_total': sum(self.rejected.values()),
+        }
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Лимит частоты событий пользователя для каждого обработчика
+
+    Регистрируется до DatabaseMiddleware: лишнее событие отбрасывается
+    до открытия сессии и вызова сервисов. На отброшенный callback
+    отвечаем пустым answer(), чтобы у пользователя не висели «часики».
+    """
+
+    def __init__(self, limiter, rates: Dict[str, Rate], default_rate: Rate):
+        self.limiter = limiter
+        self.rates = rates
+        self.default_rate = default_rate
+        self.stats = ThrottlingStats()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        user = data.get('event_from_user')
+        handler_object = data.get('handler')
+        if user is None or handler_object is None:
+            return await handler(event, data)
+
+        name = handler_object.callback.__name__
+        limit, period = self.rates.get(name, self.default_rate)
+        if limit <= 0 or await self.limiter.hit(f'{user.id}:{name}', limit, period):
+            self.stats.passed[name] += 1
+            return await handler(event, data)
+
+        self.stats.rejected[name] += 1
+        if isinstance(event, CallbackQuery):
+            await event.answer()
+        return None
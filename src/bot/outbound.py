@@ -0,0 +1,276 @@
+"""
+Планировщик исходящих запросов к Telegram Bot API
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware, NextRequestMiddlewareType
+)
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from src.utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Приоритеты: меньше - раньше
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 10
+
+_priority: ContextVar[int] = ContextVar('outbound_priority', default=PRIORITY_INTERACTIVE)
+
+# Методы, на которые действуют лимиты Telegram на отправку сообщений.
+# Только они проходят через планировщик; остальные (answer*, delete*, get*)
+# уходят в API сразу, без очереди, повторов и обработки 429.
+LIMITED_PREFIXES = ('send', 'edit', 'copy', 'forward')
+
+# Идемпотентные из LIMITED_PREFIXES: повтор после таймаута не создаст второе сообщение
+IDEMPOTENT_PREFIXES = ('edit',)
+
+# 429 в стольких разных чатах за FLOOD_WINDOW секунд - лимит общий для бота
+GLOBAL_FLOOD_CHATS = 3
+FLOOD_WINDOW = 1.0
+
+# Границы корзин гистограммы задержки, мс
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Удалять простаивающие лимиты чатов, когда их накопилось больше
+MAX_IDLE_CHATS = 10_000
+
+
+@contextmanager
+def send_priority(priority: int) -> Iterator[None]:
+    """Назначить приоритет запросам, отправленным внутри блока (и его задачам)"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class LatencyHistogram:
+    """Гистограмма задержек с фиксированными корзинами"""
+
+    __slots__ = ('counts', 'total', 'sum')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(LATENCY_BUCKETS_MS, seconds * 1000)] += 1
+        self.total += 1
+        self.sum += seconds
+
+    def percentile(self, value: float) -> float:
+        """Верхняя граница корзины, в которую попадает перцентиль (мс)"""
+        if not self.total:
+            return 0.0
+        threshold = self.total * value
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= threshold:
+                return float(bound)
+        return float('inf')
+
+    def as_dict(self) -> Dict[str, Any]:
+        labels = [f'<={bound}' for bound in LATENCY_BUCKETS_MS] + [f'>{LATENCY_BUCKETS_MS[-1]}']
+        return {
+            'count': self.total,
+            'avg_ms': self.sum / self.total * 1000 if self.total else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p99_ms': self.percentile(0.99),
+            'buckets': dict(zip(labels, self.counts)),
+        }
+
+
+class OutboundStats:
+    """Метрики планировщика исходящих запросов"""
+
+    __slots__ = ('sent', 'retried', 'flood_waits', 'failed', 'max_depth', 'latency')
+
+    def __init__(self):
+        self.sent = 0
+        self.retried = 0
+        # Ответы 429 (TelegramRetryAfter)
+        self.flood_waits = 0
+        self.failed = 0
+        self.max_depth = 0
+        # Ожидание в очереди по приоритетам
+        self.latency: Dict[int, LatencyHistogram] = {}
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'sent': self.sent,
+            'retried': self.retried,
+            'flood_waits': self.flood_waits,
+            'failed': self.failed,
+            'max_depth': self.max_depth,
+            'latency': {priority: histogram.as_dict()
+                        for priority, histogram in sorted(self.latency.items())},
+        }
+
+
+class OutboundScheduler(BaseRequestMiddleware):
+    """Middleware сессии бота: лимиты, приоритеты и повторы запросов
+
+    Запросы, отправляющие или меняющие сообщения, проходят два ограничения:
+    корзину токенов своего чата (в личном чате - около сообщения в секунду,
+    в группах - 20 в минуту) и общую корзину бота (30 в секунду). Общие
+    токены раздаются по приоритету: ответы пользователям раньше рассылок
+    (см. send_priority). На TelegramRetryAfter чат или весь бот
+    приостанавливается на retry_after и запрос повторяется; ошибки сервера
+    и сети повторяются с экспоненциальной задержкой только для идемпотентных
+    методов: sendMessage или sendInvoice, принятый Telegram до таймаута,
+    при повторе ушел бы дважды.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30,
+        chat_rate: float = 1,
+        chat_burst: float = 3,
+        group_rate: float = 20 / 60,
+        max_retries: int = 3,
+        backoff: float = 0.5
+    ):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+        self.backoff = backoff
+        # Без запаса: в любую секунду уходит не больше global_rate + 1 запроса
+        self._global = TokenBucket(global_rate, 1)
+        self._chats: Dict[Union[int, str], TokenBucket] = {}
+        self._heap: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._pump: Optional[asyncio.Task] = None
+        # Последний 429 по чатам - чтобы отличить лимит чата от общего
+        self._floods: Dict[Union[int, str], float] = {}
+        self.stats = OutboundStats()
+
+    @property
+    def depth(self) -> int:
+        """Сколько запросов ждут общего токена"""
+        return len(self._heap)
+
+    def _chat_bucket(self, chat_id: Union[int, str]) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= MAX_IDLE_CHATS:
+                now = time.monotonic()
+                for key in [key for key, value in self._chats.items() if value.idle(now)]:
+                    del self._chats[key]
+            private = isinstance(chat_id, int) and chat_id > 0
+            rate = self.chat_rate if private else self.group_rate
+            bucket = self._chats[chat_id] = TokenBucket(rate, self.chat_burst)
+        return bucket
+
+    def _pause_after_flood(self, chat_id: Union[int, str], retry_after: float):
+        """Приостановить чат, а при 429 сразу в нескольких чатах - весь бот"""
+        self._chat_bucket(chat_id).pause(retry_after)
+        now = time.monotonic()
+        self._floods[chat_id] = now
+        recent = {key: at for key, at in self._floods.items() if now - at <= FLOOD_WINDOW}
+        self._floods = recent
+        if len(recent) >= GLOBAL_FLOOD_CHATS:
+            self._global.pause(retry_after)
+
+    async def _acquire(self, chat_id: Union[int, str], priority: int):
+        # Резерв в корзине чата сохраняет порядок запросов одного чата
+        delay = self._chat_bucket(chat_id).reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+        if self._pump is None:
+            # Создаем лениво, внутри работающего цикла событий
+            self._wakeup = asyncio.Event()
+            self._pump = asyncio.create_task(self._pump_loop(), name='outbound-pump')
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (priority, next(self._sequence), future))
+        self.stats.max_depth = max(self.stats.max_depth, len(self._heap))
+        self._wakeup.set()
+        await future
+
+    async def _pump_loop(self):
+        """Выдача общих токенов ожидающим запросам в порядке приоритета"""
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            delay = self._global.reserve()
+            if delay:
+                await asyncio.sleep(delay)
+            while self._heap:
+                _, _, future = heapq.heappop(self._heap)
+                if not future.done():
+                    future.set_result(None)
+                    break
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, 'chat_id', None)
+        if chat_id is None or not method.__api_method__.lower().startswith(LIMITED_PREFIXES):
+            return await make_request(bot, method)
+
+        priority = _priority.get()
+        histogram = self.stats.latency.get(priority)
+        if histogram is None:
+            histogram = self.stats.latency[priority] = LatencyHistogram()
+
+        idempotent = method.__api_method__.lower().startswith(IDEMPOTENT_PREFIXES)
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            await self._acquire(chat_id, priority)
+            histogram.observe(time.monotonic() - started)
+            try:
+                response = await make_request(bot, method)
+                self.stats.sent += 1
+                return response
+            except TelegramRetryAfter as e:
+                self.stats.flood_waits += 1
+                self._pause_after_flood(chat_id, e.retry_after)
+                logger.warning(f"Flood control в чате {chat_id}: ждем {e.retry_after} с")
+                if attempt >= self.max_retries:
+                    self.stats.failed += 1
+                    raise
+            except (TelegramServerError, TelegramNetworkError) as e:
+                if not idempotent or attempt >= self.max_retries:
+                    self.stats.failed += 1
+                    raise
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+                logger.warning(f"Повтор {type(method).__name__} после ошибки: {e}")
+            attempt += 1
+            self.stats.retried += 1
+
+    async def close(self):
+        if self._pump is not None:
+            self._pump.cancel()
+            try:
+                await self._pump
+            except asyncio.CancelledError:
+                pass
+            self._pump = None
+        for _, _, future in self._heap:
+            future.cancel()
+        self._heap.clear()
@@ -1,41 +1,78 @@
 """
 Настройка бота
 """
-import logging
 from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 
-from src.config import BOT_TOKEN, LOG_LEVEL, LOG_FILE
+from src.config import BOT_TOKEN, FSM_STORAGE, TELEGRAM_API_URL
 from src.handlers.admin import get_admin_router
 from src.handlers.user import get_user_router
-
-
-def setup_logging():
-    """Настройка логирования"""
-    logging.basicConfig(
-        level=getattr(logging, LOG_LEVEL),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(LOG_FILE),
-            logging.StreamHandler()
-        ]
-    )
+from src.bot.dependencies import (
+    get_db_manager, get_fsm_storage, get_event_isolation, get_edit_coalescer,
+    get_outbound_scheduler, get_throttling
+)
+from src.bot.middlewares import DatabaseMiddleware, RoleMiddleware, LoggingContextMiddleware
+from src.bot.logging_pipeline import setup_logging
+from src.services import load_roles
 
 
 def create_bot() -> Bot:
     """Создание экземпляра бота"""
+    if TELEGRAM_API_URL:
+        # Локальный сервер Bot API или заглушка для нагрузочных тестов
+        session = AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL))
+    else:
+        session = AiohttpSession()
+    # Все запросы проходят через лимиты и повторы планировщика
+    session.middleware(get_outbound_scheduler())
     return Bot(
         token=BOT_TOKEN,
+        session=session,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML)
     )
 
 
+async def load_roles_on_startup():
+    """Загрузить множества администраторов и заблокированных"""
+    async with get_db_manager().get_session() as session:
+        await load_roles(session)
+
+
 def create_dispatcher() -> Dispatcher:
     """Создание диспетчера"""
-    storage = MemoryStorage()
-    dp = Dispatcher(storage=storage)
+    # Состояния переживают перезапуск; MemoryStorage - для локальной отладки
+    storage = MemoryStorage() if FSM_STORAGE == 'memory' else get_fsm_storage()
+    # Обновления одного пользователя обрабатываются по очереди
+    dp = Dispatcher(storage=storage, events_isolation=get_event_isolation())
+    # Отложенные правки клавиатуры отправляем до закрытия сессии бота
+    dp.startup.register(load_roles_on_startup)
+    dp.shutdown.register(get_edit_coalescer().close)
+    dp.shutdown.register(get_outbound_scheduler().close)
+
+    # update_id, user_id и обработчик в каждой записи лога
+    logging_context = LoggingContextMiddleware()
+    dp.update.outer_middleware(logging_context)
+    dp.message.middleware(logging_context)
+    dp.callback_query.middleware(logging_context)
+
+    # Роли из памяти: заблокированные не доходят даже до анти-флуда
+    role_middleware = RoleMiddleware(get_db_manager())
+    dp.message.middleware(role_middleware)
+    dp.callback_query.middleware(role_middleware)
+
+    # Анти-флуд до открытия сессии: лишние события не доходят до сервисов
+    throttling = get_throttling()
+    dp.message.middleware(throttling)
+    dp.callback_query.middleware(throttling)
+
+    # Одна сессия БД на обновление для всех обработчиков
+    db_middleware = DatabaseMiddleware(get_db_manager())
+    dp.message.middleware(db_middleware)
+    dp.callback_query.middleware(db_middleware)
 
     # Подключаем роутеры
     dp.include_router(get_admin_router())
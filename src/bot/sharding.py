@@ -0,0 +1,277 @@
+"""
+Горизонтальное масштабирование: распределение обновлений по процессам
+
+Главный процесс получает обновления (polling или webhook), не разбирая их
+в объекты aiogram, и по from_user.id отправляет в один из N процессов-
+обработчиков. В каждом работает обычный диспетчер из create_dispatcher().
+Обновления одного пользователя всегда попадают в один процесс и
+обрабатываются там по очереди, разные пользователи - параллельно.
+Кэши процесса (каталог, FSM) при этом остаются корректными: изменения
+каталога передаются между процессами через общий счетчик.
+"""
+import asyncio
+import logging
+import multiprocessing
+import signal
+import threading
+from queue import Empty
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import aiohttp
+import orjson
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+
+from src.config import (
+    BOT_MODE, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_HOST, WEBHOOK_PORT,
+    WEBHOOK_SECRET, WORKER_MAX_CONCURRENCY
+)
+from src.bot.setup import setup_logging, create_bot, create_dispatcher
+from src.bot.logging_pipeline import attach_worker_queue
+from src.bot.dependencies import get_db_manager, get_image_pipeline
+from src.services import share_catalog_changes, share_role_changes
+
+logger = logging.getLogger(__name__)
+
+# Таймаут long polling в главном процессе (в секундах)
+POLLING_TIMEOUT = 30
+
+# Сигнал процессу-обработчику завершить работу
+STOP = None
+
+
+def update_user_id(update: Dict[str, Any]) -> int:
+    """ID пользователя, от которого пришло обновление (0, если его нет)"""
+    for key, value in update.items():
+        if key == 'update_id' or not isinstance(value, dict):
+            continue
+        user = value.get('from') or value.get('user')
+        if user:
+            return user['id']
+        chat = value.get('chat')
+        if chat:
+            return chat['id']
+    return 0
+
+
+class UserLanes:
+    """Параллельная обработка с сохранением порядка для одного пользователя
+
+    Каждое обновление ждет завершения предыдущего обновления того же
+    пользователя; одновременно выполняется не больше max_concurrency.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tails: Dict[int, asyncio.Task] = {}
+        self._tasks = set()
+
+    def submit(self, user_id: int, handler: Callable[[], Awaitable[None]]):
+        previous = self._tails.get(user_id)
+        task = asyncio.create_task(self._run(previous, handler))
+        self._tails[user_id] = task
+        self._tasks.add(task)
+        task.add_done_callback(lambda done: self._release(user_id, done))
+
+    async def _run(self, previous: Optional[asyncio.Task], handler: Callable[[], Awaitable[None]]):
+        if previous is not None:
+            await asyncio.wait([previous])
+        async with self._semaphore:
+            await handler()
+
+    def _release(self, user_id: int, task: asyncio.Task):
+        self._tasks.discard(task)
+        if self._tails.get(user_id) is task:
+            del self._tails[user_id]
+
+    async def join(self):
+        """Дождаться обработки всех принятых обновлений"""
+        while self._tasks:
+            await asyncio.wait(list(self._tasks))
+
+
+class ShardRouter:
+    """Распределение обновлений по очередям процессов-обработчиков"""
+
+    def __init__(self, queues: List[multiprocessing.Queue]):
+        self.queues = queues
+        self.routed = [0] * len(queues)
+
+    def route(self, update: Dict[str, Any], raw: Optional[bytes] = None):
+        shard = update_user_id(update) % len(self.queues)
+        self.queues[shard].put(raw if raw is not None else orjson.dumps(update))
+        self.routed[shard] += 1
+
+    def stop(self):
+        for queue in self.queues:
+            queue.put(STOP)
+
+
+# --- Процесс-обработчик ---
+
+def _read_queue(queue: multiprocessing.Queue, loop: asyncio.AbstractEventLoop,
+                deliver: Callable[[List[Optional[bytes]]], None]):
+    """Поток чтения очереди: передает обновления в цикл событий пачками"""
+    while True:
+        batch = [queue.get()]
+        try:
+            while batch[-1] is not STOP and len(batch) < 256:
+                batch.append(queue.get_nowait())
+        except Empty:
+            pass
+        loop.call_soon_threadsafe(deliver, batch)
+        if batch[-1] is STOP:
+            return
+
+
+async def _feed_update(dp: Dispatcher, bot: Bot, update: Dict[str, Any]):
+    try:
+        result = await dp.feed_raw_update(bot, update)
+        if isinstance(result, TelegramMethod):
+            await dp.silent_call_request(bot, result)
+    except Exception as e:
+        logger.error(f"Ошибка обработки обновления {update.get('update_id')}: {e}", exc_info=True)
+
+
+async def _worker(index: int, queue: multiprocessing.Queue):
+    bot = create_bot()
+    dp = create_dispatcher()
+    lanes = UserLanes(WORKER_MAX_CONCURRENCY)
+    stopped = asyncio.Event()
+
+    def deliver(batch: List[Optional[bytes]]):
+        for raw in batch:
+            if raw is STOP:
+                stopped.set()
+                return
+            update = orjson.loads(raw)
+            lanes.submit(update_user_id(update), lambda update=update: _feed_update(dp, bot, update))
+
+    workflow_data = {'dispatcher': dp, 'bots': [bot], **dp.workflow_data}
+    await dp.emit_startup(bot=bot, **workflow_data)
+    threading.Thread(
+        target=_read_queue, args=(queue, asyncio.get_running_loop(), deliver),
+        name='shard-reader', daemon=True
+    ).start()
+    logger.info(f"Обработчик {index} запущен")
+
+    try:
+        await stopped.wait()
+        await lanes.join()
+    finally:
+        await dp.emit_shutdown(bot=bot, **workflow_data)
+        await bot.session.close()
+        await get_db_manager().dispose()
+        get_image_pipeline().shutdown()
+        logger.info(f"Обработчик {index} остановлен")
+
+
+def _worker_main(
+    index: int,
+    queue: multiprocessing.Queue,
+    log_queue: multiprocessing.Queue,
+    catalog_changes,
+    role_changes
+):
+    """Точка входа процесса-обработчика"""
+    # Остановкой управляет главный процесс: он дожидается обработки очереди
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Файл лога пишет только главный процесс
+    setup_logging(log_queue)
+    share_catalog_changes(catalog_changes)
+    share_role_changes(role_changes)
+    asyncio.run(_worker(index, queue))
+
+
+# --- Главный процесс ---
+
+async def _poll(bot: Bot, router: ShardRouter):
+    """Long polling без разбора обновлений в объекты aiogram"""
+    await bot.delete_webhook(drop_pending_updates=True)
+    url = bot.session.api.api_url(token=bot.token, method='getUpdates')
+    offset = 0
+
+    timeout = aiohttp.ClientTimeout(total=POLLING_TIMEOUT + 10)
+    async with aiohttp.ClientSession(timeout=timeout) as http:
+        while True:
+            try:
+                async with http.post(url, json={'offset': offset, 'timeout': POLLING_TIMEOUT}) as response:
+                    payload = orjson.loads(await response.read())
+            except (aiohttp.ClientError, asyncio.TimeoutError, orjson.JSONDecodeError) as e:
+                logger.warning(f"Ошибка получения обновлений: {e}")
+                await asyncio.sleep(1)
+                continue
+
+            if not payload.get('ok'):
+                retry_after = payload.get('parameters', {}).get('retry_after', 1)
+                logger.warning(f"getUpdates: {payload.get('description')}")
+                await asyncio.sleep(retry_after)
+                continue
+
+            for update in payload['result']:
+                router.route(update)
+                offset = update['update_id'] + 1
+
+
+async def _serve_webhook(bot: Bot, router: ShardRouter):
+    """Вебхук: тело запроса передается обработчику без повторной сериализации"""
+    if not WEBHOOK_URL:
+        raise RuntimeError("Для режима webhook нужно указать WEBHOOK_URL")
+
+    async def handle(request: web.Request) -> web.Response:
+        if WEBHOOK_SECRET and request.headers.get('X-Telegram-Bot-Api-Secret-Token') != WEBHOOK_SECRET:
+            return web.Response(status=401)
+        raw = await request.read()
+        router.route(orjson.loads(raw), raw)
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_post(WEBHOOK_PATH, handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT).start()
+    try:
+        await bot.set_webhook(
+            WEBHOOK_URL.rstrip('/') + WEBHOOK_PATH,
+            secret_token=WEBHOOK_SECRET or None,
+            drop_pending_updates=True
+        )
+        logger.info(f"Вебхук слушает {WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+async def run_sharded(bot: Bot, workers: int):
+    """Запустить процессы-обработчики и распределять им обновления"""
+    context = multiprocessing.get_context('spawn')
+    log_queue = context.Queue()
+    attach_worker_queue(log_queue)
+    catalog_changes = context.Value('q', 0)
+    role_changes = context.Value('q', 0)
+    queues = [context.Queue() for _ in range(workers)]
+    processes = [
+        context.Process(
+            target=_worker_main, args=(index, queue, log_queue, catalog_changes, role_changes),
+            name=f'bot-worker-{index}'
+        )
+        for index, queue in enumerate(queues)
+    ]
+    for process in processes:
+        process.start()
+    logger.info(f"Запущено обработчиков: {workers}")
+
+    router = ShardRouter(queues)
+    try:
+        if BOT_MODE == 'webhook':
+            await _serve_webhook(bot, router)
+        else:
+            await _poll(bot, router)
+    finally:
+        logger.info(f"Распределено обновлений по обработчикам: {router.routed}")
+        router.stop()
+        loop = asyncio.get_running_loop()
+        for process in processes:
+            await loop.run_in_executor(None, process.join)
+        await bot.session.close()
@@ -0,0 +1,200 @@
+"""
+Хранилище FSM в нашей базе данных
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Set
+
+import orjson
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.database.models import FsmState
+from src.database.upsert import UPSERT_INSERTS
+
+logger = logging.getLogger(__name__)
+
+EMPTY_DATA = b'{}'
+
+# Как часто удалять из базы состояния с истекшим TTL (в секундах)
+EVICT_INTERVAL = 600
+
+
+class _Entry:
+    """Запись кэша: состояние и данные в виде байтов orjson"""
+
+    __slots__ = ('state', 'data', 'touched')
+
+    def __init__(self, state: Optional[str], data: bytes):
+        self.state = state
+        self.data = data
+        self.touched = time.monotonic()
+
+
+class DatabaseStorage(BaseStorage):
+    """Постоянное хранилище FSM в таблице fsm_states
+
+    Состояние переживает перезапуск и доступно всем процессам бота.
+    Изменения копятся в памяти и записываются пачкой раз в flush_interval
+    секунд одним upsert; чтения обслуживает кэш процесса. Кэш корректен,
+    пока обновления одного пользователя обрабатывает один процесс; иначе
+    нужен flush_interval=0 (запись сразу, чтение всегда из базы).
+
+    Данные сериализуются orjson, поэтому в FSM можно класть только
+    JSON-совместимые значения (Money хранится как копейки).
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        state_ttl: int,
+        flush_interval: float = 0.5,
+        cache_ttl: int = 600
+    ):
+        self.engine = engine
+        self.state_ttl = timedelta(seconds=state_ttl)
+        self.flush_interval = flush_interval
+        self.cache_ttl = cache_ttl
+        self._cache: Dict[str, _Entry] = {}
+        self._dirty: Set[str] = set()
+        self._flusher: Optional[asyncio.Task] = None
+        self._last_eviction = time.monotonic()
+
+    @staticmethod
+    def _key(key: StorageKey) -> str:
+        parts = [key.bot_id, key.chat_id, key.user_id, key.thread_id or '',
+                 key.business_connection_id or '', key.destiny]
+        return ':'.join(str(part) for part in parts)
+
+    @property
+    def _cached(self) -> bool:
+        return self.flush_interval > 0
+
+    async def _load(self, key: str) -> _Entry:
+        entry = self._cache.get(key) if self._cached else None
+        if entry is not None:
+            entry.touched = time.monotonic()
+            return entry
+
+        async with self.engine.connect() as conn:
+            row = (await conn.execute(
+                select(FsmState.state, FsmState.data).where(
+                    FsmState.key == key,
+                    FsmState.expires_at > datetime.utcnow()
+                )
+            )).first()
+
+        entry = _Entry(row.state, row.data or EMPTY_DATA) if row else _Entry(None, EMPTY_DATA)
+        if self._cached:
+            self._cache[key] = entry
+        return entry
+
+    async def _store(self, key: str, entry: _Entry):
+        entry.touched = time.monotonic()
+        if not self._cached:
+            await self._write({key: entry})
+            return
+
+        self._cache[key] = entry
+        self._dirty.add(key)
+        if self._flusher is None:
+            # Создаем лениво, внутри работающего цикла событий
+            self._flusher = asyncio.create_task(self._flush_loop(), name='fsm-flush')
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        storage_key = self._key(key)
+        entry = await self._load(storage_key)
+        entry.state = state.state if isinstance(state, State) else state
+        await self._store(storage_key, entry)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._load(self._key(key))).state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        storage_key = self._key(key)
+        entry = await self._load(storage_key)
+        entry.data = orjson.dumps(data)
+        await self._store(storage_key, entry)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        # Новый словарь при каждом чтении: изменения вызывающего не попадут в кэш
+        return orjson.loads((await self._load(self._key(key))).data)
+
+    async def _write(self, entries: Dict[str, _Entry]):
+        """Записать пачку изменений одной транзакцией"""
+        expires_at = datetime.utcnow() + self.state_ttl
+        removed = [key for key, entry in entries.items()
+                   if entry.state is None and entry.data == EMPTY_DATA]
+        rows = [
+            {'key': key, 'state': entry.state, 'data': entry.data, 'expires_at': expires_at}
+            for key, entry in entries.items() if key not in removed
+        ]
+
+        async with self.engine.begin() as conn:
+            if removed:
+                await conn.execute(delete(FsmState).where(FsmState.key.in_(removed)))
+            if rows:
+                upsert = UPSERT_INSERTS.get(self.engine.dialect.name)
+                if upsert is None:
+                    await conn.execute(
+                        delete(FsmState).where(FsmState.key.in_([row['key'] for row in rows]))
+                    )
+                    await conn.execute(insert(FsmState), rows)
+                else:
+                    stmt = upsert(FsmState)
+                    await conn.execute(stmt.on_conflict_do_update(
+                        index_elements=[FsmState.key],
+                        set_={
+                            'state': stmt.excluded.state,
+                            'data': stmt.excluded.data,
+                            'expires_at': stmt.excluded.expires_at
+                        }
+                    ), rows)
+
+    async def flush(self):
+        """Записать накопленные изменения"""
+        if not self._dirty:
+            return
+        # Изменения, сделанные во время записи, попадут в новый набор
+        keys, self._dirty = self._dirty, set()
+        try:
+            await self._write({key: self._cache[key] for key in keys})
+        except Exception:
+            # Повторим при следующем сохранении
+            self._dirty |= keys
+            raise
+
+    async def evict(self):
+        """Удалить состояния с истекшим TTL и давно не использованный кэш"""
+        async with self.engine.begin() as conn:
+            await conn.execute(delete(FsmState).where(FsmState.expires_at <= datetime.utcnow()))
+
+        threshold = time.monotonic() - self.cache_ttl
+        for key in [key for key, entry in self._cache.items()
+                    if entry.touched < threshold and key not in self._dirty]:
+            del self._cache[key]
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                if time.monotonic() - self._last_eviction > EVICT_INTERVAL:
+                    self._last_eviction = time.monotonic()
+                    await self.evict()
+            except Exception as e:
+                logger.error(f"Ошибка сохранения состояний FSM: {e}", exc_info=True)
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
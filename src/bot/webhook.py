@@ -0,0 +1,79 @@
+"""
+Режим вебхука на базе интеграции aiogram с aiohttp
+"""
+import asyncio
+import logging
+from typing import Any, Dict
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+from src.config import (
+    WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_HOST, WEBHOOK_PORT,
+    WEBHOOK_SECRET, WEBHOOK_MAX_CONCURRENCY
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    """Обработчик вебхука с ограничением одновременной обработки
+
+    Telegram сразу получает ответ 200, а обновление обрабатывается в фоне.
+    Не больше max_concurrency обновлений выполняются одновременно,
+    остальные ждут своей очереди, не нагружая базу данных.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, max_concurrency: int, **kwargs: Any):
+        super().__init__(dispatcher, bot, handle_in_background=True, **kwargs)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _background_feed_update(self, bot: Bot, update: Dict[str, Any]) -> None:
+        async with self._semaphore:
+            await super()._background_feed_update(bot, update)
+
+    async def close(self) -> None:
+        # Дорабатываем принятые обновления до закрытия сессии бота
+        if self._background_feed_update_tasks:
+            await asyncio.gather(*self._background_feed_update_tasks, return_exceptions=True)
+        await super().close()
+
+
+def create_webhook_app(dp: Dispatcher, bot: Bot) -> web.Application:
+    """Создать aiohttp-приложение, принимающее обновления"""
+    app = web.Application()
+    handler = BoundedRequestHandler(
+        dp, bot,
+        max_concurrency=WEBHOOK_MAX_CONCURRENCY,
+        secret_token=WEBHOOK_SECRET or None
+    )
+    handler.register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot):
+    """Зарегистрировать вебхук и обслуживать его до остановки"""
+    if not WEBHOOK_URL:
+        raise RuntimeError("Для режима webhook нужно указать WEBHOOK_URL")
+
+    runner = web.AppRunner(create_webhook_app(dp, bot))
+    await runner.setup()
+    site = web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT)
+    await site.start()
+    logger.info(f"Вебхук слушает {WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+
+    try:
+        await bot.set_webhook(
+            WEBHOOK_URL.rstrip('/') + WEBHOOK_PATH,
+            secret_token=WEBHOOK_SECRET or None,
+            allowed_updates=dp.resolve_used_update_types(),
+            max_connections=min(WEBHOOK_MAX_CONCURRENCY, 100),
+            drop_pending_updates=True
+        )
+        logger.info("Вебхук зарегистрирован")
+        await asyncio.Event().wait()
+    finally:
+        # Дожидается фоновых обработчиков и вызывает shutdown диспетчера
+        await runner.cleanup()
@@ -7,6 +7,53 @@ from typing import List
 # Telegram Bot Token
 BOT_TOKEN = os.getenv('BOT_TOKEN', '8420167575:AAHBJCqJ1Urg7ftCwpmvfwsSAmL3ka4RePA')
 
+# Адрес Bot API. Пустой - официальный сервер; для нагрузочных тестов можно
+# указать локальную заглушку: python -m benchmarks.fake_telegram
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', '')
+
+# Режим получения обновлений: polling или webhook
+BOT_MODE = os.getenv('BOT_MODE', 'polling')
+
+# Вебхук: публичный адрес, на который Telegram шлет обновления, и адрес,
+# который слушает aiohttp
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')  # например https://bot.example.com
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8080'))
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')
+# Сколько обновлений обрабатывается одновременно, остальные ждут в очереди
+WEBHOOK_MAX_CONCURRENCY = int(os.getenv('WEBHOOK_MAX_CONCURRENCY', '64'))
+
+# Число процессов-обработчиков. 0 - все в одном процессе; иначе главный
+# процесс только принимает обновления и распределяет их по user_id
+BOT_WORKERS = int(os.getenv('BOT_WORKERS', '0'))
+# Сколько обновлений одновременно обрабатывает один процесс-обработчик
+WORKER_MAX_CONCURRENCY = int(os.getenv('WORKER_MAX_CONCURRENCY', '64'))
+
+# Лимиты исходящих сообщений (в сообщениях в секунду); общий лимит делится
+# между процессами-обработчиками
+OUTBOUND_GLOBAL_RATE = float(os.getenv('OUTBOUND_GLOBAL_RATE', '30'))
+OUTBOUND_CHAT_RATE = float(os.getenv('OUTBOUND_CHAT_RATE', '1'))
+OUTBOUND_CHAT_BURST = float(os.getenv('OUTBOUND_CHAT_BURST', '3'))
+OUTBOUND_GROUP_RATE = float(os.getenv('OUTBOUND_GROUP_RATE', str(20 / 60)))
+OUTBOUND_MAX_RETRIES = int(os.getenv('OUTBOUND_MAX_RETRIES', '3'))
+
+# Рассылки: получателей в пачке, параллельных отправок и сообщений в секунду
+# (ниже общего лимита, чтобы оставить место ответам пользователям)
+BROADCAST_CHUNK_SIZE = int(os.getenv('BROADCAST_CHUNK_SIZE', '500'))
+BROADCAST_CONCURRENCY = int(os.getenv('BROADCAST_CONCURRENCY', '20'))
+BROADCAST_RATE = float(os.getenv('BROADCAST_RATE', '25'))
+
+# Анти-флуд: событий за секунды на пользователя, по умолчанию и по обработчикам
+THROTTLE_DEFAULT_RATE = os.getenv('THROTTLE_DEFAULT_RATE', '5/1')
+THROTTLE_RATES = os.getenv(
+    'THROTTLE_RATES',
+    'quantity_change=10/1,catalog_navigation=4/1,show_cart=2/1,add_to_cart=3/1,checkout=1/2,'
+    'successful_payment=0'
+)
+# Общее хранилище окон для нескольких экземпляров бота (пусто - память процесса)
+THROTTLE_REDIS_URL = os.getenv('THROTTLE_REDIS_URL', '')
+
 # ID администраторов бота
 # Замените на реальные Telegram ID администраторов
 ADMIN_IDS: List[int] = [
@@ -14,9 +61,43 @@ ADMIN_IDS: List[int] = [
     # Добавьте других администраторов здесь
 ]
 
+# Интервал (в секундах) перечитывания ролей из БД: подхватывает правки,
+# сделанные в обход бота (например, в веб-админке)
+ROLES_REFRESH_INTERVAL = int(os.getenv('ROLES_REFRESH_INTERVAL', '300'))
+
+# Сколько недавно виденных пользователей помнить, чтобы не обращаться к БД
+KNOWN_USERS_CACHE_SIZE = int(os.getenv('KNOWN_USERS_CACHE_SIZE', '10000'))
+
 # Настройки базы данных
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///data/pizza_bot.db')
 
+# Применять миграции схемы при запуске бота. В продакшене можно отключить
+# и применять их заранее: python -m src.database.migrations upgrade
+DB_AUTO_MIGRATE = os.getenv('DB_AUTO_MIGRATE', 'true').lower() == 'true'
+
+# Профиль SQLite: production (WAL, synchronous=NORMAL и т.д.) или default (без PRAGMA).
+# Бот, веб-админка и скрипты открывают один файл базы из разных процессов
+SQLITE_PROFILE = os.getenv('SQLITE_PROFILE', 'production')
+SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000'))  # мс ожидания блокировки
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))  # байт
+SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', '-65536'))  # отрицательное - в КиБ (64 МБ)
+
+# Очередь записи: корзина, оформление заказов и смена статусов выполняются
+# одним писателем пакетными транзакциями вместо гонки за блокировкой SQLite
+DB_WRITE_QUEUE = os.getenv('DB_WRITE_QUEUE', 'false').lower() == 'true'
+DB_WRITE_BATCH_SIZE = int(os.getenv('DB_WRITE_BATCH_SIZE', '64'))
+DB_WRITE_LINGER_MS = float(os.getenv('DB_WRITE_LINGER_MS', '2'))
+
+# Хранилище FSM: database (переживает перезапуск, общее для процессов) или memory
+FSM_STORAGE = os.getenv('FSM_STORAGE', 'database')
+# Через сколько секунд бездействия состояние пользователя удаляется (7 дней)
+FSM_STATE_TTL = int(os.getenv('FSM_STATE_TTL', str(7 * 24 * 3600)))
+# Интервал пакетной записи изменений в секундах. 0 - запись сразу и без кэша
+# чтения (если обновления одного пользователя попадают в разные процессы)
+FSM_FLUSH_INTERVAL = float(os.getenv('FSM_FLUSH_INTERVAL', '0.5'))
+# Сколько секунд держать в памяти процесса состояние неактивного пользователя
+FSM_CACHE_TTL = int(os.getenv('FSM_CACHE_TTL', '600'))
+
 # Секретный ключ для Flask (ОБЯЗАТЕЛЬНО измените в продакшене!)
 SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-change-this-in-production')
 
@@ -32,6 +113,13 @@ RESTRICTED_WORDS = {'нахуй', 'жопу', 'нафиг'}
 # Настройки логирования
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
 LOG_FILE = os.getenv('LOG_FILE', 'logs/pizza_bot.log')
+# Формат вывода в консоль: json или text (в файл всегда пишется JSON)
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+# Ротация файла лога: size (по LOG_MAX_BYTES), time (по LOG_ROTATE_WHEN) или none
+LOG_ROTATION = os.getenv('LOG_ROTATION', 'size')
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+LOG_ROTATE_WHEN = os.getenv('LOG_ROTATE_WHEN', 'midnight')
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '7'))
 
 # Настройки пагинации
 ITEMS_PER_PAGE = 10
@@ -41,4 +129,22 @@ MAX_FILE_SIZE = 5 * 1024 * 1024  # 5 MB
 
 # Токен платежной системы (Юkassa, Stripe и т.д.)
 # Для тестирования используйте тестовый токен
-PAYMENT_TOKEN = os.getenv('PAYMENT_TOKEN', '')
\ No newline at end of file
+PAYMENT_TOKEN = os.getenv('PAYMENT_TOKEN', '')
+
+# Каталог: время жизни общего снимка товаров (в секундах).
+# Изменения через бота применяются сразу, TTL нужен для правок из веб-админки
+CATALOG_SNAPSHOT_TTL = int(os.getenv('CATALOG_SNAPSHOT_TTL', '60'))
+
+# Сколько предыдущих версий снимка хранить для пользователей, листающих каталог
+CATALOG_SNAPSHOT_HISTORY = int(os.getenv('CATALOG_SNAPSHOT_HISTORY', '3'))
+
+# Окно (в мс), за которое нажатия ➕/➖ склеиваются в одну правку клавиатуры
+QTY_EDIT_WINDOW_MS = int(os.getenv('QTY_EDIT_WINDOW_MS', '400'))
+
+# Обработка изображений товаров
+IMAGES_DIR = os.getenv('IMAGES_DIR', 'data/images')
+IMAGE_MAX_SIDE = int(os.getenv('IMAGE_MAX_SIDE', '1280'))  # Telegram сжимает фото до 1280px
+IMAGE_QUALITY = int(os.getenv('IMAGE_QUALITY', '85'))
+THUMBNAIL_MAX_SIDE = int(os.getenv('THUMBNAIL_MAX_SIDE', '320'))
+THUMBNAIL_QUALITY = int(os.getenv('THUMBNAIL_QUALITY', '75'))
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', '2'))
@@ -2,4 +2,6 @@
 Модуль для работы с базой данных
 """
 from .models import *
-from .database import DatabaseManager
\ No newline at end of file
+from .database import DatabaseManager, AsyncDatabaseManager
+from .write_queue import WriteQueue, DatabaseWriter
+from .upsert import UPSERT_INSERTS
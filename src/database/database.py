@@ -1,11 +1,20 @@
 """
 Менеджер базы данных
 """
+from sqlalchemy import insert, select, update
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
+from .migrations import ensure_schema
+from .write_queue import WriteQueue, WriteOperation, T
+from .read_models import (
+    UserView, ProductView, OrderView,
+    USER_VIEW_COLUMNS, PRODUCT_VIEW_COLUMNS, ORDER_VIEW_COLUMNS
+)
 from .models import (
-    get_engine, get_session_factory, create_tables,
-    Product, TelegramUser, Order, OrderItem, Cart, AdminToken
+    get_engine, get_session_factory,
+    get_async_engine, get_async_session_factory,
+    TelegramUser, Order
 )
 
 
@@ -15,7 +24,8 @@ class DatabaseManager:
     def __init__(self, database_url: str):
         self.engine = get_engine(database_url)
         self.session_factory = get_session_factory(self.engine)
-        create_tables(self.engine)
+        with self.engine.connect() as conn:
+            ensure_schema(conn)
 
     def get_session(self) -> Session:
         """Получить сессию для работы с БД"""
@@ -26,48 +36,55 @@ class DatabaseManager:
         session.close()
 
     # Методы для работы с пользователями
-    def get_user(self, user_id: int) -> Optional[TelegramUser]:
+    def get_user(self, user_id: int) -> Optional[UserView]:
         """Получить пользователя по ID"""
         with self.get_session() as session:
-            return session.query(TelegramUser).filter_by(user_id=user_id).first()
+            row = session.execute(
+                select(*USER_VIEW_COLUMNS).filter_by(user_id=user_id)
+            ).first()
+            return UserView(*row) if row else None
 
-    def create_user(self, user_data: dict) -> TelegramUser:
+    def create_user(self, user_data: dict) -> UserView:
         """Создать нового пользователя"""
         with self.get_session() as session:
-            user = TelegramUser(**user_data)
-            session.add(user)
+            row = session.execute(
+                insert(TelegramUser).values(**user_data).returning(*USER_VIEW_COLUMNS)
+            ).one()
             session.commit()
-            session.refresh(user)
-            return user
+            return UserView(*row)
 
     # Методы для работы с продуктами
-    def get_products(self, available_only: bool = False) -> list[Product]:
+    def get_products(self, available_only: bool = False) -> list[ProductView]:
         """Получить список продуктов"""
         with self.get_session() as session:
-            query = session.query(Product)
+            query = select(*PRODUCT_VIEW_COLUMNS)
             if available_only:
                 query = query.filter_by(available=True)
-            return query.all()
+            return [ProductView(*row) for row in session.execute(query)]
 
-    def get_product(self, product_id: int) -> Optional[Product]:
+    def get_product(self, product_id: int) -> Optional[ProductView]:
         """Получить продукт по ID"""
         with self.get_session() as session:
-            return session.query(Product).filter_by(id=product_id).first()
+            row = session.execute(
+                select(*PRODUCT_VIEW_COLUMNS).filter_by(id=product_id)
+            ).first()
+            return ProductView(*row) if row else None
 
     # Методы для работы с заказами
-    def create_order(self, order_data: dict) -> Order:
+    def create_order(self, order_data: dict) -> OrderView:
         """Создать новый заказ"""
         with self.get_session() as session:
-            order = Order(**order_data)
-            session.add(order)
+            row = session.execute(
+                insert(Order).values(**order_data).returning(*ORDER_VIEW_COLUMNS)
+            ).one()
             session.commit()
-            session.refresh(order)
-            return order
+            return OrderView(*row)
 
-    def get_orders_by_status(self, status: str) -> list[Order]:
+    def get_orders_by_status(self, status: str) -> list[OrderView]:
         """Получить заказы по статусу"""
         with self.get_session() as session:
-            return session.query(Order).filter_by(status=status).all()
+            rows = session.execute(select(*ORDER_VIEW_COLUMNS).filter_by(status=status))
+            return [OrderView(*row) for row in rows]
 
     def update_order_status(self, order_id: int, status: str) -> bool:
         """Обновить статус заказа"""
@@ -77,4 +94,131 @@ class DatabaseManager:
                 order.status = status
                 session.commit()
                 return True
-            return False
\ No newline at end of file
+            return False
+
+
+class AsyncDatabaseManager:
+    """Асинхронный менеджер базы данных (aiosqlite / asyncpg)
+
+    Запросы не блокируют цикл событий aiogram, поэтому медленная запись
+    одного пользователя не задерживает обработку обновлений остальных.
+    С write_queue=True горячие операции записи, переданные в write(),
+    выполняет единственный писатель пакетными транзакциями.
+    """
+
+    def __init__(
+        self,
+        database_url: str,
+        write_queue: bool = False,
+        write_batch_size: int = 64,
+        write_linger: float = 0.002
+    ):
+        self.engine = get_async_engine(database_url)
+        self.session_factory = get_async_session_factory(self.engine)
+        self.write_queue: Optional[WriteQueue] = None
+        if write_queue:
+            self.write_queue = WriteQueue(self.session_factory, write_batch_size, write_linger)
+
+    async def ensure_schema(self, auto_migrate: bool = True) -> int:
+        """Проверить версию схемы и при необходимости применить миграции
+
+        Вызывается один раз при запуске; для актуальной схемы это один запрос.
+        """
+        async with self.engine.connect() as conn:
+            return await conn.run_sync(ensure_schema, auto_migrate)
+
+    def get_session(self) -> AsyncSession:
+        """Получить асинхронную сессию для работы с БД"""
+        return self.session_factory()
+
+    async def close_session(self, session: AsyncSession):
+        """Закрыть сессию"""
+        await session.close()
+
+    async def write(
+        self,
+        operation: WriteOperation[T],
+        session: Optional[AsyncSession] = None
+    ) -> T:
+        """Выполнить операцию записи
+
+        В режиме очереди операция уходит писателю и результат возвращается
+        после commit его пачки. Без очереди операция выполняется в переданной
+        сессии (ее фиксирует владелец) или в новой сессии с немедленным commit.
+        """
+        if self.write_queue is not None:
+            return await self.write_queue.submit(operation)
+
+        if session is not None:
+            return await operation(session)
+
+        async with self.get_session() as own_session:
+            result = await operation(own_session)
+            await own_session.commit()
+            return result
+
+    async def dispose(self):
+        """Дождаться очереди записи и закрыть все соединения пула"""
+        if self.write_queue is not None:
+            await self.write_queue.close()
+        await self.engine.dispose()
+
+    # Методы для работы с пользователями
+    async def get_user(self, user_id: int) -> Optional[UserView]:
+        """Получить пользователя по ID"""
+        async with self.get_session() as session:
+            row = (await session.execute(
+                select(*USER_VIEW_COLUMNS).filter_by(user_id=user_id)
+            )).first()
+            return UserView(*row) if row else None
+
+    async def create_user(self, user_data: dict) -> UserView:
+        """Создать нового пользователя"""
+        async with self.get_session() as session:
+            row = (await session.execute(
+                insert(TelegramUser).values(**user_data).returning(*USER_VIEW_COLUMNS)
+            )).one()
+            await session.commit()
+            return UserView(*row)
+
+    # Методы для работы с продуктами
+    async def get_products(self, available_only: bool = False) -> list[ProductView]:
+        """Получить список продуктов"""
+        async with self.get_session() as session:
+            query = select(*PRODUCT_VIEW_COLUMNS)
+            if available_only:
+                query = query.filter_by(available=True)
+            return [ProductView(*row) for row in await session.execute(query)]
+
+    async def get_product(self, product_id: int) -> Optional[ProductView]:
+        """Получить продукт по ID"""
+        async with self.get_session() as session:
+            row = (await session.execute(
+                select(*PRODUCT_VIEW_COLUMNS).filter_by(id=product_id)
+            )).first()
+            return ProductView(*row) if row else None
+
+    # Методы для работы с заказами
+    async def create_order(self, order_data: dict) -> OrderView:
+        """Создать новый заказ"""
+        async with self.get_session() as session:
+            row = (await session.execute(
+                insert(Order).values(**order_data).returning(*ORDER_VIEW_COLUMNS)
+            )).one()
+            await session.commit()
+            return OrderView(*row)
+
+    async def get_orders_by_status(self, status: str) -> list[OrderView]:
+        """Получить заказы по статусу"""
+        async with self.get_session() as session:
+            rows = await session.execute(select(*ORDER_VIEW_COLUMNS).filter_by(status=status))
+            return [OrderView(*row) for row in rows]
+
+    async def update_order_status(self, order_id: int, status: str) -> bool:
+        """Обновить статус заказа"""
+        async with self.get_session() as session:
+            result = await session.execute(
+                update(Order).where(Order.id == order_id).values(status=status)
+            )
+            await session.commit()
+            return result.rowcount > 0
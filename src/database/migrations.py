@@ -0,0 +1,246 @@
+"""
+Версионированные миграции схемы базы данных
+
+Номер примененной миграции хранится в таблице schema_version. При запуске
+бота выполняется один запрос версии; если схема актуальна, больше ничего
+не происходит. Миграции можно применить заранее, до выкладки:
+    python -m src.database.migrations upgrade
+    python -m src.database.migrations current
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from typing import Callable, List, NamedTuple, Optional
+
+from sqlalchemy import Integer, func, inspect, insert, select, text, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+
+from .models import (
+    Base, SchemaVersion, MediaFile, FsmState, Broadcast, Product, Order, OrderItem
+)
+from src.utils.images import hash_file, is_telegram_file_id
+
+logger = logging.getLogger(__name__)
+
+# Схема, созданная через create_all до появления миграций
+LEGACY_VERSION = 1
+
+
+class Migration(NamedTuple):
+    """Шаг миграции: выполняется в собственной транзакции"""
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+def _create_media_files(conn: Connection):
+    MediaFile.__table__.create(conn, checkfirst=True)
+
+
+def _unique_cart_lines(conn: Connection):
+    inspector = inspect(conn)
+    existing = {c['name'] for c in inspector.get_unique_constraints('cart')}
+    existing |= {i['name'] for i in inspector.get_indexes('cart') if i['unique']}
+    if 'uq_cart_user_product' in existing:
+        return
+
+    # Сливаем дубли строк корзины в одну строку с суммарным количеством
+    conn.execute(text(
+        "UPDATE cart SET quantity = ("
+        "  SELECT SUM(c.quantity) FROM cart c"
+        "  WHERE c.user_id = cart.user_id AND c.product_id = cart.product_id"
+        ") WHERE id IN ("
+        "  SELECT MIN(id) FROM cart GROUP BY user_id, product_id HAVING COUNT(*) > 1"
+        ")"
+    ))
+    conn.execute(text(
+        "DELETE FROM cart WHERE id NOT IN ("
+        "  SELECT MIN(id) FROM cart GROUP BY user_id, product_id"
+        ")"
+    ))
+    # SQLite не умеет добавлять ограничение через ALTER TABLE,
+    # уникальный индекс с тем же именем подходит для ON CONFLICT
+    conn.execute(text(
+        "CREATE UNIQUE INDEX uq_cart_user_product ON cart (user_id, product_id)"
+    ))
+
+
+def _hot_query_indexes(conn: Connection):
+    names = {
+        'ix_products_available_category',
+        'ix_orders_status_created_at',
+        'ix_orders_user_id_created_at',
+        'ix_order_items_order_id',
+    }
+    for table in (Product.__table__, Order.__table__, OrderItem.__table__):
+        for index in table.indexes:
+            if index.name in names:
+                index.create(conn, checkfirst=True)
+
+
+def _money_to_kopecks(conn: Connection):
+    columns = (('products', 'price'), ('orders', 'total_price'), ('order_items', 'price'))
+    inspector = inspect(conn)
+    for table, column in columns:
+        column_type = next(
+            c['type'] for c in inspector.get_columns(table) if c['name'] == column
+        )
+        if isinstance(column_type, Integer):
+            continue
+
+        if conn.dialect.name == 'postgresql':
+            conn.execute(text(
+                f"ALTER TABLE {table} ALTER COLUMN {column} TYPE BIGINT "
+                f"USING ROUND({column} * 100)::BIGINT"
+            ))
+            continue
+
+        # SQLite не меняет тип столбца: создаем новый, переносим и переименовываем
+        # (DROP COLUMN требует SQLite 3.35+)
+        conn.execute(text(
+            f"ALTER TABLE {table} ADD COLUMN {column}_kopecks BIGINT NOT NULL DEFAULT 0"
+        ))
+        conn.execute(text(
+            f"UPDATE {table} SET {column}_kopecks = CAST(ROUND({column} * 100) AS INTEGER)"
+        ))
+        conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {column}"))
+        conn.execute(text(f"ALTER TABLE {table} RENAME COLUMN {column}_kopecks TO {column}"))
+
+
+def _create_fsm_states(conn: Connection):
+    FsmState.__table__.create(conn, checkfirst=True)
+
+
+def _create_broadcasts(conn: Connection):
+    Broadcast.__table__.create(conn, checkfirst=True)
+
+
+def _product_image_hashes(conn: Connection):
+    columns = {c['name'] for c in inspect(conn).get_columns('products')}
+    if 'image_hash' not in columns:
+        conn.execute(text("ALTER TABLE products ADD COLUMN image_hash VARCHAR(64)"))
+    for index in Product.__table__.indexes:
+        if index.name == 'ix_products_image_hash':
+            index.create(conn, checkfirst=True)
+
+    # Хэши уже сохраненных локальных фото считаем один раз, здесь
+    rows = conn.execute(
+        select(Product.id, Product.image)
+        .where(Product.image.isnot(None), Product.image_hash.is_(None))
+    ).all()
+    for product_id, image in rows:
+        if is_telegram_file_id(image) or not os.path.exists(image):
+            continue
+        conn.execute(
+            update(Product).where(Product.id == product_id).values(image_hash=hash_file(image))
+        )
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(2, 'media_files: кэш file_id Telegram', _create_media_files),
+    Migration(3, 'cart: уникальная строка на товар пользователя', _unique_cart_lines),
+    Migration(4, 'индексы горячих запросов', _hot_query_indexes),
+    Migration(5, 'цены и суммы в целых копейках', _money_to_kopecks),
+    Migration(6, 'fsm_states: постоянное хранилище FSM', _create_fsm_states),
+    Migration(7, 'broadcasts: рассылки с сохранением прогресса', _create_broadcasts),
+    Migration(8, 'products.image_hash: хэш локального фото товара', _product_image_hashes),
+]
+
+HEAD_VERSION = MIGRATIONS[-1].version if MIGRATIONS else LEGACY_VERSION
+
+
+def get_version(conn: Connection) -> Optional[int]:
+    """Текущая версия схемы или None, если таблицы schema_version нет"""
+    try:
+        version = conn.scalar(select(func.max(SchemaVersion.version)))
+    except DBAPIError:
+        conn.rollback()
+        return None
+    conn.commit()
+    return version
+
+
+def _stamp(conn: Connection, version: int, description: str):
+    conn.execute(insert(SchemaVersion).values(version=version, description=description))
+
+
+def upgrade(conn: Connection, version: Optional[int] = None) -> int:
+    """Применить недостающие миграции, вернуть итоговую версию"""
+    if version is None:
+        version = get_version(conn)
+
+    if version is None:
+        if not inspect(conn).has_table(Product.__tablename__):
+            # Новая база: создаем актуальную схему целиком
+            Base.metadata.create_all(conn)
+            _stamp(conn, HEAD_VERSION, 'создание схемы')
+            conn.commit()
+            logger.info(f"Схема создана, версия {HEAD_VERSION}")
+            return HEAD_VERSION
+
+        SchemaVersion.__table__.create(conn, checkfirst=True)
+        _stamp(conn, LEGACY_VERSION, 'схема до миграций')
+        conn.commit()
+        version = LEGACY_VERSION
+
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+        logger.info(f"Миграция {migration.version}: {migration.description}")
+        try:
+            migration.upgrade(conn)
+            _stamp(conn, migration.version, migration.description)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        version = migration.version
+    return version
+
+
+def ensure_schema(conn: Connection, auto_migrate: bool = True) -> int:
+    """Проверить версию схемы при запуске
+
+    Если схема актуальна, выполняется только чтение версии. Если нет -
+    миграции применяются, либо (при auto_migrate=False) запуск прерывается.
+    """
+    version = get_version(conn)
+    if version is not None and version >= HEAD_VERSION:
+        return version
+
+    if not auto_migrate:
+        raise RuntimeError(
+            f"Схема базы данных устарела (версия {version}, нужна {HEAD_VERSION}). "
+            "Выполните: python -m src.database.migrations upgrade"
+        )
+    return upgrade(conn, version)
+
+
+async def main(argv=None) -> int:
+    from src.config import DATABASE_URL
+    from .models import get_async_engine
+
+    parser = argparse.ArgumentParser(description='Миграции схемы базы данных')
+    parser.add_argument('command', choices=('upgrade', 'current'))
+    parser.add_argument('--database-url', default=DATABASE_URL)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    engine = get_async_engine(args.database_url)
+    try:
+        async with engine.connect() as conn:
+            if args.command == 'upgrade':
+                version = await conn.run_sync(upgrade)
+            else:
+                version = await conn.run_sync(get_version)
+        print(f"Версия схемы: {version} (последняя: {HEAD_VERSION})")
+        return 0
+    finally:
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
@@ -2,11 +2,18 @@
 Модели базы данных для Telegram бота пиццерии
 """
 from datetime import datetime
+from typing import List, Optional, Tuple
 from sqlalchemy import (
-    Float, String, Text, DateTime, Integer,
-    ForeignKey, Boolean, create_engine
+    BigInteger, String, Text, DateTime, Integer, TypeDecorator, LargeBinary,
+    ForeignKey, Boolean, UniqueConstraint, Index, create_engine, event
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from src.config import (
+    SQLITE_PROFILE, SQLITE_BUSY_TIMEOUT, SQLITE_MMAP_SIZE, SQLITE_CACHE_SIZE
+)
+from src.utils.money import Money
 
 
 class Base(DeclarativeBase):
@@ -14,15 +21,38 @@ class Base(DeclarativeBase):
     pass
 
 
+class MoneyType(TypeDecorator):
+    """Денежная сумма: целые копейки в БД, Money в Python"""
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if not isinstance(value, Money):
+            raise TypeError(f"Ожидается Money, получено {value!r}")
+        return value.kopecks
+
+    def process_result_value(self, value, dialect):
+        # SUM(bigint) в PostgreSQL возвращает numeric - приводим к int
+        return None if value is None else Money(int(value))
+
+
 class Product(Base):
     """Модель товара/продукта"""
     __tablename__ = 'products'
+    __table_args__ = (
+        # Каталог: available = true ORDER BY category, name
+        Index('ix_products_available_category', 'available', 'category', 'name'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String(150), nullable=False)
     description: Mapped[str] = mapped_column(Text, nullable=True)
-    price: Mapped[float] = mapped_column(Float(asdecimal=True), nullable=False)
+    price: Mapped[Money] = mapped_column(MoneyType, nullable=False)
     image: Mapped[str] = mapped_column(String(150), nullable=True)
+    # sha256 локального фото (ключ media_files), NULL для file_id Telegram
+    image_hash: Mapped[str] = mapped_column(String(64), nullable=True, index=True)
     available: Mapped[bool] = mapped_column(Boolean, default=True)
     category: Mapped[str] = mapped_column(String(50), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -52,13 +82,19 @@ class TelegramUser(Base):
 class Order(Base):
     """Модель заказа"""
     __tablename__ = 'orders'
+    __table_args__ = (
+        # Админка: заказы по статусу, новые сверху
+        Index('ix_orders_status_created_at', 'status', 'created_at'),
+        # История заказов пользователя, новые сверху
+        Index('ix_orders_user_id_created_at', 'user_id', 'created_at'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(Integer, nullable=False)
     username: Mapped[str] = mapped_column(String(150), nullable=True)
     phone: Mapped[str] = mapped_column(String(20), nullable=True)
     address: Mapped[str] = mapped_column(Text, nullable=True)
-    total_price: Mapped[float] = mapped_column(Float(asdecimal=True), nullable=False)
+    total_price: Mapped[Money] = mapped_column(MoneyType, nullable=False)
     status: Mapped[str] = mapped_column(String(50), default='pending')
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(
@@ -72,12 +108,15 @@ class Order(Base):
 class OrderItem(Base):
     """Модель позиции в заказе"""
     __tablename__ = 'order_items'
+    __table_args__ = (
+        Index('ix_order_items_order_id', 'order_id'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     order_id: Mapped[int] = mapped_column(ForeignKey('orders.id'), nullable=False)
     product_id: Mapped[int] = mapped_column(ForeignKey('products.id'), nullable=False)
     quantity: Mapped[int] = mapped_column(Integer, default=1)
-    price: Mapped[float] = mapped_column(Float(asdecimal=True), nullable=False)
+    price: Mapped[Money] = mapped_column(MoneyType, nullable=False)  # Цена на момент заказа
 
     def __repr__(self) -> str:
         return f"<OrderItem(order_id={self.order_id}, product_id={self.product_id})>"
@@ -86,6 +125,11 @@ class OrderItem(Base):
 class Cart(Base):
     """Модель корзины покупок"""
     __tablename__ = 'cart'
+    __table_args__ = (
+        # Одна строка на товар в корзине пользователя - цель для ON CONFLICT.
+        # Индекс ограничения также обслуживает выборки по cart.user_id
+        UniqueConstraint('user_id', 'product_id', name='uq_cart_user_product'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -111,9 +155,105 @@ class AdminToken(Base):
         return f"<AdminToken(user_id={self.user_id}, expires_at={self.expires_at})>"
 
 
-def get_engine(database_url: str):
+class MediaFile(Base):
+    """Кэш file_id Telegram для локальных изображений (ключ - хэш содержимого)"""
+    __tablename__ = 'media_files'
+
+    content_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    file_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"<MediaFile(content_hash='{self.content_hash}', file_id='{self.file_id}')>"
+
+
+class FsmState(Base):
+    """Состояние FSM пользователя (см. src/bot/storage.py)"""
+    __tablename__ = 'fsm_states'
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    state: Mapped[str] = mapped_column(String(255), nullable=True)
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=True)  # orjson
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<FsmState(key='{self.key}', state='{self.state}')>"
+
+
+class Broadcast(Base):
+    """Рассылка и ее прогресс (см. src/bot/broadcast.py)"""
+    __tablename__ = 'broadcasts'
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+    status: Mapped[str] = mapped_column(String(20), default='pending')  # pending, running, completed
+    # Последний обработанный telegram_users.user_id: продолжение после прерывания
+    last_user_id: Mapped[int] = mapped_column(BigInteger, default=0)
+    delivered: Mapped[int] = mapped_column(Integer, default=0)
+    blocked: Mapped[int] = mapped_column(Integer, default=0)
+    failed: Mapped[int] = mapped_column(Integer, default=0)
+    created_by: Mapped[int] = mapped_column(BigInteger, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"<Broadcast(id={self.id}, status='{self.status}')>"
+
+
+class SchemaVersion(Base):
+    """Примененные миграции схемы (см. src/database/migrations.py)"""
+    __tablename__ = 'schema_version'
+
+    version: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    description: Mapped[str] = mapped_column(String(200), nullable=False)
+    applied_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"<SchemaVersion(version={self.version})>"
+
+
+def get_sqlite_pragmas(profile: Optional[str] = None) -> List[Tuple[str, str]]:
+    """PRAGMA, которые выполняются на каждом новом соединении SQLite"""
+    profile = profile or SQLITE_PROFILE
+    if profile == 'default':
+        return []
+    if profile != 'production':
+        raise ValueError(f"Неизвестный профиль SQLite: {profile}")
+    return [
+        # Читатели не блокируют писателя и наоборот
+        ('journal_mode', 'WAL'),
+        # В режиме WAL fsync только на checkpoint, транзакции остаются атомарными
+        ('synchronous', 'NORMAL'),
+        # Ждать освобождения блокировки вместо мгновенного "database is locked"
+        ('busy_timeout', str(SQLITE_BUSY_TIMEOUT)),
+        ('mmap_size', str(SQLITE_MMAP_SIZE)),
+        ('cache_size', str(SQLITE_CACHE_SIZE)),
+        ('temp_store', 'MEMORY'),
+    ]
+
+
+def apply_sqlite_profile(engine, profile: Optional[str] = None):
+    """Применять профиль SQLite к каждому соединению движка"""
+    sync_engine = getattr(engine, 'sync_engine', engine)
+    if sync_engine.dialect.name != 'sqlite':
+        return
+    pragmas = get_sqlite_pragmas(profile)
+    if not pragmas:
+        return
+
+    @event.listens_for(sync_engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def get_engine(database_url: str, sqlite_profile: Optional[str] = None):
     """Создание движка базы данных"""
-    return create_engine(database_url, echo=False)
+    engine = create_engine(database_url, echo=False)
+    apply_sqlite_profile(engine, sqlite_profile)
+    return engine
 
 
 def get_session_factory(engine):
@@ -123,4 +263,41 @@ def get_session_factory(engine):
 
 def create_tables(engine):
     """Создание всех таблиц"""
-    Base.metadata.create_all(engine)
\ No newline at end of file
+    Base.metadata.create_all(engine)
+
+
+# Асинхронные драйверы для синхронных URL из настроек
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'postgres': 'postgresql+asyncpg',
+}
+
+
+def get_async_database_url(database_url: str) -> str:
+    """Преобразовать URL базы данных в URL с асинхронным драйвером"""
+    scheme, sep, rest = database_url.partition('://')
+    if '+' in scheme:
+        # Драйвер уже указан явно (например, sqlite+aiosqlite)
+        return database_url
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+def get_async_engine(database_url: str, sqlite_profile: Optional[str] = None):
+    """Создание асинхронного движка базы данных"""
+    engine = create_async_engine(get_async_database_url(database_url), echo=False)
+    apply_sqlite_profile(engine, sqlite_profile)
+    return engine
+
+
+def get_async_session_factory(engine):
+    """Создание фабрики асинхронных сессий"""
+    # expire_on_commit=False: объекты остаются читаемыми после commit,
+    # ленивые загрузки в асинхронном режиме недоступны
+    return async_sessionmaker(bind=engine, expire_on_commit=False)
+
+
+async def create_tables_async(engine):
+    """Создание всех таблиц через асинхронный движок"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
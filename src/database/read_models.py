@@ -0,0 +1,126 @@
+"""
+Неизменяемые модели чтения (read models) для передачи данных из БД
+
+В отличие от ORM-объектов они не привязаны к сессии, не несут
+состояния identity map и безопасно разделяются между пользователями.
+Запросы выбирают только нужные столбцы (*_COLUMNS) и строят записи
+напрямую из строк результата: Model(*row).
+"""
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Tuple
+
+from src.utils.money import Money
+from .models import Product, Order, OrderItem, Cart, TelegramUser
+
+
+class UserView(NamedTuple):
+    """Пользователь Telegram в виде неизменяемой записи"""
+    user_id: int
+    username: Optional[str]
+    first_name: Optional[str]
+    last_name: Optional[str]
+    phone: Optional[str]
+    created_at: datetime
+    is_banned: bool
+    is_admin: bool
+
+
+class ProductView(NamedTuple):
+    """Товар каталога в виде неизменяемой записи"""
+    id: int
+    name: str
+    description: Optional[str]
+    price: Money
+    image: Optional[str]
+    category: Optional[str]
+    available: bool
+
+
+class CartSummary(NamedTuple):
+    """Итоги корзины, посчитанные одним агрегатным запросом"""
+    items_count: int
+    total_quantity: int
+    total: Money
+
+
+class CartLine(NamedTuple):
+    """Строка корзины вместе с названием и ценой товара"""
+    cart_id: int
+    product_id: int
+    product_name: str
+    product_price: Money
+    quantity: int
+
+    @property
+    def total(self) -> Money:
+        return self.product_price * self.quantity
+
+    def to_state(self) -> List:
+        """Компактное JSON-представление для хранения в FSM"""
+        return [self.cart_id, self.product_id, self.product_name,
+                self.product_price.kopecks, self.quantity]
+
+    @classmethod
+    def from_state(cls, values: List) -> 'CartLine':
+        cart_id, product_id, product_name, kopecks, quantity = values
+        return cls(cart_id, product_id, product_name, Money(kopecks), quantity)
+
+
+class OrderView(NamedTuple):
+    """Заказ без позиций"""
+    id: int
+    user_id: int
+    username: Optional[str]
+    phone: Optional[str]
+    address: Optional[str]
+    total_price: Money
+    status: str
+    created_at: datetime
+
+
+class OrderItemView(NamedTuple):
+    """Позиция заказа с названием товара"""
+    order_id: int
+    product_id: int
+    product_name: str
+    quantity: int
+    price: Money
+
+    @property
+    def total(self) -> Money:
+        return self.price * self.quantity
+
+
+class OrderDetails(NamedTuple):
+    """Заказ вместе с позициями"""
+    order: OrderView
+    items: Tuple[OrderItemView, ...]
+
+
+# Столбцы в порядке полей моделей чтения
+USER_VIEW_COLUMNS = (
+    TelegramUser.user_id, TelegramUser.username, TelegramUser.first_name,
+    TelegramUser.last_name, TelegramUser.phone, TelegramUser.created_at,
+    TelegramUser.is_banned, TelegramUser.is_admin
+)
+
+PRODUCT_VIEW_COLUMNS = (
+    Product.id, Product.name, Product.description, Product.price,
+    Product.image, Product.category, Product.available
+)
+
+# Требуют JOIN products
+CART_LINE_COLUMNS = (
+    Cart.id, Cart.product_id, Product.name, Product.price, Cart.quantity
+)
+
+ORDER_VIEW_COLUMNS = (
+    Order.id, Order.user_id, Order.username, Order.phone, Order.address,
+    Order.total_price, Order.status, Order.created_at
+)
+
+# Требуют JOIN products
+ORDER_ITEM_VIEW_COLUMNS = (
+    OrderItem.order_id, OrderItem.product_id, Product.name,
+    OrderItem.quantity, OrderItem.price
+)
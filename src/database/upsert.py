@@ -0,0 +1,10 @@
+"""
+INSERT ... ON CONFLICT для поддерживаемых диалектов
+"""
+from sqlalchemy.dialects import postgresql, sqlite
+
+# Диалекты с поддержкой INSERT ... ON CONFLICT DO UPDATE ... RETURNING
+UPSERT_INSERTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert,
+}
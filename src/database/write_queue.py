@@ -0,0 +1,182 @@
+"""
+Очередь записи: все изменения выполняет одна задача-писатель
+
+SQLite допускает только одного писателя, поэтому вместо гонки корутин
+за блокировкой записи операции ставятся в очередь. Писатель забирает
+накопившиеся операции пачкой, выполняет их в одной транзакции и
+отдает каждому вызывающему результат через future. Чтение идет мимо
+очереди через обычные сессии.
+"""
+import asyncio
+import logging
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Операция записи: получает сессию писателя, выполняет запросы без commit
+WriteOperation = Callable[[AsyncSession], Awaitable[T]]
+
+# Функция, которую получают обработчики: db_write(operation) -> результат
+DatabaseWriter = Callable[[WriteOperation[T]], Awaitable[T]]
+
+_Pending = Tuple[WriteOperation, asyncio.Future]
+
+
+class WriteQueueStats:
+    """Метрики очереди записи"""
+
+    __slots__ = ('submitted', 'completed', 'failed', 'batches', 'retried_batches',
+                 'max_depth', 'batch_sizes')
+
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.batches = 0
+        # Пачки, откатанные из-за ошибки одной операции и выполненные поштучно
+        self.retried_batches = 0
+        self.max_depth = 0
+        # Размер пачки -> сколько раз встречался
+        self.batch_sizes: Counter = Counter()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'batches': self.batches,
+            'retried_batches': self.retried_batches,
+            'max_depth': self.max_depth,
+            'avg_batch_size': self.completed / self.batches if self.batches else 0.0,
+            'batch_sizes': dict(sorted(self.batch_sizes.items())),
+        }
+
+
+class WriteQueue:
+    """Единственный писатель, группирующий операции в пакетные транзакции
+
+    Если одна операция пачки падает, транзакция откатывается и операции
+    пачки выполняются повторно по одной, поэтому операция должна содержать
+    только работу с базой и не иметь других побочных эффектов.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        max_batch_size: int = 64,
+        linger: float = 0.002
+    ):
+        self.session_factory = session_factory
+        self.max_batch_size = max_batch_size
+        # Сколько ждать остальные операции, если в очереди одна
+        self.linger = linger
+        self.stats = WriteQueueStats()
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def depth(self) -> int:
+        """Текущая глубина очереди"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _ensure_started(self):
+        # Создаем лениво, внутри работающего цикла событий
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run(), name='db-writer')
+
+    async def submit(self, operation: WriteOperation[T]) -> T:
+        """Поставить операцию в очередь и дождаться результата после commit"""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((operation, future))
+        self.stats.submitted += 1
+        self.stats.max_depth = max(self.stats.max_depth, self._queue.qsize())
+        return await future
+
+    async def close(self):
+        """Выполнить оставшиеся операции и остановить писателя"""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info(f"Очередь записи остановлена: {self.stats.as_dict()}")
+
+    async def _collect_batch(self) -> List[_Pending]:
+        batch = [await self._queue.get()]
+        if self._queue.empty() and self.linger:
+            await asyncio.sleep(self.linger)
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect_batch()
+            try:
+                await self._execute(batch)
+            except Exception as e:
+                # Писатель не должен умирать: ошибку получают вызывающие
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _execute(self, batch: List[_Pending]):
+        batch = [(operation, future) for operation, future in batch if not future.cancelled()]
+        if not batch:
+            return
+
+        self.stats.batches += 1
+        self.stats.batch_sizes[len(batch)] += 1
+
+        async with self.session_factory() as session:
+            try:
+                results = [await operation(session) for operation, _ in batch]
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                if len(batch) == 1:
+                    self.stats.failed += 1
+                    raise
+                results = None
+
+        if results is None:
+            # Ищем виновную операцию: остальные не должны пострадать
+            self.stats.retried_batches += 1
+            for pending in batch:
+                await self._execute_one(*pending)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+        self.stats.completed += len(batch)
+
+    async def _execute_one(self, operation: WriteOperation, future: asyncio.Future):
+        async with self.session_factory() as session:
+            try:
+                result = await operation(session)
+                await session.commit()
+            except Exception as e:
+                await session.rollback()
+                self.stats.failed += 1
+                if not future.done():
+                    future.set_exception(e)
+                return
+
+        self.stats.completed += 1
+        if not future.done():
+            future.set_result(result)
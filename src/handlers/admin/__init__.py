@@ -5,6 +5,8 @@ from aiogram import Router
 from .main import router as main_router
 from .products import router as products_router
 from .orders import router as orders_router
+from .users import router as users_router
+from .broadcast import router as broadcast_router
 
 
 def get_admin_router() -> Router:
@@ -14,5 +16,7 @@ def get_admin_router() -> Router:
     admin_router.include_router(main_router)
     admin_router.include_router(products_router)
     admin_router.include_router(orders_router)
+    admin_router.include_router(users_router)
+    admin_router.include_router(broadcast_router)
 
     return admin_router
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""
+Обработчики админ-панели для рассылок
+"""
+import asyncio
+import html
+import logging
+from typing import Set
+
+from aiogram import Bot, Router, types
+from aiogram.filters import Command, CommandObject
+
+from src.bot.broadcast import BroadcastEngine
+from src.bot.dependencies import get_broadcast_engine
+
+logger = logging.getLogger(__name__)
+
+router = Router()
+
+# Ссылки на фоновые рассылки, чтобы задачи не удалил сборщик мусора
+_running: Set[asyncio.Task] = set()
+
+
+def _start(engine: BroadcastEngine, broadcast_id: int, report_chat_id: int):
+    """Запустить рассылку в фоне и сообщить итоги администратору"""
+    async def run():
+        try:
+            progress = await engine.run(broadcast_id)
+        except Exception as e:
+            logger.error(f"Рассылка {broadcast_id} прервана: {e}", exc_info=True)
+            await engine.bot.send_message(
+                report_chat_id,
+                f"❌ Рассылка #{broadcast_id} прервана: {html.escape(str(e))}\n"
+                "Продолжить: /broadcast_resume"
+            )
+            return
+
+        await engine.bot.send_message(
+            report_chat_id,
+            f"✅ <b>Рассылка #{broadcast_id} завершена</b>\n\n"
+            f"Доставлено: {progress.delivered}\n"
+            f"Заблокировали бота: {progress.blocked}\n"
+            f"Ошибок: {progress.failed}"
+        )
+
+    task = asyncio.create_task(run(), name=f'broadcast-{broadcast_id}')
+    _running.add(task)
+    task.add_done_callback(_running.discard)
+
+
+@router.message(Command('broadcast'))
+async def broadcast_command(
+    message: types.Message,
+    command: CommandObject,
+    bot: Bot,
+    is_admin: bool
+):
+    """Разослать сообщение всем пользователям: /broadcast текст"""
+    if not is_admin:
+        await message.answer("❌ У вас нет прав администратора!")
+        return
+
+    if not command.args:
+        await message.answer(
+            "📣 <b>Рассылка</b>\n\n"
+            "Использование: /broadcast текст сообщения\n"
+            "Продолжить прерванные рассылки: /broadcast_resume"
+        )
+        return
+
+    engine = get_broadcast_engine(bot)
+    broadcast_id = await engine.create(command.args, created_by=message.from_user.id)
+    _start(engine, broadcast_id, message.chat.id)
+    await message.answer(
+        f"📣 Рассылка #{broadcast_id} запущена. Итоги придут сюда же."
+    )
+
+
+@router.message(Command('broadcast_resume'))
+async def broadcast_resume_command(
+    message: types.Message,
+    bot: Bot,
+    is_admin: bool
+):
+    """Продолжить прерванные рассылки"""
+    if not is_admin:
+        await message.answer("❌ У вас нет прав администратора!")
+        return
+
+    engine = get_broadcast_engine(bot)
+    running = {task.get_name() for task in _running}
+    broadcast_ids = [
+        broadcast_id for broadcast_id in await engine.unfinished()
+        if f'broadcast-{broadcast_id}' not in running
+    ]
+    if not broadcast_ids:
+        await message.answer("Незавершенных рассылок нет")
+        return
+
+    for broadcast_id in broadcast_ids:
+        _start(engine, broadcast_id, message.chat.id)
+    await message.answer(
+        "📣 Продолжаем рассылки: " + ", ".join(f"#{broadcast_id}" for broadcast_id in broadcast_ids)
+    )
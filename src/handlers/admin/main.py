@@ -4,25 +4,25 @@
 from aiogram import Router, F, types
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
-from sqlalchemy import func
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.config import ADMIN_IDS
 from src.keyboards.admin import admin_kb
-from src.database.models import TelegramUser, Product, Order
-from src.bot.dependencies import get_db_session
+from src.database.database import AsyncDatabaseManager
+from src.bot.dependencies import (
+    get_event_isolation, get_edit_coalescer, get_outbound_scheduler, get_throttling
+)
+from src.database.models import TelegramUser, Product
+from src.services.order_service import select_orders_count, select_orders_total
+from src.utils.money import Money
 
 router = Router()
 
 
-def is_admin(user_id: int) -> bool:
-    """Проверка прав администратора"""
-    return user_id in ADMIN_IDS
-
-
 @router.message(Command('admin'))
-async def admin_main_menu(message: types.Message):
+async def admin_main_menu(message: types.Message, is_admin: bool):
     """Главное меню админ-панели"""
-    if not is_admin(message.from_user.id):
+    if not is_admin:
         await message.answer("❌ У вас нет прав администратора!")
         return
 
@@ -34,9 +34,9 @@ async def admin_main_menu(message: types.Message):
 
 
 @router.callback_query(F.data == "admin_back")
-async def admin_back_handler(callback: types.CallbackQuery):
+async def admin_back_handler(callback: types.CallbackQuery, is_admin: bool):
     """Возврат в главное меню админки"""
-    if not is_admin(callback.from_user.id):
+    if not is_admin:
         await callback.answer("❌ Нет доступа", show_alert=True)
         return
 
@@ -48,48 +48,90 @@ async def admin_back_handler(callback: types.CallbackQuery):
 
 
 @router.callback_query(F.data == "admin_stats")
-async def admin_stats_handler(callback: types.CallbackQuery):
+async def admin_stats_handler(
+    callback: types.CallbackQuery,
+    session: AsyncSession,
+    db_manager: AsyncDatabaseManager,
+    is_admin: bool
+):
     """Статистика бота"""
-    if not is_admin(callback.from_user.id):
+    if not is_admin:
         await callback.answer("❌ Нет доступа", show_alert=True)
         return
 
-    session = get_db_session()
-    try:
-        # Подсчет статистики
-        total_users = session.query(func.count(TelegramUser.id)).scalar()
-        total_products = session.query(func.count(Product.id)).scalar()
-        total_orders = session.query(func.count(Order.id)).scalar()
-
-        # Подсчет заказов по статусам
-        pending_orders = session.query(func.count(Order.id)).filter_by(
-            status='pending'
-        ).scalar()
-        completed_orders = session.query(func.count(Order.id)).filter_by(
-            status='completed'
-        ).scalar()
-
-        # Общая сумма продаж
-        total_sales = session.query(func.sum(Order.total_price)).filter_by(
-            status='completed'
-        ).scalar() or 0
-
-        text = (
-            "📊 <b>Статистика бота</b>\n\n"
-            f"👥 Всего пользователей: {total_users}\n"
-            f"📦 Всего товаров: {total_products}\n"
-            f"📋 Всего заказов: {total_orders}\n\n"
-            f"🆕 Новых заказов: {pending_orders}\n"
-            f"✅ Выполнено заказов: {completed_orders}\n\n"
-            f"💰 Общая сумма продаж: {total_sales:.2f} руб."
+    # Подсчет статистики
+    total_users = await session.scalar(select(func.count(TelegramUser.id)))
+    total_products = await session.scalar(select(func.count(Product.id)))
+    total_orders = await session.scalar(select_orders_count())
+
+    # Подсчет заказов по статусам
+    pending_orders = await session.scalar(select_orders_count('pending'))
+    completed_orders = await session.scalar(select_orders_count('completed'))
+
+    # Общая сумма продаж
+    total_sales = await session.scalar(select_orders_total('completed')) or Money(0)
+
+    text = (
+        "📊 <b>Статистика бота</b>\n\n"
+        f"👥 Всего пользователей: {total_users}\n"
+        f"📦 Всего товаров: {total_products}\n"
+        f"📋 Всего заказов: {total_orders}\n\n"
+        f"🆕 Новых заказов: {pending_orders}\n"
+        f"✅ Выполнено заказов: {completed_orders}\n\n"
+        f"💰 Общая сумма продаж: {total_sales:.2f} руб."
+    )
+
+    write_queue = db_manager.write_queue
+    if write_queue is not None:
+        stats = write_queue.stats.as_dict()
+        text += (
+            "\n\n🗄 <b>Очередь записи</b>\n"
+            f"Глубина: {write_queue.depth} (макс. {stats['max_depth']})\n"
+            f"Записей: {stats['completed']}, ошибок: {stats['failed']}\n"
+            f"Пачек: {stats['batches']}, средний размер: {stats['avg_batch_size']:.1f}"
         )
 
-        await callback.message.edit_text(
-            text,
-            reply_markup=admin_kb.main_menu()
+    isolation = get_event_isolation()
+    stats = isolation.stats.as_dict()
+    text += (
+        "\n\n🔒 <b>Очередь обновлений пользователей</b>\n"
+        f"Сейчас обрабатывается: {isolation.active}\n"
+        f"Ожиданий: {stats['contended']} из {stats['acquired']} "
+        f"({stats['contention_rate']:.1%})\n"
+        f"Среднее ожидание: {stats['avg_wait_ms']:.1f} мс, "
+        f"макс.: {stats['max_wait_ms']:.1f} мс"
+    )
+
+    edits = get_edit_coalescer().as_dict()
+    text += (
+        "\n\n✏️ <b>Правки количества</b>\n"
+        f"Запрошено: {edits['requested']}, отправлено: {edits['sent']}, "
+        f"сэкономлено запросов: {edits['saved']}"
+    )
+
+    outbound = get_outbound_scheduler()
+    stats = outbound.stats.as_dict()
+    text += (
+        "\n\n📤 <b>Исходящие запросы</b>\n"
+        f"Отправлено: {stats['sent']}, в очереди: {outbound.depth} (макс. {stats['max_depth']})\n"
+        f"Flood control: {stats['flood_waits']}, повторов: {stats['retried']}, "
+        f"ошибок: {stats['failed']}"
+    )
+    for priority, latency in stats['latency'].items():
+        text += (
+            f"\nОжидание (приоритет {priority}): "
+            f"p50 ≤ {latency['p50_ms']:.0f} мс, p99 ≤ {latency['p99_ms']:.0f} мс"
         )
-    finally:
-        session.close()
+
+    throttled = get_throttling().stats.as_dict()
+    text += f"\n\n🚦 <b>Анти-флуд</b>\nОтклонено: {throttled['rejected_total']}"
+    for name, count in list(throttled['rejected'].items())[:5]:
+        text += f"\n{name}: {count}"
+
+    await callback.message.edit_text(
+        text,
+        reply_markup=admin_kb.main_menu()
+    )
 
 
 @router.callback_query(F.data == "cancel")
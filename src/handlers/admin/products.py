@@ -1,16 +1,22 @@
 """
 Обработчики админ-панели для управления продуктами
 """
+import html
+import io
+import logging
+
 from aiogram import Router, F, types
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.config import ADMIN_IDS
 from src.keyboards.admin import admin_kb
-from src.services import ProductService
-from src.bot.dependencies import get_db_session
+from src.services import ProductService, MediaService
+from src.utils.money import Money
+from src.bot.dependencies import get_image_pipeline
 
 router = Router()
+logger = logging.getLogger(__name__)
 
 
 class ProductStates(StatesGroup):
@@ -20,17 +26,13 @@ class ProductStates(StatesGroup):
     waiting_for_price = State()
     waiting_for_category = State()
     waiting_for_image = State()
-
-
-def is_admin(user_id: int) -> bool:
-    """Проверка прав администратора"""
-    return user_id in ADMIN_IDS
+    waiting_for_new_photo = State()
 
 
 @router.callback_query(F.data == "admin_products")
-async def products_menu_handler(callback: types.CallbackQuery):
+async def products_menu_handler(callback: types.CallbackQuery, is_admin: bool):
     """Меню управления товарами"""
-    if not is_admin(callback.from_user.id):
+    if not is_admin:
         await callback.answer("❌ Нет доступа", show_alert=True)
         return
 
@@ -42,46 +44,45 @@ async def products_menu_handler(callback: types.CallbackQuery):
 
 
 @router.callback_query(F.data == "product_list")
-async def product_list_handler(callback: types.CallbackQuery):
+async def product_list_handler(
+    callback: types.CallbackQuery,
+    product_service: ProductService,
+    is_admin: bool
+):
     """Список всех товаров"""
-    if not is_admin(callback.from_user.id):
+    if not is_admin:
         await callback.answer("❌ Нет доступа", show_alert=True)
         return
 
-    session = get_db_session()
-    try:
-        product_service = ProductService(session)
-        products = product_service.get_all_products()
-
-        if not products:
-            await callback.message.edit_text(
-                "📦 Товаров пока нет.\n"
-                "Добавьте первый товар!",
-                reply_markup=admin_kb.products_menu()
-            )
-            return
-
-        text = "📦 <b>Список товаров:</b>\n\n"
-
-        for product in products:
-            status = "✅" if product.available else "❌"
-            text += f"{status} <b>{product.name}</b>\n"
-            text += f"   💰 {product.price} руб.\n"
-            text += f"   📂 {product.category or 'Без категории'}\n"
-            text += f"   /product_{product.id}\n\n"
+    products = await product_service.get_all_products()
 
+    if not products:
         await callback.message.edit_text(
-            text,
+            "📦 Товаров пока нет.\n"
+            "Добавьте первый товар!",
             reply_markup=admin_kb.products_menu()
         )
-    finally:
-        session.close()
+        return
+
+    text = "📦 <b>Список товаров:</b>\n\n"
+
+    for product in products:
+        status = "✅" if product.available else "❌"
+        text += f"{status} <b>{product.name}</b>\n"
+        text += f"   💰 {product.price} руб.\n"
+        text += f"   📂 {product.category or 'Без категории'}\n"
+        text += f"   /product_{product.id}\n\n"
+
+    await callback.message.edit_text(
+        text,
+        reply_markup=admin_kb.products_menu()
+    )
 
 
 @router.callback_query(F.data == "product_add")
-async def product_add_handler(callback: types.CallbackQuery, state: FSMContext):
+async def product_add_handler(callback: types.CallbackQuery, state: FSMContext, is_admin: bool):
     """Начать добавление товара"""
-    if not is_admin(callback.from_user.id):
+    if not is_admin:
         await callback.answer("❌ Нет доступа", show_alert=True)
         return
 
@@ -121,8 +122,11 @@ async def product_description_handler(message: types.Message, state: FSMContext)
 async def product_price_handler(message: types.Message, state: FSMContext):
     """Обработка цены товара"""
     try:
-        price = float(message.text)
-        await state.update_data(price=price)
+        price = Money.from_rubles(message.text)
+        if price.kopecks <= 0:
+            raise ValueError("Цена должна быть положительной")
+        # В FSM храним копейки - целое число
+        await state.update_data(price=price.kopecks)
         await state.set_state(ProductStates.waiting_for_category)
 
         await message.answer(
@@ -145,32 +149,52 @@ async def product_category_handler(message: types.Message, state: FSMContext):
     )
 
 
+async def ingest_product_photo(message: types.Message) -> str:
+    """Скачать фото товара и пропустить через конвейер изображений
+
+    Возвращает путь к нормализованному файлу. Если обработка не удалась,
+    используется исходный file_id, как и раньше.
+    """
+    photo = message.photo[-1]
+    try:
+        buffer = io.BytesIO()
+        await message.bot.download(photo, destination=buffer)
+        variants = await get_image_pipeline().ingest(buffer.getvalue())
+        return variants.image
+    except Exception as e:
+        logger.warning(f"Не удалось обработать фото товара: {e}")
+        return photo.file_id
+
+
 @router.message(ProductStates.waiting_for_image)
-async def product_image_handler(message: types.Message, state: FSMContext):
+async def product_image_handler(
+    message: types.Message,
+    state: FSMContext,
+    product_service: ProductService,
+    session: AsyncSession
+):
     """Обработка изображения товара"""
     data = await state.get_data()
 
     image_path = None
     if message.photo:
-        image_path = message.photo[-1].file_id
+        image_path = await ingest_product_photo(message)
     elif message.text and message.text.lower() != 'пропустить':
         await message.answer("❌ Отправьте фото или введите 'пропустить'")
         return
 
     # Сохраняем товар в БД
-    session = get_db_session()
     try:
-        product_service = ProductService(session)
         product_data = {
             'name': data['name'],
             'description': data['description'],
-            'price': data['price'],
+            'price': Money(data['price']),
             'category': data['category'],
             'image': image_path,
             'available': True
         }
 
-        product = product_service.create_product(product_data)
+        product = await product_service.create_product(product_data)
 
         await message.answer(
             f"✅ Товар '<b>{product.name}</b>' успешно добавлен!\n\n"
@@ -179,49 +203,108 @@ async def product_image_handler(message: types.Message, state: FSMContext):
             reply_markup=admin_kb.products_menu()
         )
     except Exception as e:
+        await session.rollback()
         await message.answer(f"❌ Ошибка при добавлении товара: {str(e)}")
     finally:
-        session.close()
+        await state.clear()
+
+
+@router.callback_query(F.data.startswith("product_photo:"))
+async def product_photo_handler(callback: types.CallbackQuery, state: FSMContext, is_admin: bool):
+    """Начать замену фото товара"""
+    if not is_admin:
+        await callback.answer("❌ Нет доступа", show_alert=True)
+        return
+
+    product_id = int(callback.data.split(":")[1])
+    await state.set_state(ProductStates.waiting_for_new_photo)
+    await state.update_data(product_id=product_id)
+
+    # Карточка товара может быть фото, поэтому отвечаем новым сообщением
+    await callback.message.answer(
+        "📷 Отправьте новое фото товара:",
+        reply_markup=admin_kb.cancel()
+    )
+    await callback.answer()
+
+
+@router.message(ProductStates.waiting_for_new_photo)
+async def product_new_photo_handler(
+    message: types.Message,
+    state: FSMContext,
+    product_service: ProductService,
+    session: AsyncSession
+):
+    """Замена фото товара"""
+    if not message.photo:
+        await message.answer("❌ Отправьте фото товара")
+        return
+
+    data = await state.get_data()
+    image_path = await ingest_product_photo(message)
+
+    try:
+        # update_product сбрасывает file_id прежнего фото
+        product = await product_service.update_product(data['product_id'], image=image_path)
+        if product:
+            await message.answer(
+                f"✅ Фото товара '<b>{html.escape(product.name)}</b>' обновлено",
+                reply_markup=admin_kb.product_actions(product.id)
+            )
+        else:
+            await message.answer("❌ Товар не найден", reply_markup=admin_kb.products_menu())
+    except Exception as e:
+        await session.rollback()
+        await message.answer(f"❌ Ошибка при обновлении фото: {html.escape(str(e))}")
+    finally:
         await state.clear()
 
 
 @router.message(F.text.regexp(r'^/product_(\d+)$'))
-async def product_detail_handler(message: types.Message):
+async def product_detail_handler(
+    message: types.Message,
+    product_service: ProductService,
+    media_service: MediaService,
+    is_admin: bool
+):
     """Детали конкретного товара"""
-    if not is_admin(message.from_user.id):
+    if not is_admin:
         return
 
     product_id = int(message.text.split('_')[1])
 
-    session = get_db_session()
-    try:
-        product_service = ProductService(session)
-        product = product_service.get_product_by_id(product_id)
+    product = await product_service.get_product_by_id(product_id)
 
-        if not product:
-            await message.answer("❌ Товар не найден")
-            return
+    if not product:
+        await message.answer("❌ Товар не найден")
+        return
 
-        status = "✅ В наличии" if product.available else "❌ Нет в наличии"
+    status = "✅ В наличии" if product.available else "❌ Нет в наличии"
 
-        text = (
-            f"📦 <b>{product.name}</b>\n\n"
-            f"📝 {product.description}\n"
-            f"💰 Цена: {product.price} руб.\n"
-            f"📂 Категория: {product.category or 'Без категории'}\n"
-            f"📊 Статус: {status}"
-        )
+    text = (
+        f"📦 <b>{product.name}</b>\n\n"
+        f"📝 {product.description}\n"
+        f"💰 Цена: {product.price} руб.\n"
+        f"📂 Категория: {product.category or 'Без категории'}\n"
+        f"📊 Статус: {status}"
+    )
 
-        if product.image:
-            await message.answer_photo(
-                photo=product.image,
+    if product.image:
+        try:
+            photo, upload_hash = await media_service.get_photo(product.image)
+            sent = await message.answer_photo(
+                photo=photo,
                 caption=text,
                 reply_markup=admin_kb.product_actions(product_id)
             )
-        else:
+            await media_service.remember(upload_hash, sent)
+        except Exception:
             await message.answer(
-                text,
+                f"🖼 <i>Фото временно недоступно</i>\n\n{text}",
                 reply_markup=admin_kb.product_actions(product_id)
             )
-    finally:
-        session.close()
\ No newline at end of file
+    else:
+        await message.answer(
+            text,
+            reply_markup=admin_kb.product_actions(product_id)
+        )
\ No newline at end of file
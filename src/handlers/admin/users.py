@@ -0,0 +1,75 @@
+"""
+Обработчики админ-панели для просмотра пользователей
+"""
+import html
+
+from aiogram import Router, F, types
+
+from src.keyboards.admin import admin_kb
+from src.services import UserService
+
+router = Router()
+
+# Пользователей на одной странице списка
+USERS_PAGE_SIZE = 10
+
+USER_LISTS = {
+    "users_all": ("👥 <b>Список пользователей:</b>", {}),
+    "users_banned": ("🚫 <b>Заблокированные:</b>", {'is_banned': True}),
+    "users_admins": ("👮 <b>Администраторы:</b>", {'is_admin': True}),
+}
+
+
+@router.callback_query(F.data == "admin_users")
+async def users_menu_handler(callback: types.CallbackQuery, is_admin: bool):
+    """Меню управления пользователями"""
+    if not is_admin:
+        await callback.answer("❌ Нет доступа", show_alert=True)
+        return
+
+    await callback.message.edit_text(
+        "👥 <b>Управление пользователями</b>\n\n"
+        "Выберите действие:",
+        reply_markup=admin_kb.users_menu()
+    )
+
+
+@router.callback_query(F.data.regexp(r'^users_(all|banned|admins)(:\d+)?$'))
+async def users_list_handler(
+    callback: types.CallbackQuery,
+    user_service: UserService,
+    is_admin: bool
+):
+    """Список пользователей постранично, по user_id после курсора"""
+    if not is_admin:
+        await callback.answer("❌ Нет доступа", show_alert=True)
+        return
+
+    prefix, _, after = callback.data.partition(":")
+    title, filters = USER_LISTS[prefix]
+
+    users = await user_service.get_users_page(
+        int(after or 0), limit=USERS_PAGE_SIZE, **filters
+    )
+
+    if not users:
+        await callback.message.edit_text(
+            "👥 Пользователей пока нет.",
+            reply_markup=admin_kb.users_menu()
+        )
+        return
+
+    text = f"{title}\n\n"
+
+    for user in users:
+        status = "🚫" if user.is_banned else "✅"
+        admin = "👮" if user.is_admin else ""
+        text += f"{status} {admin} {html.escape(user.first_name or 'Без имени')}\n"
+        text += f"   @{html.escape(user.username or 'нет username')}\n"
+        text += f"   ID: {user.user_id}\n\n"
+
+    next_after = users[-1].user_id if len(users) == USERS_PAGE_SIZE else None
+    await callback.message.edit_text(
+        text,
+        reply_markup=admin_kb.users_page(prefix, next_after)
+    )
@@ -1,46 +1,98 @@
 """
 Обработчики для работы с каталогом и корзиной
 """
-import os
+import logging
+
 from aiogram import Router, F, types
 from aiogram.fsm.context import FSMContext
-from aiogram.types import InputMediaPhoto, FSInputFile
+from aiogram.types import InputMediaPhoto
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.services import ProductService, CartService, OrderService
+from src.database.read_models import CartLine
+from src.database.write_queue import DatabaseWriter
+from src.bot.dependencies import get_edit_coalescer
+from src.services import CartService, OrderService, CatalogService, MediaService
 from src.config import PAYMENT_TOKEN
+from src.utils.money import Money
 from src.keyboards.inline import (
     get_catalog_keyboard, get_cart_keyboard,
     get_main_menu_keyboard
 )
-from src.bot.dependencies import get_db_session
 
 router = Router()
+logger = logging.getLogger(__name__)
 
 
 @router.callback_query(F.data.startswith("catalog_page:"))
-async def catalog_navigation(callback: types.CallbackQuery, state: FSMContext):
+async def catalog_navigation(
+    callback: types.CallbackQuery,
+    state: FSMContext,
+    catalog_service: CatalogService,
+    media_service: MediaService
+):
     """Навигация по каталогу"""
     page = int(callback.data.split(":")[1])
+    get_edit_coalescer().discard(callback.message)
     data = await state.get_data()
-    products = data.get("products", [])
+    snapshot, version_changed = await catalog_service.get_browsing_snapshot(
+        data.get("catalog_version")
+    )
+    products = snapshot.products
+
+    # Номер страницы относится к прежней версии каталога - начинаем сначала
+    if version_changed:
+        page = 0
 
     if not products or page < 0 or page >= len(products):
         await callback.answer("Страница не найдена")
         return
 
     # Обновляем текущий индекс
-    await state.update_data(current_index=page, quantity=1)
+    await state.update_data(catalog_version=snapshot.version, current_index=page, quantity=1)
 
     # Показываем товар
     product = products[page]
-    await show_product_edit(callback.message, product, page, products, callback.from_user.id)
-    await callback.answer()
+    await show_product_edit(
+        callback.message, product, page, products, callback.from_user.id, media_service
+    )
+    await callback.answer("Меню обновилось" if version_changed else None)
 
 
 @router.callback_query(F.data.startswith("qty_minus:") | F.data.startswith("qty_plus:"))
-async def quantity_change(callback: types.CallbackQuery, state: FSMContext):
+async def quantity_change(
+    callback: types.CallbackQuery,
+    state: FSMContext,
+    catalog_service: CatalogService,
+    media_service: MediaService
+):
     """Изменение количества товара"""
+    product_id = int(callback.data.split(":")[1])
     data = await state.get_data()
+    snapshot, version_changed = await catalog_service.get_browsing_snapshot(
+        data.get("catalog_version")
+    )
+    products = snapshot.products
+    current_index = data.get("current_index", 0)
+
+    if version_changed:
+        # Позиция из FSM относится к прежней версии - ищем товар с экрана по id
+        current_index = next(
+            (index for index, product in enumerate(products) if product.id == product_id),
+            None
+        )
+        if current_index is None:
+            get_edit_coalescer().discard(callback.message)
+            if not products:
+                await callback.answer("Меню временно недоступно", show_alert=True)
+                return
+            await state.update_data(catalog_version=snapshot.version, current_index=0, quantity=1)
+            await show_product_edit(
+                callback.message, products[0], 0, products, callback.from_user.id, media_service
+            )
+            await callback.answer("Товар больше недоступен, меню обновилось")
+            return
+        await state.update_data(catalog_version=snapshot.version, current_index=current_index)
+
     current_qty = data.get("quantity", 1)
 
     if callback.data.startswith("qty_minus:"):
@@ -51,42 +103,38 @@ async def quantity_change(callback: types.CallbackQuery, state: FSMContext):
     await state.update_data(quantity=new_qty)
 
     # Обновляем кнопку количества
-    products = data.get("products", [])
-    current_index = data.get("current_index", 0)
-
-    if products and 0 <= current_index < len(products):
-        product = products[current_index]
+    if 0 <= current_index < len(products):
         keyboard = get_catalog_keyboard_with_qty(
             products, current_index, callback.from_user.id, new_qty
         )
-        await callback.message.edit_reply_markup(reply_markup=keyboard)
+        # Быстрые нажатия дают одну правку с итоговым количеством
+        get_edit_coalescer().edit_reply_markup(callback.message, keyboard)
 
     await callback.answer(f"Количество: {new_qty}")
 
 
 @router.callback_query(F.data.startswith("add_to_cart:"))
-async def add_to_cart(callback: types.CallbackQuery, state: FSMContext):
+async def add_to_cart(
+    callback: types.CallbackQuery,
+    state: FSMContext,
+    db_write: DatabaseWriter,
+    session: AsyncSession
+):
     """Добавить товар в корзину"""
-    import logging
-    logger = logging.getLogger(__name__)
-
     parts = callback.data.split(":")
     product_id = int(parts[1])
 
     data = await state.get_data()
     quantity = data.get("quantity", 1)
 
-    logger.info(f"Добавление товара в корзину: user_id={callback.from_user.id}, product_id={product_id}, quantity={quantity}")
-
-    session = get_db_session()
     try:
-        cart_service = CartService(session)
-        cart_item = cart_service.add_to_cart(
+        await db_write(lambda s: CartService(s).add_to_cart(
             user_id=callback.from_user.id,
             product_id=product_id,
             quantity=quantity
-        )
-        logger.info(f"Товар добавлен в корзину: cart_item_id={cart_item.id}")
+        ))
+        # user_id и обработчик добавляются из контекста обновления
+        logger.debug("Товар %s добавлен в корзину (%s шт.)", product_id, quantity)
 
         # Сбрасываем количество
         await state.update_data(quantity=1)
@@ -98,22 +146,17 @@ async def add_to_cart(callback: types.CallbackQuery, state: FSMContext):
 
     except Exception as e:
         logger.error(f"Ошибка при добавлении в корзину: {e}", exc_info=True)
+        await session.rollback()
         await callback.answer("❌ Ошибка при добавлении в корзину", show_alert=True)
-    finally:
-        session.close()
 
 
 @router.callback_query(F.data == "show_cart")
-async def show_cart(callback: types.CallbackQuery):
+async def show_cart(callback: types.CallbackQuery, cart_service: CartService):
     """Показать корзину"""
-    import logging
-    logger = logging.getLogger(__name__)
-
-    session = get_db_session()
+    get_edit_coalescer().discard(callback.message)
     try:
-        cart_service = CartService(session)
-        cart_items = cart_service.get_user_cart(callback.from_user.id)
-        logger.info(f"Корзина пользователя {callback.from_user.id}: {len(cart_items)} товаров")
+        cart_items = await cart_service.get_user_cart(callback.from_user.id)
+        logger.debug("В корзине товаров: %s", len(cart_items))
 
         if not cart_items:
             cart_text = (
@@ -125,15 +168,16 @@ async def show_cart(callback: types.CallbackQuery):
             )
             keyboard = get_main_menu_keyboard()
         else:
+            summary = await cart_service.get_cart_summary(callback.from_user.id)
+            total_price = summary.total
+
             cart_text = "🛒 <b>ВАША КОРЗИНА</b>\n"
             cart_text += "━━━━━━━━━━━━━━━━━━━\n\n"
 
-            total_price = 0
             for item in cart_items:
-                cart_text += f"▫️ {item['product_name']}\n"
-                cart_text += f"   {item['quantity']} x {item['product_price']:.0f} = "
-                cart_text += f"<b>{item['total']:.0f} руб.</b>\n\n"
-                total_price += item['total']
+                cart_text += f"▫️ {item.product_name}\n"
+                cart_text += f"   {item.quantity} x {item.product_price:.0f} = "
+                cart_text += f"<b>{item.total:.0f} руб.</b>\n\n"
 
             cart_text += "━━━━━━━━━━━━━━━━━━━\n"
             cart_text += f"💰 <b>ИТОГО: {total_price:.0f} руб.</b>"
@@ -153,70 +197,62 @@ async def show_cart(callback: types.CallbackQuery):
     except Exception as e:
         logger.error(f"Ошибка при показе корзины: {e}", exc_info=True)
         await callback.answer("❌ Ошибка при загрузке корзины", show_alert=True)
-    finally:
-        session.close()
 
 
 @router.callback_query(F.data == "clear_cart")
-async def clear_cart(callback: types.CallbackQuery):
+async def clear_cart(callback: types.CallbackQuery, cart_service: CartService):
     """Очистить корзину"""
-    session = get_db_session()
-    try:
-        cart_service = CartService(session)
-        cart_service.clear_cart(callback.from_user.id)
-
-        text = (
-            "🗑 <b>КОРЗИНА ОЧИЩЕНА</b>\n"
-            "━━━━━━━━━━━━━━━━━━━\n\n"
-            "✅ Все товары удалены из корзины\n\n"
-            "Хотите начать новый заказ?\n"
-            "Загляните в наше меню! 🍕"
-        )
+    await cart_service.clear_cart(callback.from_user.id)
 
-        try:
-            await callback.message.edit_text(text, reply_markup=get_main_menu_keyboard())
-        except Exception:
-            await callback.message.delete()
-            await callback.message.answer(text, reply_markup=get_main_menu_keyboard())
+    text = (
+        "🗑 <b>КОРЗИНА ОЧИЩЕНА</b>\n"
+        "━━━━━━━━━━━━━━━━━━━\n\n"
+        "✅ Все товары удалены из корзины\n\n"
+        "Хотите начать новый заказ?\n"
+        "Загляните в наше меню! 🍕"
+    )
 
-        await callback.answer("✅ Корзина очищена", show_alert=True)
+    try:
+        await callback.message.edit_text(text, reply_markup=get_main_menu_keyboard())
+    except Exception:
+        await callback.message.delete()
+        await callback.message.answer(text, reply_markup=get_main_menu_keyboard())
 
-    finally:
-        session.close()
+    await callback.answer("✅ Корзина очищена", show_alert=True)
 
 
 @router.callback_query((F.data == "back_to_catalog") | (F.data == "show_catalog"))
-async def back_to_catalog(callback: types.CallbackQuery, state: FSMContext):
+async def back_to_catalog(
+    callback: types.CallbackQuery,
+    state: FSMContext,
+    catalog_service: CatalogService,
+    media_service: MediaService
+):
     """Вернуться к каталогу"""
-    session = get_db_session()
-    try:
-        product_service = ProductService(session)
-        products = product_service.get_all_products(available_only=True)
-
-        if not products:
-            text = "🍕 <b>Каталог временно недоступен</b>\n\n" \
-                   "Попробуйте позже!"
-            try:
-                await callback.message.edit_text(text, reply_markup=get_main_menu_keyboard())
-            except Exception:
-                await callback.message.delete()
-                await callback.message.answer(text, reply_markup=get_main_menu_keyboard())
-        else:
-            # Сохраняем список товаров в состояние
-            await state.update_data(products=products, current_index=0, quantity=1)
+    snapshot = await catalog_service.get_snapshot()
+    products = snapshot.products
 
-            # Показываем первый товар
-            product = products[0]
-            # Удаляем текстовое сообщение и отправляем фото
+    if not products:
+        text = "🍕 <b>Каталог временно недоступен</b>\n\n" \
+               "Попробуйте позже!"
+        try:
+            await callback.message.edit_text(text, reply_markup=get_main_menu_keyboard())
+        except Exception:
             await callback.message.delete()
-            await show_product_send(
-                callback.message, product, 0, products, callback.from_user.id
-            )
+            await callback.message.answer(text, reply_markup=get_main_menu_keyboard())
+    else:
+        # В состояние пишем только версию общего снимка каталога
+        await state.update_data(catalog_version=snapshot.version, current_index=0, quantity=1)
 
-        await callback.answer()
+        # Показываем первый товар
+        product = products[0]
+        # Удаляем текстовое сообщение и отправляем фото
+        await callback.message.delete()
+        await show_product_send(
+            callback.message, product, 0, products, callback.from_user.id, media_service
+        )
 
-    finally:
-        session.close()
+    await callback.answer()
 
 
 @router.callback_query(F.data == "main_menu")
@@ -225,6 +261,7 @@ async def show_main_menu(callback: types.CallbackQuery):
     text = "📋 <b>ГЛАВНОЕ МЕНЮ</b>\n\n" \
            "Выберите раздел:"
 
+    get_edit_coalescer().discard(callback.message)
     try:
         await callback.message.edit_text(text, reply_markup=get_main_menu_keyboard())
     except Exception:
@@ -268,71 +305,64 @@ async def show_contacts(callback: types.CallbackQuery):
 
 
 @router.callback_query(F.data == "checkout")
-async def checkout(callback: types.CallbackQuery, state: FSMContext):
+async def checkout(
+    callback: types.CallbackQuery,
+    state: FSMContext,
+    cart_service: CartService,
+    db_write: DatabaseWriter
+):
     """Оформление заказа с оплатой"""
-    session = get_db_session()
-    try:
-        cart_service = CartService(session)
-        cart_items = cart_service.get_user_cart(callback.from_user.id)
+    cart_items = await cart_service.get_user_cart(callback.from_user.id)
 
-        if not cart_items:
-            await callback.answer("❌ Корзина пуста!", show_alert=True)
-            return
+    if not cart_items:
+        await callback.answer("❌ Корзина пуста!", show_alert=True)
+        return
 
-        # Сохраняем корзину в состояние для последующей обработки
-        await state.update_data(cart_items=cart_items)
+    # Сохраняем корзину в состояние для последующей обработки
+    await state.update_data(cart_items=[item.to_state() for item in cart_items])
 
-        # Проверяем, настроена ли оплата
-        if not PAYMENT_TOKEN:
-            # Если токен не настроен, создаем заказ без оплаты
-            await create_order_without_payment(callback, cart_items, session)
-        else:
-            # Отправляем инвойс для оплаты
-            await send_invoice(callback, cart_items)
-
-        await callback.answer()
+    # Проверяем, настроена ли оплата
+    if not PAYMENT_TOKEN:
+        # Если токен не настроен, создаем заказ без оплаты
+        await create_order_without_payment(callback, db_write)
+    else:
+        # Отправляем инвойс для оплаты
+        await send_invoice(callback, cart_items)
 
-    finally:
-        session.close()
+    await callback.answer()
 
 
-async def create_order_without_payment(callback, cart_items, session):
+async def create_order_without_payment(callback, db_write):
     """Создание заказа без оплаты"""
-    order_service = OrderService(session)
-
-    order_data = {
-        'user_id': callback.from_user.id,
-        'status': 'pending',
-        'phone': None,
-        'address': None
-    }
-
-    items = [
-        {
-            'product_id': item['product_id'],
-            'quantity': item['quantity'],
-            'price': item['product_price']
-        }
-        for item in cart_items
-    ]
-
-    order = order_service.create_order(order_data, items)
-
-    # Очищаем корзину после создания заказа
-    cart_service = CartService(session)
-    cart_service.clear_cart(callback.from_user.id)
+    async def place_order(s: AsyncSession):
+        # Заказ, позиции и очистка корзины - в одной транзакции
+        order_service = OrderService(s)
+        order = await order_service.checkout_cart(
+            callback.from_user.id,
+            status='pending',
+            username=callback.from_user.username
+        )
+        return await order_service.get_order_details(order.id) if order else None
+
+    # Сообщение строится по созданному заказу: при очереди записи корзина
+    # к моменту оформления могла измениться
+    details = await db_write(place_order)
+    if details is None:
+        await callback.message.answer("❌ Корзина пуста!", reply_markup=get_main_menu_keyboard())
+        return
 
     # Формируем сообщение о заказе
-    total_price = sum(item['total'] for item in cart_items)
+    order = details.order
+    total_price = order.total_price
     order_text = f"✅ <b>ЗАКАЗ ОФОРМЛЕН!</b>\n"
     order_text += "━━━━━━━━━━━━━━━━━━━\n\n"
     order_text += f"📦 <b>Номер заказа: #{order.id}</b>\n\n"
     order_text += "<b>Состав заказа:</b>\n"
 
-    for item in cart_items:
-        order_text += f"• {item['product_name']}\n"
-        order_text += f"  {item['quantity']} шт. × {item['product_price']:.0f} = "
-        order_text += f"<b>{item['total']:.0f} руб.</b>\n\n"
+    for item in details.items:
+        order_text += f"• {item.product_name}\n"
+        order_text += f"  {item.quantity} шт. × {item.price:.0f} = "
+        order_text += f"<b>{item.total:.0f} руб.</b>\n\n"
 
     order_text += "━━━━━━━━━━━━━━━━━━━\n"
     order_text += f"💰 <b>ИТОГО: {total_price:.0f} руб.</b>\n\n"
@@ -355,19 +385,18 @@ async def send_invoice(callback, cart_items):
     # Формируем описание заказа
     description = "Заказ в Pizza Bot:\n"
     for item in cart_items:
-        description += f"• {item['product_name']} x{item['quantity']}\n"
+        description += f"• {item.product_name} x{item.quantity}\n"
 
     # Формируем позиции для оплаты
     prices = []
     for item in cart_items:
         prices.append(
             LabeledPrice(
-                label=f"{item['product_name']} x{item['quantity']}",
-                amount=int(item['total'] * 100)  # Сумма в копейках
+                label=f"{item.product_name} x{item.quantity}",
+                amount=item.total.kopecks
             )
         )
 
-    total_amount = int(sum(item['total'] for item in cart_items) * 100)
 
     # Отправляем инвойс
     await callback.message.answer_invoice(
@@ -396,20 +425,21 @@ async def pre_checkout_query(pre_checkout_query: types.PreCheckoutQuery):
 
 
 @router.message(F.successful_payment)
-async def successful_payment(message: types.Message, state: FSMContext):
+async def successful_payment(
+    message: types.Message,
+    state: FSMContext,
+    db_write: DatabaseWriter,
+    session: AsyncSession
+):
     """Обработка успешной оплаты"""
-    import logging
-    logger = logging.getLogger(__name__)
-
     payment_info = message.successful_payment
     logger.info(f"Успешная оплата: user_id={message.from_user.id}, "
                 f"amount={payment_info.total_amount/100} {payment_info.currency}")
 
-    session = get_db_session()
     try:
         # Получаем корзину из состояния
         data = await state.get_data()
-        cart_items = data.get('cart_items', [])
+        cart_items = [CartLine.from_state(item) for item in data.get('cart_items', [])]
 
         if not cart_items:
             await message.answer(
@@ -418,36 +448,40 @@ async def successful_payment(message: types.Message, state: FSMContext):
             )
             return
 
-        # Создаем заказ
-        order_service = OrderService(session)
-
-        order_data = {
-            'user_id': message.from_user.id,
-            'status': 'paid',
-            'phone': payment_info.order_info.phone_number if payment_info.order_info else None,
-            'address': None
-        }
-
-        items = [
-            {
-                'product_id': item['product_id'],
-                'quantity': item['quantity'],
-                'price': item['product_price']
-            }
-            for item in cart_items
-        ]
-
-        order = order_service.create_order(order_data, items)
+        # Заказ строится по составу из инвойса: корзину могли изменить
+        # после send_invoice, а оплачено именно то, что было в счете
+        invoiced = sum((item.total for item in cart_items), Money(0))
+        status = 'paid'
+        if invoiced.kopecks != payment_info.total_amount:
+            # Сумма платежа не совпадает со счетом - заказ на ручную проверку
+            logger.error(
+                "Сумма оплаты %s не совпадает со счетом %s (user_id=%s)",
+                payment_info.total_amount, invoiced.kopecks, message.from_user.id
+            )
+            status = 'pending'
+
+        phone = payment_info.order_info.phone_number if payment_info.order_info else None
+
+        async def place_paid_order(s: AsyncSession):
+            # Заказ, позиции и списание оплаченного из корзины - в одной транзакции
+            order_service = OrderService(s)
+            order = await order_service.checkout_invoice(
+                message.from_user.id,
+                cart_items,
+                status=status,
+                username=message.from_user.username,
+                phone=phone
+            )
+            return await order_service.get_order_details(order.id)
 
-        # Очищаем корзину
-        cart_service = CartService(session)
-        cart_service.clear_cart(message.from_user.id)
+        details = await db_write(place_paid_order)
 
         # Очищаем состояние
         await state.clear()
 
         # Формируем сообщение
-        total_price = sum(item['total'] for item in cart_items)
+        order = details.order
+        total_price = order.total_price
         order_text = f"✅ <b>ОПЛАТА УСПЕШНА!</b>\n"
         order_text += "━━━━━━━━━━━━━━━━━━━\n\n"
         order_text += f"🎉 Спасибо за покупку!\n\n"
@@ -455,10 +489,10 @@ async def successful_payment(message: types.Message, state: FSMContext):
         order_text += f"💳 <b>Оплачено: {total_price:.0f} руб.</b>\n\n"
         order_text += "<b>Состав заказа:</b>\n"
 
-        for item in cart_items:
-            order_text += f"• {item['product_name']}\n"
-            order_text += f"  {item['quantity']} шт. × {item['product_price']:.0f} = "
-            order_text += f"<b>{item['total']:.0f} руб.</b>\n\n"
+        for item in details.items:
+            order_text += f"• {item.product_name}\n"
+            order_text += f"  {item.quantity} шт. × {item.price:.0f} = "
+            order_text += f"<b>{item.total:.0f} руб.</b>\n\n"
 
         order_text += "━━━━━━━━━━━━━━━━━━━\n\n"
         order_text += "🚚 <b>Ваш заказ принят в работу!</b>\n\n"
@@ -471,15 +505,14 @@ async def successful_payment(message: types.Message, state: FSMContext):
 
     except Exception as e:
         logger.error(f"Ошибка при обработке оплаты: {e}", exc_info=True)
+        await session.rollback()
         await message.answer(
             "❌ Произошла ошибка при обработке заказа. Свяжитесь с поддержкой.",
             reply_markup=get_main_menu_keyboard()
         )
-    finally:
-        session.close()
 
 
-async def show_product_send(message, product, index, products, user_id):
+async def show_product_send(message, product, index, products, user_id, media_service):
     """Вспомогательная функция для отправки нового сообщения с товаром"""
     caption = f"<b>{product.name}</b>\n\n"
 
@@ -496,23 +529,14 @@ async def show_product_send(message, product, index, products, user_id):
     # Проверяем, есть ли фото
     if product.image:
         try:
-            # Если это file_id от Telegram, используем его напрямую
-            if product.image.startswith('AgAC') or product.image.startswith('BAA'):
-                await message.answer_photo(
-                    photo=product.image,
-                    caption=caption,
-                    reply_markup=keyboard
-                )
-            # Если это локальный файл
-            elif os.path.exists(product.image):
-                photo = FSInputFile(product.image)
-                await message.answer_photo(
-                    photo=photo,
-                    caption=caption,
-                    reply_markup=keyboard
-                )
-            else:
-                raise FileNotFoundError("Image not found")
+            # file_id от Telegram или локальный файл (с кэшем file_id после загрузки)
+            photo, upload_hash = await media_service.get_photo(product.image)
+            sent = await message.answer_photo(
+                photo=photo,
+                caption=caption,
+                reply_markup=keyboard
+            )
+            await media_service.remember(upload_hash, sent)
         except Exception:
             text = f"🖼 <i>Фото временно недоступно</i>\n\n{caption}"
             await message.answer(text, reply_markup=keyboard)
@@ -521,7 +545,7 @@ async def show_product_send(message, product, index, products, user_id):
         await message.answer(text, reply_markup=keyboard)
 
 
-async def show_product_edit(message, product, index, products, user_id):
+async def show_product_edit(message, product, index, products, user_id, media_service):
     """Вспомогательная функция для показа товара с редактированием"""
     caption = f"<b>{product.name}</b>\n\n"
 
@@ -538,17 +562,12 @@ async def show_product_edit(message, product, index, products, user_id):
     # Проверяем, есть ли фото
     if product.image:
         try:
-            # Если это file_id от Telegram, используем его напрямую
-            if product.image.startswith('AgAC') or product.image.startswith('BAA'):
-                media = InputMediaPhoto(media=product.image, caption=caption, parse_mode="HTML")
-            # Если это локальный файл
-            elif os.path.exists(product.image):
-                photo = FSInputFile(product.image)
-                media = InputMediaPhoto(media=photo, caption=caption, parse_mode="HTML")
-            else:
-                raise FileNotFoundError("Image not found")
-
-            await message.edit_media(media=media, reply_markup=keyboard)
+            # file_id от Telegram или локальный файл (с кэшем file_id после загрузки)
+            photo, upload_hash = await media_service.get_photo(product.image)
+            media = InputMediaPhoto(media=photo, caption=caption, parse_mode="HTML")
+
+            sent = await message.edit_media(media=media, reply_markup=keyboard)
+            await media_service.remember(upload_hash, sent)
         except Exception:
             text = f"🖼 <i>Фото временно недоступно</i>\n\n{caption}"
             await message.edit_text(text, reply_markup=keyboard)
@@ -2,20 +2,19 @@
 Основные обработчики для пользователей
 """
 import re
-import os
+from typing import Sequence
 from aiogram import Router, F, types
 from aiogram.filters import CommandStart, Command
-from aiogram.types import InputMediaPhoto, FSInputFile
+from aiogram.types import InputMediaPhoto
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
-from src.config import ADMIN_IDS, RESTRICTED_WORDS
+from src.config import RESTRICTED_WORDS
 from src.keyboards.inline import (
     get_catalog_keyboard, get_cart_keyboard,
     get_main_menu_keyboard, get_confirm_order_keyboard
 )
-from src.services import UserService, ProductService, CartService
-from src.bot.dependencies import get_db_session
+from src.services import CatalogService, MediaService
 
 router = Router()
 
@@ -27,27 +26,12 @@ class CatalogState(StatesGroup):
 
 
 @router.message(CommandStart())
-async def start_command(message: types.Message):
+async def start_command(message: types.Message, is_admin: bool):
     """Обработка команды /start"""
-    user_id = message.from_user.id
-
-    # Сохраняем пользователя в БД
-    session = get_db_session()
-    try:
-        user_service = UserService(session)
-        user_data = {
-            'user_id': user_id,
-            'username': message.from_user.username,
-            'first_name': message.from_user.first_name,
-            'last_name': message.from_user.last_name
-        }
-        user_service.get_or_create_user(user_data)
-    finally:
-        session.close()
-
+    # Пользователя сохраняет DatabaseMiddleware, роль передает RoleMiddleware
     # Информация для администраторов
     admin_info = ""
-    if user_id in ADMIN_IDS:
+    if is_admin:
         admin_info = (
             "\n\n🔑 <b>Режим администратора</b>\n"
             "Используйте /admin для управления"
@@ -70,41 +54,44 @@ async def start_command(message: types.Message):
 
 
 @router.message(Command("menu"))
-async def menu_command(message: types.Message, state: FSMContext):
+async def menu_command(
+    message: types.Message,
+    state: FSMContext,
+    catalog_service: CatalogService,
+    media_service: MediaService
+):
     """Показать каталог товаров с фотографиями"""
-    session = get_db_session()
-    try:
-        product_service = ProductService(session)
-        products = product_service.get_all_products(available_only=True)
+    snapshot = await catalog_service.get_snapshot()
+    products = snapshot.products
 
-        if not products:
-            await message.answer(
-                "🍕 <b>МЕНЮ ПИЦЦЕРИИ</b>\n"
-                "━━━━━━━━━━━━━━━━━━━\n\n"
-                "😔 К сожалению, товары временно недоступны.\n\n"
-                "Мы работаем над обновлением меню!\n"
-                "Попробуйте зайти чуть позже.",
-                reply_markup=get_main_menu_keyboard()
-            )
-            return
-
-        # Сохраняем список товаров в состояние
-        await state.update_data(products=products, current_index=0, quantity=1)
-        await state.set_state(CatalogState.browsing)
+    if not products:
+        await message.answer(
+            "🍕 <b>МЕНЮ ПИЦЦЕРИИ</b>\n"
+            "━━━━━━━━━━━━━━━━━━━\n\n"
+            "😔 К сожалению, товары временно недоступны.\n\n"
+            "Мы работаем над обновлением меню!\n"
+            "Попробуйте зайти чуть позже.",
+            reply_markup=get_main_menu_keyboard()
+        )
+        return
 
-        # Показываем первый товар
-        await show_product(message, products[0], 0, products, message.from_user.id)
+    # В состояние пишем только версию общего снимка каталога
+    await state.update_data(catalog_version=snapshot.version, current_index=0, quantity=1)
+    await state.set_state(CatalogState.browsing)
 
-    finally:
-        session.close()
+    # Показываем первый товар
+    await show_product(
+        message, products[0], 0, products, message.from_user.id, media_service
+    )
 
 
 async def show_product(
     message: types.Message,
     product,
     index: int,
-    products: list,
+    products: Sequence,
     user_id: int,
+    media_service: MediaService,
     edit: bool = False
 ):
     """Показать товар с фото и описанием"""
@@ -123,31 +110,18 @@ async def show_product(
     # Проверяем, есть ли фото
     if product.image:
         try:
-            # Если это file_id от Telegram, используем его напрямую
-            if product.image.startswith('AgAC') or product.image.startswith('BAA'):
-                if edit:
-                    media = InputMediaPhoto(media=product.image, caption=caption, parse_mode="HTML")
-                    await message.edit_media(media=media, reply_markup=keyboard)
-                else:
-                    await message.answer_photo(
-                        photo=product.image,
-                        caption=caption,
-                        reply_markup=keyboard
-                    )
-            # Если это локальный файл
-            elif os.path.exists(product.image):
-                photo = FSInputFile(product.image)
-                if edit:
-                    media = InputMediaPhoto(media=photo, caption=caption, parse_mode="HTML")
-                    await message.edit_media(media=media, reply_markup=keyboard)
-                else:
-                    await message.answer_photo(
-                        photo=photo,
-                        caption=caption,
-                        reply_markup=keyboard
-                    )
+            # file_id от Telegram или локальный файл (с кэшем file_id после загрузки)
+            photo, upload_hash = await media_service.get_photo(product.image)
+            if edit:
+                media = InputMediaPhoto(media=photo, caption=caption, parse_mode="HTML")
+                sent = await message.edit_media(media=media, reply_markup=keyboard)
             else:
-                raise FileNotFoundError("Image not found")
+                sent = await message.answer_photo(
+                    photo=photo,
+                    caption=caption,
+                    reply_markup=keyboard
+                )
+            await media_service.remember(upload_hash, sent)
         except Exception as e:
             # Если ошибка с фото, отправляем текст
             text = f"🖼 <i>Фото временно недоступно</i>\n\n{caption}"
@@ -1,6 +1,8 @@
 """
 Inline клавиатуры для администраторов
 """
+from typing import Optional
+
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 
@@ -48,6 +50,17 @@ class AdminKeyboards:
             [InlineKeyboardButton(text="🔙 Назад", callback_data="admin_back")]
         ])
 
+    @staticmethod
+    def users_page(prefix: str, next_after: Optional[int] = None) -> InlineKeyboardMarkup:
+        """Клавиатура страницы списка пользователей"""
+        keyboard = []
+        if next_after is not None:
+            keyboard.append([
+                InlineKeyboardButton(text="➡️ Далее", callback_data=f"{prefix}:{next_after}")
+            ])
+        keyboard.append([InlineKeyboardButton(text="🔙 Назад", callback_data="admin_users")])
+        return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
     @staticmethod
     def product_actions(product_id: int) -> InlineKeyboardMarkup:
         """Клавиатура для управления конкретным товаром"""
@@ -3,12 +3,13 @@
 """
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from typing import List, Optional
-from src.database.models import Product
+from typing import List, Optional, Sequence
+from src.database.read_models import ProductView
+from src.utils.money import Money
 
 
 def get_catalog_keyboard(
-    products: List[Product],
+    products: Sequence[ProductView],
     current_index: int = 0,
     user_id: int = None
 ) -> InlineKeyboardMarkup:
@@ -77,7 +78,7 @@ def get_catalog_keyboard(
     return builder.as_markup()
 
 
-def get_cart_keyboard(cart_items: List, total_price: float) -> InlineKeyboardMarkup:
+def get_cart_keyboard(cart_items: List, total_price: Money) -> InlineKeyboardMarkup:
     """
     Создает клавиатуру для корзины
     """
@@ -4,4 +4,8 @@
 from .user_service import UserService
 from .product_service import ProductService
 from .order_service import OrderService
-from .cart_service import CartService
\ No newline at end of file
+from .cart_service import CartService
+from .catalog_service import CatalogService, CatalogSnapshot, invalidate_catalog, share_catalog_changes
+from .media_service import MediaService
+from .role_service import is_admin, is_banned, load_roles, share_role_changes
+from .image_service import ImagePipeline, ImageVariants
\ No newline at end of file
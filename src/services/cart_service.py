@@ -1,30 +1,80 @@
 """
 Сервис для работы с корзиной
 """
-from typing import List, Optional, Dict
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from typing import List, Optional
+from sqlalchemy import and_, select, delete, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
 from src.database.models import Cart, Product
+from src.database.read_models import CartSummary, CartLine, CART_LINE_COLUMNS
+from src.database.upsert import UPSERT_INSERTS
+from src.utils.money import Money
+
+def select_cart_lines(user_id: int) -> Select:
+    """Запрос строк корзины с товарами (проверяется benchmarks.query_plans)"""
+    return select(*CART_LINE_COLUMNS).join(
+        Product, Cart.product_id == Product.id
+    ).where(Cart.user_id == user_id).order_by(Cart.id)
+
+
+def select_cart_summary(user_id: int) -> Select:
+    """Запрос итогов корзины: позиции, штуки, сумма"""
+    return select(
+        func.count(Cart.id),
+        func.coalesce(func.sum(Cart.quantity), 0),
+        func.sum(Product.price * Cart.quantity, type_=Product.price.type)
+    ).join(
+        Product, Cart.product_id == Product.id
+    ).where(Cart.user_id == user_id)
 
 
 class CartService:
     """Сервис для работы с корзиной покупок"""
 
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
 
-    def add_to_cart(self, user_id: int, product_id: int, quantity: int = 1) -> Cart:
-        """Добавить товар в корзину"""
-        # Проверяем, есть ли уже такой товар в корзине
-        cart_item = self.session.query(Cart).filter(
-            and_(Cart.user_id == user_id, Cart.product_id == product_id)
-        ).first()
+    @property
+    def _dialect(self) -> str:
+        return self.session.get_bind().dialect.name
+
+    def _cart_item_filter(self, user_id: int, product_id: int):
+        return and_(Cart.user_id == user_id, Cart.product_id == product_id)
+
+    async def add_to_cart(self, user_id: int, product_id: int, quantity: int = 1) -> Cart:
+        """Добавить товар в корзину
+
+        Один запрос INSERT ... ON CONFLICT DO UPDATE ... RETURNING: повторное
+        добавление увеличивает количество, а параллельные нажатия не создают
+        дублей благодаря ограничению uq_cart_user_product.
+        """
+        insert = UPSERT_INSERTS.get(self._dialect)
+        if insert is None:
+            return await self._add_to_cart_fallback(user_id, product_id, quantity)
+
+        stmt = insert(Cart).values(
+            user_id=user_id,
+            product_id=product_id,
+            quantity=quantity
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Cart.user_id, Cart.product_id],
+            set_={'quantity': Cart.quantity + stmt.excluded.quantity}
+        ).returning(Cart)
+
+        return await self.session.scalar(
+            stmt, execution_options={'populate_existing': True}
+        )
+
+    async def _add_to_cart_fallback(self, user_id: int, product_id: int, quantity: int) -> Cart:
+        """Добавление для диалектов без ON CONFLICT"""
+        cart_item = await self.session.scalar(
+            select(Cart).where(self._cart_item_filter(user_id, product_id))
+        )
 
         if cart_item:
-            # Увеличиваем количество
             cart_item.quantity += quantity
         else:
-            # Создаем новую запись
             cart_item = Cart(
                 user_id=user_id,
                 product_id=product_id,
@@ -32,68 +82,53 @@ class CartService:
             )
             self.session.add(cart_item)
 
-        self.session.commit()
-        self.session.refresh(cart_item)
+        await self.session.flush()
         return cart_item
 
-    def remove_from_cart(self, user_id: int, product_id: int) -> bool:
+    async def remove_from_cart(self, user_id: int, product_id: int) -> bool:
         """Удалить товар из корзины"""
-        cart_item = self.session.query(Cart).filter(
-            and_(Cart.user_id == user_id, Cart.product_id == product_id)
-        ).first()
-
-        if cart_item:
-            self.session.delete(cart_item)
-            self.session.commit()
-            return True
-        return False
+        result = await self.session.execute(
+            delete(Cart).where(self._cart_item_filter(user_id, product_id))
+        )
+        return result.rowcount > 0
 
-    def update_quantity(self, user_id: int, product_id: int, quantity: int) -> Optional[Cart]:
+    async def update_quantity(self, user_id: int, product_id: int, quantity: int) -> Optional[Cart]:
         """Обновить количество товара в корзине"""
-        cart_item = self.session.query(Cart).filter(
-            and_(Cart.user_id == user_id, Cart.product_id == product_id)
-        ).first()
+        if quantity <= 0:
+            await self.remove_from_cart(user_id, product_id)
+            return None
 
-        if cart_item:
-            if quantity <= 0:
-                self.session.delete(cart_item)
-            else:
-                cart_item.quantity = quantity
-            self.session.commit()
-            return cart_item if quantity > 0 else None
-        return None
-
-    def get_user_cart(self, user_id: int) -> List[Dict]:
+        return await self.session.scalar(
+            update(Cart)
+            .where(self._cart_item_filter(user_id, product_id))
+            .values(quantity=quantity)
+            .returning(Cart),
+            execution_options={'populate_existing': True}
+        )
+
+    async def get_user_cart(self, user_id: int) -> List[CartLine]:
         """Получить содержимое корзины пользователя"""
-        cart_items = self.session.query(Cart, Product).join(
-            Product, Cart.product_id == Product.id
-        ).filter(Cart.user_id == user_id).all()
-
-        result = []
-        for cart_item, product in cart_items:
-            result.append({
-                'cart_id': cart_item.id,
-                'product_id': product.id,
-                'product_name': product.name,
-                'product_price': product.price,
-                'quantity': cart_item.quantity,
-                'total': product.price * cart_item.quantity
-            })
-        return result
-
-    def get_cart_total(self, user_id: int) -> float:
+        rows = await self.session.execute(select_cart_lines(user_id))
+        return [CartLine(*row) for row in rows]
+
+    async def get_cart_summary(self, user_id: int) -> CartSummary:
+        """Получить итоги корзины одним агрегатным запросом"""
+        row = (await self.session.execute(select_cart_summary(user_id))).one()
+        return CartSummary(
+            items_count=row[0],
+            total_quantity=row[1],
+            total=row[2] if row[2] is not None else Money(0)
+        )
+
+    async def get_cart_total(self, user_id: int) -> Money:
         """Получить общую сумму корзины"""
-        cart_items = self.get_user_cart(user_id)
-        return sum(item['total'] for item in cart_items)
+        return (await self.get_cart_summary(user_id)).total
 
-    def clear_cart(self, user_id: int) -> bool:
+    async def clear_cart(self, user_id: int) -> bool:
         """Очистить корзину пользователя"""
-        cart_items = self.session.query(Cart).filter_by(user_id=user_id).all()
-        for item in cart_items:
-            self.session.delete(item)
-        self.session.commit()
+        await self.session.execute(delete(Cart).where(Cart.user_id == user_id))
         return True
 
-    def get_cart_items_count(self, user_id: int) -> int:
-        """Получить количество товаров в корзине"""
-        return self.session.query(Cart).filter_by(user_id=user_id).count()
\ No newline at end of file
+    async def get_cart_items_count(self, user_id: int) -> int:
+        """Получить количество позиций в корзине"""
+        return (await self.get_cart_summary(user_id)).items_count
@@ -0,0 +1,189 @@
+"""
+Сервис общего снимка каталога
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from src.config import CATALOG_SNAPSHOT_TTL, CATALOG_SNAPSHOT_HISTORY
+from src.database.models import Product
+from src.database.read_models import ProductView, PRODUCT_VIEW_COLUMNS
+
+# Флаг в session.info: в транзакции менялись товары
+CATALOG_CHANGED_KEY = 'catalog_changed'
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Неизменяемый версионированный снимок доступных товаров"""
+    version: int
+    products: Tuple[ProductView, ...]
+    loaded_at: float
+
+
+class _SnapshotStore:
+    """Хранилище снимков, общее для всех пользователей процесса"""
+
+    def __init__(self):
+        self.snapshots: "OrderedDict[int, CatalogSnapshot]" = OrderedDict()
+        self.last_version = 0
+        self.stale = True
+        # Счетчик инвалидаций: загрузка, начатая до сброса, не снимает флаг stale
+        self.generation = 0
+        self._lock: Optional[asyncio.Lock] = None
+        # Счетчик изменений, общий для процессов бота, и последнее виденное значение
+        self.shared_changes = None
+        self.seen_changes = 0
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        # Создаем лениво, внутри работающего цикла событий
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    @property
+    def current(self) -> Optional[CatalogSnapshot]:
+        if not self.snapshots:
+            return None
+        return next(reversed(self.snapshots.values()))
+
+    def is_fresh(self, snapshot: Optional[CatalogSnapshot]) -> bool:
+        return (
+            snapshot is not None
+            and not self.stale
+            and time.monotonic() - snapshot.loaded_at < CATALOG_SNAPSHOT_TTL
+        )
+
+    def invalidate(self):
+        self.stale = True
+        self.generation += 1
+
+    def notify_processes(self):
+        """Сообщить остальным процессам, что каталог изменился"""
+        if self.shared_changes is not None:
+            with self.shared_changes.get_lock():
+                self.shared_changes.value += 1
+                self.seen_changes = self.shared_changes.value
+
+    def sync_processes(self):
+        """Сбросить снимок, если каталог изменили в другом процессе"""
+        if self.shared_changes is not None and self.shared_changes.value != self.seen_changes:
+            self.seen_changes = self.shared_changes.value
+            self.invalidate()
+
+    def publish(self, products: Tuple[ProductView, ...], generation: int) -> CatalogSnapshot:
+        current = self.current
+        if current is not None and current.products == products:
+            # Данные не изменились - продлеваем текущую версию
+            snapshot = CatalogSnapshot(current.version, products, time.monotonic())
+        else:
+            self.last_version += 1
+            snapshot = CatalogSnapshot(self.last_version, products, time.monotonic())
+
+        self.snapshots[snapshot.version] = snapshot
+        self.snapshots.move_to_end(snapshot.version)
+        while len(self.snapshots) > max(1, CATALOG_SNAPSHOT_HISTORY):
+            self.snapshots.popitem(last=False)
+        self.stale = generation != self.generation
+        return snapshot
+
+
+_store = _SnapshotStore()
+
+
+def invalidate_catalog():
+    """Пометить снимок каталога устаревшим во всех процессах"""
+    _store.invalidate()
+    _store.notify_processes()
+
+
+def share_catalog_changes(counter):
+    """Подключить общий для процессов счетчик изменений каталога
+
+    counter - multiprocessing.Value('q'). Процесс, изменивший товары,
+    увеличивает его, остальные сбрасывают свой снимок при следующем чтении.
+    """
+    _store.shared_changes = counter
+    _store.seen_changes = counter.value
+
+
+def mark_catalog_changed(session: AsyncSession):
+    """Отметить, что в транзакции сессии изменялись товары
+
+    Снимок сбрасывается только после commit, иначе параллельное обновление
+    могло бы перечитать каталог до фиксации изменений.
+    """
+    session.info[CATALOG_CHANGED_KEY] = True
+
+
+def select_available_products() -> Select:
+    """Запрос доступных товаров каталога (проверяется benchmarks.query_plans)"""
+    return (
+        select(*PRODUCT_VIEW_COLUMNS)
+        .filter_by(available=True)
+        .order_by(Product.category, Product.name)
+    )
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session: Session):
+    if session.info.pop(CATALOG_CHANGED_KEY, False):
+        invalidate_catalog()
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _reset_after_rollback(session: Session, previous_transaction):
+    session.info.pop(CATALOG_CHANGED_KEY, None)
+
+
+class CatalogService:
+    """Сервис для получения общего снимка каталога
+
+    В FSM пользователя хранятся только версия снимка и текущий индекс,
+    сами товары лежат в одном экземпляре на процесс.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_snapshot(self) -> CatalogSnapshot:
+        """Получить текущий снимок каталога"""
+        _store.sync_processes()
+        if _store.is_fresh(_store.current):
+            return _store.current
+
+        async with _store.lock:
+            if _store.is_fresh(_store.current):
+                return _store.current
+            generation = _store.generation
+            return _store.publish(await self._load_products(), generation)
+
+    async def get_browsing_snapshot(self, version: Optional[int]) -> Tuple[CatalogSnapshot, bool]:
+        """Получить снимок, который листает пользователь
+
+        Возвращает (снимок, версия_сменилась). Пока версия из FSM хранится,
+        отдается именно она, чтобы индексы пользователя не сдвигались.
+        Если версия уже вытеснена (или неизвестна), отдается текущий снимок
+        с флагом True: позиция из FSM к нему не относится, и обработчик
+        должен начать с первого товара или искать товар по id.
+        """
+        if version is not None:
+            snapshot = _store.snapshots.get(version)
+            if snapshot is not None:
+                return snapshot, False
+
+        snapshot = await self.get_snapshot()
+        return snapshot, snapshot.version != version
+
+    async def _load_products(self) -> Tuple[ProductView, ...]:
+        """Загрузить доступные товары сразу в модели чтения"""
+        rows = await self.session.execute(select_available_products())
+        return tuple(ProductView(*row) for row in rows)
@@ -0,0 +1,41 @@
+"""
+Конвейер обработки изображений товаров (Pillow)
+"""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from src.config import IMAGES_DIR, IMAGE_WORKERS
+from src.utils.image_processing import ImageVariants, process_image
+
+
+class ImagePipeline:
+    """Асинхронная обертка над пулом процессов для обработки изображений
+
+    Декодирование и сжатие JPEG занимают процессор, поэтому выполняются
+    вне цикла событий бота.
+    """
+
+    def __init__(self, workers: int = IMAGE_WORKERS, images_dir: str = IMAGES_DIR):
+        self.workers = workers
+        self.images_dir = images_dir
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def ingest(self, data: bytes) -> ImageVariants:
+        """Обработать изображение из байтов"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, process_image, data, self.images_dir
+        )
+
+    def shutdown(self):
+        """Остановить пул процессов"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,125 @@
+"""
+Сервис кэширования file_id Telegram для локальных изображений
+"""
+import asyncio
+import os
+from typing import Dict, Optional, Tuple, Union
+
+from aiogram.types import FSInputFile, Message
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import MediaFile, Product
+from src.database.upsert import UPSERT_INSERTS
+from src.utils.images import hash_file, is_telegram_file_id
+
+# Хэши локальных файлов: путь -> (mtime, размер, sha256)
+_path_hashes: Dict[str, Tuple[float, int, str]] = {}
+
+# Горячий кэш поверх таблицы media_files: sha256 -> file_id
+_file_ids: Dict[str, str] = {}
+
+
+async def get_content_hash(path: str) -> str:
+    """Хэш содержимого файла с кэшем по (mtime, размер)
+
+    Повторно файл читается только если он изменился на диске,
+    чтение выполняется в пуле потоков и не блокирует цикл событий.
+    """
+    stat = os.stat(path)
+    cached = _path_hashes.get(path)
+    if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+        return cached[2]
+
+    loop = asyncio.get_running_loop()
+    content_hash = await loop.run_in_executor(None, hash_file, path)
+    _path_hashes[path] = (stat.st_mtime, stat.st_size, content_hash)
+    return content_hash
+
+
+async def get_image_hash(image: Optional[str]) -> Optional[str]:
+    """Хэш фото товара для products.image_hash
+
+    None для file_id Telegram и отсутствующих файлов: для них
+    в media_files ничего не хранится.
+    """
+    if not image or is_telegram_file_id(image) or not os.path.exists(image):
+        return None
+    return await get_content_hash(image)
+
+
+class MediaService:
+    """Сервис для повторного использования загруженных в Telegram фото
+
+    После первой загрузки локального файла сохраняется file_id, который
+    вернул Telegram, и все следующие отправки используют его вместо
+    повторной загрузки того же JPEG.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_photo(self, image: str) -> Tuple[Union[str, FSInputFile], Optional[str]]:
+        """Получить объект фото для отправки
+
+        Возвращает пару (фото, хэш). Хэш не пустой, если файл будет
+        загружен впервые и его file_id нужно сохранить через remember().
+        """
+        if is_telegram_file_id(image):
+            return image, None
+
+        if not os.path.exists(image):
+            raise FileNotFoundError("Image not found")
+
+        content_hash = await get_content_hash(image)
+        file_id = _file_ids.get(content_hash)
+        if file_id is None:
+            media_file = await self.session.get(MediaFile, content_hash)
+            if media_file:
+                file_id = _file_ids[content_hash] = media_file.file_id
+
+        if file_id:
+            return file_id, None
+        return FSInputFile(image), content_hash
+
+    async def remember(self, content_hash: Optional[str], sent: Union[Message, bool]):
+        """Сохранить file_id, который Telegram вернул после загрузки"""
+        if not content_hash or not isinstance(sent, Message) or not sent.photo:
+            return
+
+        file_id = sent.photo[-1].file_id
+        _file_ids[content_hash] = file_id
+
+        insert = UPSERT_INSERTS.get(self.session.get_bind().dialect.name)
+        if insert is None:
+            await self.session.merge(MediaFile(content_hash=content_hash, file_id=file_id))
+            return
+
+        # Один INSERT ... ON CONFLICT: две одновременные первые отправки одного
+        # фото не упираются в первичный ключ и не откатывают все обновление
+        stmt = insert(MediaFile).values(content_hash=content_hash, file_id=file_id)
+        await self.session.execute(stmt.on_conflict_do_update(
+            index_elements=[MediaFile.content_hash],
+            set_={'file_id': stmt.excluded.file_id}
+        ))
+
+    async def invalidate(self, content_hash: Optional[str], product_id: Optional[int] = None):
+        """Сбросить file_id фото, которое больше не нужно товару
+
+        content_hash - сохраненный products.image_hash прежнего фото.
+        Запись file_id общая для всех товаров с тем же содержимым, поэтому
+        она удаляется, только если хэш не встречается у других товаров
+        (кроме product_id). Проверка и удаление - один запрос по индексу.
+        """
+        if not content_hash:
+            return
+
+        in_use = select(Product.id).where(Product.image_hash == content_hash)
+        if product_id is not None:
+            in_use = in_use.where(Product.id != product_id)
+        result = await self.session.execute(
+            delete(MediaFile)
+            .where(MediaFile.content_hash == content_hash, ~in_use.exists())
+        )
+        if result.rowcount:
+            _file_ids.pop(content_hash, None)
@@ -1,21 +1,74 @@
 """
 Сервис для работы с заказами
 """
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from src.database.models import Order, OrderItem, Product
+from datetime import datetime
+from typing import List, Optional, Sequence
+from sqlalchemy import select, insert, update, delete, case, func, literal, String, Text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+from src.database.models import Order, OrderItem, Product, Cart
+from src.database.read_models import (
+    CartLine, OrderView, OrderItemView, OrderDetails,
+    ORDER_VIEW_COLUMNS, ORDER_ITEM_VIEW_COLUMNS
+)
+from src.utils.money import Money
+
+
+def select_order_view(order_id: int) -> Select:
+    """Запрос заказа по ID (проверяется benchmarks.query_plans)"""
+    return select(*ORDER_VIEW_COLUMNS).where(Order.id == order_id)
+
+
+def select_orders_by_status(status: str, limit: Optional[int] = None) -> Select:
+    """Запрос заказов со статусом, новые сверху"""
+    return (
+        select(*ORDER_VIEW_COLUMNS)
+        .filter_by(status=status)
+        .order_by(Order.created_at.desc())
+        .limit(limit)
+    )
+
+
+def select_user_orders(user_id: int, limit: Optional[int] = None) -> Select:
+    """Запрос заказов пользователя, новые сверху"""
+    return (
+        select(*ORDER_VIEW_COLUMNS)
+        .filter_by(user_id=user_id)
+        .order_by(Order.created_at.desc())
+        .limit(limit)
+    )
+
+
+def select_order_items(order_id: int) -> Select:
+    """Запрос позиций заказа с названиями товаров"""
+    return select(*ORDER_ITEM_VIEW_COLUMNS).join(
+        Product, OrderItem.product_id == Product.id
+    ).where(OrderItem.order_id == order_id).order_by(OrderItem.id)
+
+
+def select_orders_count(status: Optional[str] = None) -> Select:
+    """Запрос числа заказов (со статусом, если он задан)"""
+    query = select(func.count(Order.id))
+    return query if status is None else query.filter_by(status=status)
+
+
+def select_orders_total(status: str) -> Select:
+    """Запрос суммы заказов со статусом"""
+    return select(func.sum(Order.total_price)).filter_by(status=status)
 
 
 class OrderService:
     """Сервис для работы с заказами"""
 
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
 
-    def create_order(self, order_data: dict, items: List[dict]) -> Order:
+    async def create_order(self, order_data: dict, items: List[dict]) -> Order:
         """Создать новый заказ с позициями"""
         # Вычисляем общую стоимость заказа
-        total_price = sum(item_data['price'] * item_data['quantity'] for item_data in items)
+        total_price = sum(
+            (item_data['price'] * item_data['quantity'] for item_data in items), Money(0)
+        )
 
         # Добавляем total_price в данные заказа
         order_data['total_price'] = total_price
@@ -23,70 +76,187 @@ class OrderService:
         # Создаем заказ
         order = Order(**order_data)
         self.session.add(order)
-        self.session.flush()  # Получаем ID заказа
+        await self.session.flush()  # Получаем ID заказа
 
         # Добавляем позиции заказа
-        for item_data in items:
-            order_item = OrderItem(
+        self.session.add_all([
+            OrderItem(
                 order_id=order.id,
                 product_id=item_data['product_id'],
                 quantity=item_data['quantity'],
                 price=item_data['price']
             )
-            self.session.add(order_item)
+            for item_data in items
+        ])
 
-        self.session.commit()
-        self.session.refresh(order)
+        await self.session.flush()
         return order
 
-    def get_order_by_id(self, order_id: int) -> Optional[Order]:
+    async def checkout_cart(
+        self,
+        user_id: int,
+        status: str = 'pending',
+        username: Optional[str] = None,
+        phone: Optional[str] = None,
+        address: Optional[str] = None
+    ) -> Optional[OrderView]:
+        """Оформить заказ из корзины пользователя
+
+        Заказ создается через INSERT ... SELECT с суммой, посчитанной в SQL,
+        позиции копируются из корзины одним INSERT ... SELECT, корзина
+        очищается одним DELETE. Все три запроса выполняются в транзакции
+        текущей сессии, поэтому время оформления не зависит от числа позиций
+        и не бывает частично сохраненных заказов.
+        Возвращает None, если корзина пуста.
+        """
+        orders = Order.__table__
+        order_items = OrderItem.__table__
+        cart_filter = Cart.user_id == user_id
+
+        if self.session.get_bind().dialect.name == 'postgresql':
+            # Блокируем строки корзины до конца транзакции
+            await self.session.execute(
+                select(Cart.id).where(cart_filter).with_for_update()
+            )
+
+        now = datetime.utcnow()
+        # GROUP BY по одному пользователю: для пустой корзины SELECT не дает
+        # строки и заказ не создается (HAVING без GROUP BY - только SQLite 3.39+)
+        order_id = await self.session.scalar(
+            insert(orders).from_select(
+                ['user_id', 'username', 'phone', 'address', 'status',
+                 'total_price', 'created_at', 'updated_at'],
+                select(
+                    literal(user_id),
+                    literal(username, String),
+                    literal(phone, String),
+                    literal(address, Text),
+                    literal(status, String),
+                    func.sum(Product.price * Cart.quantity),
+                    literal(now),
+                    literal(now)
+                ).select_from(Cart).join(
+                    Product, Cart.product_id == Product.id
+                ).where(cart_filter).group_by(Cart.user_id)
+            ).returning(orders.c.id)
+        )
+        if order_id is None:
+            return None
+
+        await self.session.execute(
+            insert(order_items).from_select(
+                ['order_id', 'product_id', 'quantity', 'price'],
+                select(
+                    literal(order_id), Cart.product_id, Cart.quantity, Product.price
+                ).join(
+                    Product, Cart.product_id == Product.id
+                ).where(cart_filter)
+            )
+        )
+        await self.session.execute(delete(Cart).where(cart_filter))
+
+        return await self.get_order_view(order_id)
+
+    async def checkout_invoice(
+        self,
+        user_id: int,
+        lines: Sequence[CartLine],
+        status: str = 'paid',
+        username: Optional[str] = None,
+        phone: Optional[str] = None,
+        address: Optional[str] = None
+    ) -> Optional[OrderView]:
+        """Оформить заказ по составу корзины из выставленного счета
+
+        В отличие от checkout_cart, позиции и цены берутся из снимка lines,
+        а не из текущей корзины: оплачено именно то, что было в счете.
+        Заказ и позиции вставляются двумя INSERT ... VALUES, из корзины
+        списываются только оплаченные количества (UPDATE и DELETE
+        опустевших строк), добавленное после счета остается в корзине.
+        Возвращает None, если снимок пуст.
+        """
+        if not lines:
+            return None
+
+        now = datetime.utcnow()
+        order_id = await self.session.scalar(
+            insert(Order.__table__).values(
+                user_id=user_id,
+                username=username,
+                phone=phone,
+                address=address,
+                status=status,
+                total_price=sum((line.total for line in lines), Money(0)),
+                created_at=now,
+                updated_at=now
+            ).returning(Order.__table__.c.id)
+        )
+
+        await self.session.execute(
+            insert(OrderItem.__table__).values([
+                {
+                    'order_id': order_id,
+                    'product_id': line.product_id,
+                    'quantity': line.quantity,
+                    'price': line.product_price
+                }
+                for line in lines
+            ])
+        )
+
+        invoiced = {line.product_id: line.quantity for line in lines}
+        invoiced_filter = (Cart.user_id == user_id) & Cart.product_id.in_(invoiced)
+        await self.session.execute(
+            update(Cart).where(invoiced_filter).values(
+                quantity=Cart.quantity - case(invoiced, value=Cart.product_id, else_=0)
+            )
+        )
+        await self.session.execute(
+            delete(Cart).where(invoiced_filter, Cart.quantity <= 0)
+        )
+
+        return await self.get_order_view(order_id)
+
+    async def get_order_by_id(self, order_id: int) -> Optional[Order]:
         """Получить заказ по ID"""
-        return self.session.query(Order).filter_by(id=order_id).first()
+        return await self.session.get(Order, order_id)
+
+    async def get_order_view(self, order_id: int) -> Optional[OrderView]:
+        """Получить заказ по ID (только для чтения)"""
+        row = (await self.session.execute(select_order_view(order_id))).first()
+        return OrderView(*row) if row else None
 
-    def get_orders_by_status(self, status: str) -> List[Order]:
-        """Получить заказы по статусу"""
-        return self.session.query(Order).filter_by(status=status).order_by(
-            Order.created_at.desc()
-        ).all()
+    async def get_orders_by_status(
+        self, status: str, limit: Optional[int] = None
+    ) -> List[OrderView]:
+        """Получить заказы по статусу, новые сверху"""
+        rows = await self.session.execute(select_orders_by_status(status, limit))
+        return [OrderView(*row) for row in rows]
 
-    def get_user_orders(self, user_id: int) -> List[Order]:
-        """Получить заказы пользователя"""
-        return self.session.query(Order).filter_by(user_id=user_id).order_by(
-            Order.created_at.desc()
-        ).all()
+    async def get_user_orders(
+        self, user_id: int, limit: Optional[int] = None
+    ) -> List[OrderView]:
+        """Получить заказы пользователя, новые сверху"""
+        rows = await self.session.execute(select_user_orders(user_id, limit))
+        return [OrderView(*row) for row in rows]
 
-    def update_order_status(self, order_id: int, status: str) -> bool:
+    async def update_order_status(self, order_id: int, status: str) -> bool:
         """Обновить статус заказа"""
-        order = self.get_order_by_id(order_id)
+        order = await self.get_order_by_id(order_id)
         if order:
             order.status = status
-            self.session.commit()
+            await self.session.flush()
             return True
         return False
 
-    def get_order_items(self, order_id: int) -> List[OrderItem]:
-        """Получить позиции заказа"""
-        return self.session.query(OrderItem).filter_by(order_id=order_id).all()
+    async def get_order_items(self, order_id: int) -> List[OrderItemView]:
+        """Получить позиции заказа с названиями товаров"""
+        rows = await self.session.execute(select_order_items(order_id))
+        return [OrderItemView(*row) for row in rows]
 
-    def get_order_details(self, order_id: int) -> Optional[dict]:
+    async def get_order_details(self, order_id: int) -> Optional[OrderDetails]:
         """Получить детали заказа с продуктами"""
-        order = self.get_order_by_id(order_id)
+        order = await self.get_order_view(order_id)
         if not order:
             return None
-
-        items = self.session.query(OrderItem, Product).join(
-            Product, OrderItem.product_id == Product.id
-        ).filter(OrderItem.order_id == order_id).all()
-
-        return {
-            'order': order,
-            'items': [
-                {
-                    'product': product,
-                    'quantity': item.quantity,
-                    'price': item.price,
-                    'total': item.price * item.quantity
-                }
-                for item, product in items
-            ]
-        }
\ No newline at end of file
+        return OrderDetails(order, tuple(await self.get_order_items(order_id)))
@@ -2,70 +2,90 @@
 Сервис для работы с продуктами
 """
 from typing import List, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.models import Product
+from src.database.read_models import ProductView, PRODUCT_VIEW_COLUMNS
+from .catalog_service import mark_catalog_changed
+from .media_service import MediaService, get_image_hash
 
 
 class ProductService:
     """Сервис для работы с продуктами"""
 
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
 
-    def get_all_products(self, available_only: bool = False) -> List[Product]:
-        """Получить все продукты"""
-        query = self.session.query(Product)
+    async def get_all_products(self, available_only: bool = False) -> List[ProductView]:
+        """Получить все продукты (только для чтения)"""
+        query = select(*PRODUCT_VIEW_COLUMNS)
         if available_only:
             query = query.filter_by(available=True)
-        return query.order_by(Product.category, Product.name).all()
+        rows = await self.session.execute(
+            query.order_by(Product.category, Product.name)
+        )
+        return [ProductView(*row) for row in rows]
 
-    def get_product_by_id(self, product_id: int) -> Optional[Product]:
+    async def get_product_by_id(self, product_id: int) -> Optional[Product]:
         """Получить продукт по ID"""
-        return self.session.query(Product).filter_by(id=product_id).first()
+        return await self.session.get(Product, product_id)
 
-    def create_product(self, product_data: dict) -> Product:
+    async def create_product(self, product_data: dict) -> Product:
         """Создать новый продукт"""
         product = Product(**product_data)
+        if product.image_hash is None:
+            product.image_hash = await get_image_hash(product.image)
         self.session.add(product)
-        self.session.commit()
-        self.session.refresh(product)
+        await self.session.flush()
+        mark_catalog_changed(self.session)
         return product
 
-    def update_product(self, product_id: int, **kwargs) -> Optional[Product]:
+    async def update_product(self, product_id: int, **kwargs) -> Optional[Product]:
         """Обновить продукт"""
-        product = self.get_product_by_id(product_id)
+        product = await self.get_product_by_id(product_id)
         if product:
+            old_hash = product.image_hash
+            if 'image' in kwargs and kwargs['image'] != product.image:
+                kwargs.setdefault('image_hash', await get_image_hash(kwargs['image']))
             for key, value in kwargs.items():
                 setattr(product, key, value)
-            self.session.commit()
+            await self.session.flush()
+            if old_hash != product.image_hash:
+                # Фото заменено - старый file_id больше не нужен
+                await MediaService(self.session).invalidate(old_hash, product.id)
+            mark_catalog_changed(self.session)
             return product
         return None
 
-    def delete_product(self, product_id: int) -> bool:
+    async def delete_product(self, product_id: int) -> bool:
         """Удалить продукт"""
-        product = self.get_product_by_id(product_id)
+        product = await self.get_product_by_id(product_id)
         if product:
-            self.session.delete(product)
-            self.session.commit()
+            await self.session.delete(product)
+            await self.session.flush()
+            await MediaService(self.session).invalidate(product.image_hash)
+            mark_catalog_changed(self.session)
             return True
         return False
 
-    def toggle_availability(self, product_id: int) -> Optional[bool]:
+    async def toggle_availability(self, product_id: int) -> Optional[bool]:
         """Переключить доступность продукта"""
-        product = self.get_product_by_id(product_id)
+        product = await self.get_product_by_id(product_id)
         if product:
             product.available = not product.available
-            self.session.commit()
+            await self.session.flush()
+            mark_catalog_changed(self.session)
             return product.available
         return None
 
-    def get_products_by_category(self, category: str) -> List[Product]:
-        """Получить продукты по категории"""
-        return self.session.query(Product).filter_by(
-            category=category, available=True
-        ).all()
+    async def get_products_by_category(self, category: str) -> List[ProductView]:
+        """Получить продукты по категории (только для чтения)"""
+        rows = await self.session.execute(
+            select(*PRODUCT_VIEW_COLUMNS).filter_by(category=category, available=True)
+        )
+        return [ProductView(*row) for row in rows]
 
-    def get_categories(self) -> List[str]:
+    async def get_categories(self) -> List[str]:
         """Получить список всех категорий"""
-        categories = self.session.query(Product.category).distinct().all()
-        return [cat[0] for cat in categories if cat[0]]
\ No newline at end of file
+        categories = await self.session.scalars(select(Product.category).distinct())
+        return [cat for cat in categories if cat]
@@ -0,0 +1,139 @@
+"""
+Сервис ролей пользователей: администраторы и заблокированные
+"""
+import asyncio
+import time
+from typing import Callable, Dict, FrozenSet, Optional, Set
+
+from sqlalchemy import event, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.config import ADMIN_IDS, ROLES_REFRESH_INTERVAL
+from src.database.models import TelegramUser
+
+# Изменения ролей в session.info: user_id -> {'is_admin': bool, 'is_banned': bool}
+ROLE_CHANGES_KEY = 'role_changes'
+
+
+class _RoleStore:
+    """Множества ID администраторов и заблокированных, общие для процесса"""
+
+    def __init__(self):
+        self.static_admins: FrozenSet[int] = frozenset(ADMIN_IDS)
+        self.admins: Set[int] = set()
+        self.banned: Set[int] = set()
+        self.loaded_at = 0.0
+        self.stale = True
+        # Счетчик изменений: загрузка, начатая до изменения, не снимает флаг stale
+        self.generation = 0
+        self._lock: Optional[asyncio.Lock] = None
+        # Счетчик изменений, общий для процессов бота, и последнее виденное значение
+        self.shared_changes = None
+        self.seen_changes = 0
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        # Создаем лениво, внутри работающего цикла событий
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def needs_reload(self) -> bool:
+        if self.shared_changes is not None and self.shared_changes.value != self.seen_changes:
+            # Роли изменили в другом процессе
+            self.seen_changes = self.shared_changes.value
+            self.stale = True
+        return self.stale or time.monotonic() - self.loaded_at > ROLES_REFRESH_INTERVAL
+
+    def apply(self, changes: Dict[int, Dict[str, bool]]):
+        for user_id, fields in changes.items():
+            for field, target in (('is_admin', self.admins), ('is_banned', self.banned)):
+                if field in fields:
+                    if fields[field]:
+                        target.add(user_id)
+                    else:
+                        target.discard(user_id)
+        self.generation += 1
+        if self.shared_changes is not None:
+            with self.shared_changes.get_lock():
+                self.shared_changes.value += 1
+                self.seen_changes = self.shared_changes.value
+
+
+_store = _RoleStore()
+
+
+def is_admin(user_id: int) -> bool:
+    """Проверка прав администратора (ADMIN_IDS или флаг в БД)"""
+    return user_id in _store.static_admins or user_id in _store.admins
+
+
+def is_banned(user_id: int) -> bool:
+    """Проверить, заблокирован ли пользователь"""
+    return user_id in _store.banned
+
+
+async def _load(session: AsyncSession):
+    generation = _store.generation
+    rows = await session.execute(
+        select(TelegramUser.user_id, TelegramUser.is_admin, TelegramUser.is_banned)
+        .where(or_(TelegramUser.is_admin.is_(True), TelegramUser.is_banned.is_(True)))
+    )
+    admins, banned = set(), set()
+    for user_id, admin, banned_flag in rows:
+        if admin:
+            admins.add(user_id)
+        if banned_flag:
+            banned.add(user_id)
+
+    _store.admins, _store.banned = admins, banned
+    _store.loaded_at = time.monotonic()
+    # Если роли изменились во время загрузки, перечитаем при следующем обновлении
+    _store.stale = generation != _store.generation
+
+
+async def load_roles(session: AsyncSession):
+    """Загрузить множества ролей из БД одним запросом"""
+    async with _store.lock:
+        await _load(session)
+
+
+async def refresh_roles(session_factory: Callable[[], AsyncSession]) -> bool:
+    """Перечитать роли, если они не загружены, устарели или изменены другим процессом"""
+    if not _store.needs_reload():
+        return False
+    async with _store.lock:
+        # Пока ждали блокировку, роли мог перечитать другой запрос
+        if not _store.needs_reload():
+            return False
+        async with session_factory() as session:
+            await _load(session)
+    return True
+
+
+def share_role_changes(counter):
+    """Подключить общий для процессов счетчик изменений ролей
+
+    counter - multiprocessing.Value('q'). Процесс, изменивший роли,
+    увеличивает его, остальные перечитывают множества при следующем обновлении.
+    """
+    _store.shared_changes = counter
+    _store.seen_changes = counter.value
+
+
+def mark_role_changed(session: AsyncSession, user_id: int, **fields: bool):
+    """Запомнить изменение роли; множества обновятся только после commit"""
+    session.info.setdefault(ROLE_CHANGES_KEY, {}).setdefault(user_id, {}).update(fields)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_after_commit(session: Session):
+    changes = session.info.pop(ROLE_CHANGES_KEY, None)
+    if changes:
+        _store.apply(changes)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _reset_after_rollback(session: Session, previous_transaction):
+    session.info.pop(ROLE_CHANGES_KEY, None)
@@ -1,54 +1,183 @@
 """
 Сервис для работы с пользователями
 """
-from typing import Optional
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from src.config import KNOWN_USERS_CACHE_SIZE
 from src.database.models import TelegramUser
+from src.database.upsert import UPSERT_INSERTS
+from .role_service import mark_role_changed
+
+# Пользователи, сохраненные в транзакции сессии: user_id -> профиль
+KNOWN_USERS_KEY = 'known_users'
+
+# Поля профиля, которые обновляются при каждом обращении пользователя
+PROFILE_FIELDS = ('username', 'first_name', 'last_name')
+
+Profile = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+class _KnownUsers:
+    """LRU недавно виденных пользователей с их профилем, уже сохраненным в БД"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._profiles: "OrderedDict[int, Profile]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def is_current(self, user_id: int, profile: Profile) -> bool:
+        if self._profiles.get(user_id) != profile:
+            self.misses += 1
+            return False
+        self._profiles.move_to_end(user_id)
+        self.hits += 1
+        return True
+
+    def remember(self, user_id: int, profile: Profile):
+        self._profiles[user_id] = profile
+        self._profiles.move_to_end(user_id)
+        while len(self._profiles) > self.maxsize:
+            self._profiles.popitem(last=False)
+
+
+_known_users = _KnownUsers(KNOWN_USERS_CACHE_SIZE)
+
+
+def _profile(user_data: dict) -> Profile:
+    return tuple(user_data.get(field) for field in PROFILE_FIELDS)
+
+
+def select_user(user_id: int) -> Select:
+    """Запрос пользователя по Telegram ID (проверяется benchmarks.query_plans)"""
+    return select(TelegramUser).filter_by(user_id=user_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _remember_after_commit(session: Session):
+    for user_id, profile in session.info.pop(KNOWN_USERS_KEY, {}).items():
+        _known_users.remember(user_id, profile)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _reset_after_rollback(session: Session, previous_transaction):
+    session.info.pop(KNOWN_USERS_KEY, None)
 
 
 class UserService:
     """Сервис для работы с пользователями"""
 
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
 
-    def get_or_create_user(self, user_data: dict) -> TelegramUser:
-        """Получить или создать пользователя"""
-        user = self.session.query(TelegramUser).filter_by(
-            user_id=user_data['user_id']
-        ).first()
+    @property
+    def _dialect(self) -> str:
+        return self.session.get_bind().dialect.name
+
+    async def get_user(self, user_id: int) -> Optional[TelegramUser]:
+        """Получить пользователя по Telegram ID"""
+        return await self.session.scalar(select_user(user_id))
+
+    async def get_or_create_user(self, user_data: dict) -> TelegramUser:
+        """Получить или создать пользователя
+
+        Один запрос INSERT ... ON CONFLICT DO UPDATE ... RETURNING: новый
+        пользователь создается, у существующего обновляются username и имя.
+        Параллельные /start не упираются в уникальность user_id.
+        Если в user_data нет полей профиля, обновлять нечего: выполняется
+        ON CONFLICT DO NOTHING и существующий пользователь читается отдельно.
+        """
+        insert = UPSERT_INSERTS.get(self._dialect)
+        if insert is None:
+            user = await self._get_or_create_user_fallback(user_data)
+        else:
+            profile = {field: user_data[field] for field in PROFILE_FIELDS if field in user_data}
+            stmt = insert(TelegramUser).values(**user_data)
+            if profile:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[TelegramUser.user_id],
+                    set_={field: stmt.excluded[field] for field in profile}
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=[TelegramUser.user_id])
+            user = await self.session.scalar(
+                stmt.returning(TelegramUser), execution_options={'populate_existing': True}
+            )
+            if user is None:
+                user = await self.get_user(user_data['user_id'])
+
+        if all(field in user_data for field in PROFILE_FIELDS):
+            # Запоминаем только полный профиль: иначе в БД могли остаться другие значения
+            self.session.info.setdefault(KNOWN_USERS_KEY, {})[user.user_id] = _profile(user_data)
+        return user
+
+    async def _get_or_create_user_fallback(self, user_data: dict) -> TelegramUser:
+        """Создание пользователя для диалектов без ON CONFLICT"""
+        user = await self.get_user(user_data['user_id'])
 
         if not user:
             user = TelegramUser(**user_data)
             self.session.add(user)
-            self.session.commit()
-            self.session.refresh(user)
+        else:
+            for field in PROFILE_FIELDS:
+                if field in user_data:
+                    setattr(user, field, user_data[field])
+        await self.session.flush()
 
         return user
 
-    def update_user(self, user_id: int, **kwargs) -> Optional[TelegramUser]:
+    async def touch_user(self, user_data: dict) -> bool:
+        """Сохранить пользователя, если его профиль еще не известен процессу
+
+        Повторные обращения с тем же username и именем не ходят в БД.
+        Возвращает True, если был выполнен запрос.
+        """
+        if _known_users.is_current(user_data['user_id'], _profile(user_data)):
+            return False
+        await self.get_or_create_user(user_data)
+        return True
+
+    async def get_users_page(
+        self, after_user_id: int = 0, limit: int = 10, **filters: bool
+    ) -> List[TelegramUser]:
+        """Страница пользователей с user_id больше after_user_id (keyset-пагинация)"""
+        result = await self.session.scalars(
+            select(TelegramUser)
+            .filter_by(**filters)
+            .where(TelegramUser.user_id > after_user_id)
+            .order_by(TelegramUser.user_id)
+            .limit(limit)
+        )
+        return list(result)
+
+    async def update_user(self, user_id: int, **kwargs) -> Optional[TelegramUser]:
         """Обновить данные пользователя"""
-        user = self.session.query(TelegramUser).filter_by(user_id=user_id).first()
+        user = await self.get_user(user_id)
         if user:
             for key, value in kwargs.items():
                 setattr(user, key, value)
-            self.session.commit()
+            await self.session.flush()
             return user
         return None
 
-    def ban_user(self, user_id: int) -> bool:
+    async def _set_role(self, user_id: int, **fields: bool) -> bool:
+        if await self.update_user(user_id, **fields) is None:
+            return False
+        mark_role_changed(self.session, user_id, **fields)
+        return True
+
+    async def ban_user(self, user_id: int) -> bool:
         """Заблокировать пользователя"""
-        return self.update_user(user_id, is_banned=True) is not None
+        return await self._set_role(user_id, is_banned=True)
 
-    def unban_user(self, user_id: int) -> bool:
+    async def unban_user(self, user_id: int) -> bool:
         """Разблокировать пользователя"""
-        return self.update_user(user_id, is_banned=False) is not None
+        return await self._set_role(user_id, is_banned=False)
 
-    def make_admin(self, user_id: int) -> bool:
+    async def make_admin(self, user_id: int) -> bool:
         """Сделать пользователя администратором"""
-        return self.update_user(user_id, is_admin=True) is not None
-
-    def is_banned(self, user_id: int) -> bool:
-        """Проверить, заблокирован ли пользователь"""
-        user = self.session.query(TelegramUser).filter_by(user_id=user_id).first()
-        return user.is_banned if user else False
\ No newline at end of file
+        return await self._set_role(user_id, is_admin=True)
@@ -1,4 +1,5 @@
 """
 Модуль утилит
 """
-from .helpers import *
\ No newline at end of file
+from .helpers import *
+from .money import Money
\ No newline at end of file
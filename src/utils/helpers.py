@@ -5,8 +5,10 @@ import re
 from typing import List, Optional
 from datetime import datetime
 
+from .money import Money
 
-def format_price(price: float) -> str:
+
+def format_price(price: Money) -> str:
     """Форматирование цены"""
     return f"{price:.2f} руб."
 
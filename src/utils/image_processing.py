@@ -0,0 +1,100 @@
+"""
+Нормализация изображений товаров (Pillow)
+
+Функции синхронные: бот выполняет их в пуле процессов ImagePipeline,
+веб-админка - прямо в обработчике сохранения товара.
+"""
+import hashlib
+import io
+import os
+import re
+from typing import NamedTuple, Optional
+
+from PIL import Image, ImageOps
+
+from src.config import (
+    IMAGES_DIR, IMAGE_MAX_SIDE, IMAGE_QUALITY,
+    THUMBNAIL_MAX_SIDE, THUMBNAIL_QUALITY
+)
+from .images import is_telegram_file_id, thumbnail_path
+
+# Имя нормализованного файла: sha256 содержимого
+_NORMALIZED_NAME = re.compile(r'^[0-9a-f]{64}\.jpg$')
+
+
+class ImageVariants(NamedTuple):
+    """Пути к сохраненным вариантам изображения"""
+    content_hash: str
+    image: str
+    thumbnail: str
+
+
+def _encode_jpeg(image: Image.Image, max_side: int, quality: int) -> bytes:
+    """Уменьшить изображение и закодировать в JPEG"""
+    variant = image.copy()
+    variant.thumbnail((max_side, max_side), Image.LANCZOS)
+    buffer = io.BytesIO()
+    variant.save(buffer, format='JPEG', quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def _write_once(path: str, data: bytes):
+    """Записать файл атомарно, если его еще нет"""
+    if os.path.exists(path):
+        return
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+
+
+def process_image(data: bytes, images_dir: str = IMAGES_DIR) -> ImageVariants:
+    """Нормализовать изображение и сохранить варианты на диск
+
+    Файлы адресуются по sha256 нормализованного изображения, поэтому
+    повторная загрузка того же фото не создает дубликатов.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        normalized = _encode_jpeg(image, IMAGE_MAX_SIDE, IMAGE_QUALITY)
+        thumbnail = _encode_jpeg(image, THUMBNAIL_MAX_SIDE, THUMBNAIL_QUALITY)
+
+    content_hash = hashlib.sha256(normalized).hexdigest()
+    directory = os.path.join(images_dir, content_hash[:2])
+    os.makedirs(directory, exist_ok=True)
+
+    image_path = os.path.join(directory, f"{content_hash}.jpg")
+    _write_once(image_path, normalized)
+    _write_once(thumbnail_path(image_path), thumbnail)
+
+    return ImageVariants(content_hash, image_path, thumbnail_path(image_path))
+
+
+def process_image_file(path: str, images_dir: str = IMAGES_DIR) -> ImageVariants:
+    """Обработать изображение, уже лежащее на диске"""
+    with open(path, 'rb') as file:
+        return process_image(file.read(), images_dir)
+
+
+def is_normalized(path: str, images_dir: str = IMAGES_DIR) -> bool:
+    """Лежит ли файл в хранилище нормализованных изображений"""
+    name = os.path.basename(path)
+    if not _NORMALIZED_NAME.match(name):
+        return False
+    expected = os.path.join(images_dir, name[:2], name)
+    return os.path.abspath(path) == os.path.abspath(expected)
+
+
+def normalize_image_file(image: Optional[str], images_dir: str = IMAGES_DIR) -> Optional[str]:
+    """Привести локальный файл изображения товара к нормализованному JPEG
+
+    Возвращает путь к нормализованному файлу. file_id Telegram, пустое
+    значение и уже нормализованный файл возвращаются как есть: повторное
+    сжатие JPEG дало бы новый файл с тем же изображением.
+    """
+    if not image or is_telegram_file_id(image) or is_normalized(image, images_dir):
+        return image
+    return process_image_file(image, images_dir).image
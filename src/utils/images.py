@@ -0,0 +1,30 @@
+"""
+Пути и идентификаторы изображений товаров
+
+Модуль без зависимостей: его импортирует и веб-админка, которой не нужны
+aiogram и асинхронный слой базы данных.
+"""
+import hashlib
+import os
+
+THUMBNAIL_SUFFIX = '_thumb'
+
+
+def thumbnail_path(image_path: str) -> str:
+    """Путь к миниатюре для нормализованного изображения"""
+    root, ext = os.path.splitext(image_path)
+    return f"{root}{THUMBNAIL_SUFFIX}{ext}"
+
+
+def is_telegram_file_id(image: str) -> bool:
+    """Проверить, является ли строка file_id от Telegram"""
+    return image.startswith('AgAC') or image.startswith('BAA')
+
+
+def hash_file(path: str) -> str:
+    """Посчитать sha256 содержимого файла"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,99 @@
+"""
+Денежные суммы в копейках
+"""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import total_ordering
+from typing import Union
+
+
+@total_ordering
+class Money:
+    """Неизменяемая денежная сумма в целых копейках
+
+    Сложение и умножение на количество выполняются в целых числах,
+    поэтому итоги корзины и суммы для LabeledPrice точны до копейки.
+    """
+
+    __slots__ = ('kopecks',)
+
+    def __init__(self, kopecks: int = 0):
+        if isinstance(kopecks, bool) or not isinstance(kopecks, int):
+            raise TypeError(f"Сумма задается целым числом копеек, получено {kopecks!r}")
+        object.__setattr__(self, 'kopecks', kopecks)
+
+    @classmethod
+    def from_rubles(cls, value: Union[str, int, Decimal]) -> 'Money':
+        """Сумма из рублей: 450, '450.5', '450,50' (округление до копейки)"""
+        try:
+            rubles = Decimal(str(value).strip().replace(',', '.'))
+            kopecks = (rubles * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP)
+        except InvalidOperation:
+            raise ValueError(f"Некорректная сумма: {value!r}")
+        if not kopecks.is_finite():
+            raise ValueError(f"Некорректная сумма: {value!r}")
+        return cls(int(kopecks))
+
+    @property
+    def rubles(self) -> Decimal:
+        """Сумма в рублях (для отображения)"""
+        return Decimal(self.kopecks).scaleb(-2)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Money неизменяем")
+
+    def __reduce__(self):
+        return Money, (self.kopecks,)
+
+    def __add__(self, other: 'Money') -> 'Money':
+        if not isinstance(other, Money):
+            return NotImplemented
+        return Money(self.kopecks + other.kopecks)
+
+    def __radd__(self, other) -> 'Money':
+        # sum() начинает с 0
+        if other == 0:
+            return self
+        return NotImplemented
+
+    def __sub__(self, other: 'Money') -> 'Money':
+        if not isinstance(other, Money):
+            return NotImplemented
+        return Money(self.kopecks - other.kopecks)
+
+    def __neg__(self) -> 'Money':
+        return Money(-self.kopecks)
+
+    def __mul__(self, quantity: int) -> 'Money':
+        if isinstance(quantity, bool) or not isinstance(quantity, int):
+            return NotImplemented
+        return Money(self.kopecks * quantity)
+
+    __rmul__ = __mul__
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self.kopecks == other.kopecks
+
+    def __lt__(self, other: 'Money') -> bool:
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self.kopecks < other.kopecks
+
+    def __hash__(self) -> int:
+        return hash(self.kopecks)
+
+    def __bool__(self) -> bool:
+        return self.kopecks != 0
+
+    def __format__(self, spec: str) -> str:
+        # f"{price:.0f}" в сообщениях продолжает работать
+        return format(self.rubles, spec) if spec else str(self)
+
+    def __str__(self) -> str:
+        rubles, kopecks = divmod(abs(self.kopecks), 100)
+        sign = '-' if self.kopecks < 0 else ''
+        return f"{sign}{rubles}" if not kopecks else f"{sign}{rubles}.{kopecks:02d}"
+
+    def __repr__(self) -> str:
+        return f"Money({self.kopecks})"
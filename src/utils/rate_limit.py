@@ -0,0 +1,35 @@
+"""
+Ограничение частоты операций
+"""
+import time
+
+
+class TokenBucket:
+    """Корзина токенов с резервированием: каждый вызов reserve() занимает токен"""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated', 'paused_until')
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Занять токен; вернуть, сколько секунд ждать до его появления"""
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate, self.paused_until - now)
+
+    def pause(self, seconds: float):
+        """Не выдавать токены seconds секунд (ответ retry_after)"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def idle(self, now: float) -> bool:
+        return now >= self.paused_until and self.tokens + (now - self.updated) * self.rate >= self.capacity
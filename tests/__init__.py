@@ -0,0 +1,3 @@
+"""
+Тесты: python -m pytest из корня репозитория
+"""
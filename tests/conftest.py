@@ -0,0 +1,41 @@
+"""
+Общие фикстуры тестов
+
+Асинхронный код запускается через asyncio.run внутри обычных тестов:
+каждый сценарий получает новую SQLite-базу с тремя товарами.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import insert
+
+from src.database.models import (
+    Product, create_tables_async, get_async_engine, get_async_session_factory
+)
+from tests.helpers import PRICES
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'test.db'}"
+
+
+@pytest.fixture
+def run_db(database_url):
+    """run_db(scenario): выполнить await scenario(session_factory) на новой базе"""
+    def run(scenario):
+        async def main():
+            engine = get_async_engine(database_url, 'production')
+            await create_tables_async(engine)
+            async with engine.begin() as conn:
+                await conn.execute(insert(Product), [
+                    {'name': f'Пицца {i}', 'price': price, 'available': True}
+                    for i, price in enumerate(PRICES, 1)
+                ])
+            try:
+                return await scenario(get_async_session_factory(engine))
+            finally:
+                await engine.dispose()
+
+        return asyncio.run(main())
+    return run
@@ -0,0 +1,7 @@
+"""
+Общие данные тестов
+"""
+from src.utils.money import Money
+
+# Цены товаров с id 1, 2, 3, которые conftest кладёт в каждую тестовую базу
+PRICES = (Money(50000), Money(65050), Money(12000))
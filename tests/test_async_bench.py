@@ -0,0 +1,10 @@
+"""
+Замер обновлений в секунду запускается (см. benchmarks.async_bench)
+"""
+from benchmarks.async_bench import main
+
+
+def test_async_bench_runs(capsys):
+    assert main(['--updates', '20', '--concurrency', '4', '--rtt', '0']) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split()[0] for line in lines[1:]] == ['sync', 'async']
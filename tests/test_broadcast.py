@@ -0,0 +1,91 @@
+"""
+Рассылка: пропуск забаненных, итоги и продолжение после прерывания
+"""
+from collections import Counter
+
+from aiogram.exceptions import TelegramForbiddenError
+from aiogram.methods import SendMessage
+from sqlalchemy import insert
+
+from src.bot.broadcast import BroadcastEngine
+from src.database.models import TelegramUser
+
+FIRST_USER_ID = 1000
+USERS = 35
+BANNED = {FIRST_USER_ID + 3, FIRST_USER_ID + 20}
+BLOCKED = {FIRST_USER_ID + 5}
+
+
+class FakeBot:
+    """Бот, запоминающий отправки; fail_on - «упасть» один раз на этом получателе"""
+
+    def __init__(self, fail_on=None):
+        self.sent = Counter()
+        self.fail_on = fail_on
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if chat_id == self.fail_on:
+            self.fail_on = None
+            raise RuntimeError("процесс остановлен")
+        if chat_id in BLOCKED:
+            raise TelegramForbiddenError(SendMessage(chat_id=chat_id, text=text), 'bot was blocked')
+        self.sent[chat_id] += 1
+
+
+async def _seed_users(session_factory):
+    async with session_factory() as session:
+        await session.execute(insert(TelegramUser), [
+            {'user_id': user_id, 'is_banned': user_id in BANNED}
+            for user_id in range(FIRST_USER_ID, FIRST_USER_ID + USERS)
+        ])
+        await session.commit()
+
+
+def _engine(session_factory, bot):
+    return BroadcastEngine(session_factory, bot, chunk_size=10, concurrency=1, rate=10_000)
+
+
+def test_broadcast_skips_banned_and_counts_outcomes(run_db):
+    bot = FakeBot()
+
+    async def scenario(session_factory):
+        await _seed_users(session_factory)
+        engine = _engine(session_factory, bot)
+        broadcast_id = await engine.create('Промо')
+        return await engine.run(broadcast_id), await engine.unfinished()
+
+    progress, unfinished = run_db(scenario)
+    recipients = set(range(FIRST_USER_ID, FIRST_USER_ID + USERS)) - BANNED
+    assert progress.status == 'completed'
+    assert progress.delivered == len(recipients - BLOCKED)
+    assert progress.blocked == len(BLOCKED)
+    assert progress.failed == 0
+    assert set(bot.sent) == recipients - BLOCKED
+    assert unfinished == []
+
+
+def test_interrupted_broadcast_resumes_from_checkpoint(run_db):
+    # Падение во второй пачке: первая уже зафиксирована
+    bot = FakeBot(fail_on=FIRST_USER_ID + 15)
+
+    async def scenario(session_factory):
+        await _seed_users(session_factory)
+        engine = _engine(session_factory, bot)
+        broadcast_id = await engine.create('Промо')
+        try:
+            await engine.run(broadcast_id)
+        except RuntimeError:
+            pass
+        unfinished = await engine.unfinished()
+        return unfinished, await engine.run(broadcast_id)
+
+    unfinished, progress = run_db(scenario)
+    recipients = set(range(FIRST_USER_ID, FIRST_USER_ID + USERS)) - BANNED - BLOCKED
+    assert unfinished == [1]
+    assert progress.status == 'completed'
+    assert progress.delivered == len(recipients)
+    assert set(bot.sent) == recipients
+    # Повторно уходят только сообщения незафиксированной пачки
+    repeated = {user_id for user_id, count in bot.sent.items() if count > 1}
+    assert repeated <= set(range(FIRST_USER_ID + 10, FIRST_USER_ID + 20))
+    assert all(bot.sent[user_id] == 1 for user_id in recipients if user_id < FIRST_USER_ID + 10)
@@ -0,0 +1,71 @@
+"""
+Корзина: UPSERT при добавлении и итоги одним запросом
+"""
+import asyncio
+
+from sqlalchemy import select
+
+from src.database.models import Cart
+from src.services import CartService
+from src.utils.money import Money
+from tests.helpers import PRICES
+
+
+async def _add(session_factory, user_id, product_id, quantity):
+    async with session_factory() as session:
+        await CartService(session).add_to_cart(user_id, product_id, quantity)
+        await session.commit()
+
+
+def test_repeated_add_increments_quantity(run_db):
+    async def scenario(session_factory):
+        await _add(session_factory, 1, 1, 2)
+        await _add(session_factory, 1, 1, 3)
+        async with session_factory() as session:
+            return list(await session.scalars(select(Cart.quantity).filter_by(user_id=1)))
+
+    assert run_db(scenario) == [5]
+
+
+def test_concurrent_adds_leave_one_row_with_sum(run_db):
+    quantities = [tap % 3 + 1 for tap in range(30)]
+
+    async def scenario(session_factory):
+        await asyncio.gather(*(_add(session_factory, 1, 1, q) for q in quantities))
+        async with session_factory() as session:
+            return list(await session.scalars(
+                select(Cart.quantity).filter_by(user_id=1, product_id=1)
+            ))
+
+    assert run_db(scenario) == [sum(quantities)]
+
+
+def test_cart_summary_and_lines(run_db):
+    async def scenario(session_factory):
+        await _add(session_factory, 1, 1, 2)
+        await _add(session_factory, 1, 3, 1)
+        await _add(session_factory, 2, 2, 1)
+        async with session_factory() as session:
+            service = CartService(session)
+            return await service.get_cart_summary(1), await service.get_user_cart(1)
+
+    summary, lines = run_db(scenario)
+    assert summary.items_count == 2
+    assert summary.total_quantity == 3
+    assert summary.total == PRICES[0] * 2 + PRICES[2]
+    assert [(line.product_id, line.quantity) for line in lines] == [(1, 2), (3, 1)]
+    assert sum((line.total for line in lines), Money(0)) == summary.total
+
+
+def test_update_quantity_to_zero_removes_line(run_db):
+    async def scenario(session_factory):
+        await _add(session_factory, 1, 1, 2)
+        async with session_factory() as session:
+            service = CartService(session)
+            await service.update_quantity(1, 1, 0)
+            await session.commit()
+            return await service.get_cart_summary(1)
+
+    summary = run_db(scenario)
+    assert summary.items_count == 0
+    assert summary.total == Money(0)
@@ -0,0 +1,55 @@
+"""
+Каталог: версия снимка, которую листает пользователь
+"""
+from sqlalchemy import update
+
+from src.config import CATALOG_SNAPSHOT_HISTORY
+from src.database.models import Product
+from src.services import CatalogService
+from src.services.catalog_service import invalidate_catalog
+
+
+async def _rename(session_factory, product_id, name):
+    async with session_factory() as session:
+        await session.execute(update(Product).filter_by(id=product_id).values(name=name))
+        await session.commit()
+    invalidate_catalog()
+
+
+def test_browsing_snapshot_keeps_stored_version(run_db):
+    async def scenario(session_factory):
+        invalidate_catalog()
+        async with session_factory() as session:
+            first = await CatalogService(session).get_snapshot()
+        await _rename(session_factory, 1, 'Новая пицца')
+        async with session_factory() as session:
+            service = CatalogService(session)
+            current = await service.get_snapshot()
+            return first, current, await service.get_browsing_snapshot(first.version)
+
+    first, current, (snapshot, version_changed) = run_db(scenario)
+    assert current.version != first.version
+    assert snapshot is first and not version_changed
+
+
+def test_browsing_snapshot_signals_evicted_version(run_db):
+    async def scenario(session_factory):
+        invalidate_catalog()
+        async with session_factory() as session:
+            first = await CatalogService(session).get_snapshot()
+        for edit in range(CATALOG_SNAPSHOT_HISTORY):
+            await _rename(session_factory, 1, f'Пицца, правка {edit}')
+            async with session_factory() as session:
+                await CatalogService(session).get_snapshot()
+        async with session_factory() as session:
+            service = CatalogService(session)
+            return (
+                first, await service.get_snapshot(),
+                await service.get_browsing_snapshot(first.version),
+                await service.get_browsing_snapshot(None)
+            )
+
+    first, current, evicted, unknown = run_db(scenario)
+    assert evicted == (current, True)
+    assert unknown == (current, True)
+    assert current.version != first.version
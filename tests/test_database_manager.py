@@ -0,0 +1,39 @@
+"""
+DatabaseManager: методы возвращают модели чтения, а не ORM-объекты
+"""
+import asyncio
+
+from src.database.database import AsyncDatabaseManager, DatabaseManager
+from src.database.read_models import OrderView, UserView
+from src.utils.money import Money
+
+
+def test_sync_manager_returns_read_models(database_url):
+    manager = DatabaseManager(database_url)
+    user = manager.create_user({'user_id': 5, 'username': 'name'})
+    order = manager.create_order({'user_id': 5, 'total_price': Money(1000)})
+
+    assert user == manager.get_user(5)
+    assert isinstance(user, UserView) and user.username == 'name'
+    assert isinstance(order, OrderView) and order.status == 'pending'
+    assert manager.get_user(6) is None
+    assert manager.get_product(1) is None
+    manager.engine.dispose()
+
+
+def test_async_manager_returns_read_models(database_url):
+    async def scenario():
+        manager = AsyncDatabaseManager(database_url)
+        try:
+            await manager.ensure_schema()
+            created = await manager.create_user({'user_id': 5, 'username': 'name'})
+            order = await manager.create_order({'user_id': 5, 'total_price': Money(1000)})
+            products = await manager.get_products()
+            return created, await manager.get_user(5), order, products
+        finally:
+            await manager.dispose()
+
+    created, user, order, products = asyncio.run(scenario())
+    assert isinstance(user, UserView) and user == created
+    assert isinstance(order, OrderView) and order.total_price == Money(1000)
+    assert products == []
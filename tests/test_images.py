@@ -0,0 +1,32 @@
+"""
+Изображения товаров: нормализация локальных файлов
+"""
+import os
+
+from PIL import Image
+
+from src.utils.image_processing import is_normalized, normalize_image_file
+from src.utils.images import thumbnail_path
+
+
+def test_local_file_is_normalized_once(tmp_path):
+    images_dir = str(tmp_path / 'images')
+    source = str(tmp_path / 'upload.png')
+    Image.new('RGBA', (3000, 1500), (200, 40, 40, 255)).save(source)
+
+    image = normalize_image_file(source, images_dir)
+
+    assert is_normalized(image, images_dir)
+    with Image.open(image) as normalized, Image.open(thumbnail_path(image)) as thumbnail:
+        assert normalized.format == 'JPEG' and max(normalized.size) == 1280
+        assert max(thumbnail.size) == 320
+    # Уже нормализованный файл не сжимается повторно
+    assert normalize_image_file(image, images_dir) == image
+    assert len(os.listdir(os.path.dirname(image))) == 2
+
+
+def test_file_ids_and_empty_values_pass_through(tmp_path):
+    images_dir = str(tmp_path / 'images')
+    assert normalize_image_file('AgACAgIAAxkBAAIB', images_dir) == 'AgACAgIAAxkBAAIB'
+    assert normalize_image_file(None, images_dir) is None
+    assert not os.path.exists(images_dir)
@@ -0,0 +1,93 @@
+"""
+Изоляция обновлений: быстрые нажатия одного пользователя не теряются
+"""
+import asyncio
+import random
+import time
+
+from aiogram import Bot, Dispatcher, F, Router, types
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from src.bot.isolation import UserEventIsolation
+
+FIRST_USER_ID = 10_000_000
+
+
+class SlowStorage(MemoryStorage):
+    """MemoryStorage с задержкой: без изоляции чтение-изменение-запись теряет нажатия"""
+
+    async def get_data(self, key):
+        await asyncio.sleep(random.random() * 0.002)
+        return await super().get_data(key)
+
+    async def set_data(self, key, data):
+        await asyncio.sleep(random.random() * 0.002)
+        await super().set_data(key, data)
+
+
+def _tap(update_id, user_id):
+    user = {'id': user_id, 'is_bot': False, 'first_name': f'User{user_id}'}
+    return {
+        'update_id': update_id,
+        'callback_query': {
+            'id': str(update_id), 'from': user, 'chat_instance': str(user_id),
+            'data': 'qty_plus:0',
+            'message': {
+                'message_id': 1, 'date': int(time.time()), 'text': 'Меню',
+                'chat': {'id': user_id, 'type': 'private'}
+            }
+        }
+    }
+
+
+def test_taps_of_one_user_are_serialised():
+    taps = 50
+    router = Router()
+    running = 0
+    max_running = 0
+    # Количество, которое каждое нажатие показало бы в отредактированном сообщении
+    edits = []
+
+    @router.callback_query(F.data.startswith('qty_plus:'))
+    async def quantity_plus(callback: types.CallbackQuery, state: FSMContext):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        data = await state.get_data()
+        quantity = data.get('quantity', 0) + 1
+        await state.update_data(quantity=quantity)
+        edits.append(quantity)
+        running -= 1
+
+    async def scenario():
+        storage = SlowStorage()
+        dp = Dispatcher(storage=storage, events_isolation=UserEventIsolation())
+        dp.include_router(router)
+        bot = Bot('123456:TEST')
+        updates = [_tap(update_id, FIRST_USER_ID) for update_id in range(taps)]
+
+        await asyncio.gather(*(dp.feed_raw_update(bot, update) for update in updates))
+        key = StorageKey(bot_id=bot.id, chat_id=FIRST_USER_ID, user_id=FIRST_USER_ID)
+        data = await storage.get_data(key)
+        await bot.session.close()
+        return data.get('quantity', 0)
+
+    assert asyncio.run(scenario()) == taps
+    assert max_running == 1
+    assert edits == list(range(1, taps + 1))
+
+
+def test_close_while_lock_is_held():
+    isolation = UserEventIsolation()
+    key = StorageKey(bot_id=1, chat_id=FIRST_USER_ID, user_id=FIRST_USER_ID)
+
+    async def scenario():
+        async with isolation.lock(key):
+            await isolation.close()
+            # Ключ занят: запись не удалена, следующее обновление ждет эту блокировку
+            active_after_close = isolation.active
+        return active_after_close, isolation.active
+
+    assert asyncio.run(scenario()) == (1, 0)
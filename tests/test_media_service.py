@@ -0,0 +1,122 @@
+"""
+Фото товаров: хэш на строке товара и сброс кэша file_id при замене фото
+"""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import Message
+from sqlalchemy import insert, select
+
+import src.bot  # noqa: F401 - как в main.py: бот импортирует обработчики, а не наоборот
+from src.database.models import MediaFile, Product
+from src.handlers.admin import products as admin_products
+from src.services import MediaService, ProductService
+from src.utils.images import hash_file
+
+
+def _images(tmp_path):
+    paths = []
+    for name in ('a.jpg', 'a_copy.jpg', 'b.jpg'):
+        path = tmp_path / name
+        path.write_bytes(b'b' if name == 'b.jpg' else b'a')
+        paths.append(str(path))
+    return paths
+
+
+async def _cached_hashes(session_factory):
+    async with session_factory() as session:
+        return set(await session.scalars(select(MediaFile.content_hash)))
+
+
+def test_admin_photo_change_drops_old_file_id(run_db, tmp_path, monkeypatch):
+    image_a, _, image_b = _images(tmp_path)
+    monkeypatch.setattr(admin_products, 'ingest_product_photo', AsyncMock(return_value=image_b))
+
+    async def scenario(session_factory):
+        async with session_factory() as session:
+            await ProductService(session).update_product(1, image=image_a)
+            await session.execute(insert(MediaFile).values(content_hash=hash_file(image_a), file_id='AgAC-a'))
+            await session.commit()
+
+        storage = MemoryStorage()
+        state = FSMContext(storage, StorageKey(bot_id=1, chat_id=1, user_id=1))
+        await state.set_state(admin_products.ProductStates.waiting_for_new_photo)
+        await state.update_data(product_id=1)
+        message = SimpleNamespace(photo=[object()], answer=AsyncMock())
+        async with session_factory() as session:
+            await admin_products.product_new_photo_handler(
+                message, state, ProductService(session), session
+            )
+            await session.commit()
+
+        async with session_factory() as session:
+            product = await session.get(Product, 1)
+            image = (product.image, product.image_hash)
+        return image, await _cached_hashes(session_factory), await state.get_state()
+
+    product, cached, fsm_state = run_db(scenario)
+    assert product == (image_b, hash_file(image_b))
+    assert cached == set()
+    assert fsm_state is None
+
+
+def test_shared_file_id_is_kept_until_last_product(run_db, tmp_path):
+    image_a, image_a_copy, image_b = _images(tmp_path)
+    content_hash = hash_file(image_a)
+
+    async def scenario(session_factory):
+        async with session_factory() as session:
+            service = ProductService(session)
+            await service.update_product(1, image=image_a)
+            await service.update_product(2, image=image_a_copy)
+            await session.execute(insert(MediaFile).values(content_hash=content_hash, file_id='AgAC-a'))
+            await session.commit()
+
+        async with session_factory() as session:
+            await ProductService(session).update_product(1, image=image_b)
+            await session.commit()
+        after_replace = await _cached_hashes(session_factory)
+
+        async with session_factory() as session:
+            await ProductService(session).delete_product(2)
+            await session.commit()
+        return after_replace, await _cached_hashes(session_factory)
+
+    after_replace, after_delete = run_db(scenario)
+    assert after_replace == {content_hash}
+    assert after_delete == set()
+
+
+def test_remember_same_hash_twice_upserts(run_db):
+    def sent(file_id):
+        return Message.model_validate({
+            'message_id': 1, 'date': 0, 'chat': {'id': 1, 'type': 'private'},
+            'photo': [{'file_id': file_id, 'file_unique_id': file_id, 'width': 1, 'height': 1}]
+        })
+
+    async def scenario(session_factory):
+        remembered = asyncio.Event()
+
+        async def first_send():
+            async with session_factory() as session:
+                await MediaService(session).remember('a' * 64, sent('AgAC-first'))
+                remembered.set()
+                # Обновление еще работает, когда второе сохраняет тот же хэш
+                await asyncio.sleep(0.2)
+                await session.commit()
+
+        async def second_send():
+            await remembered.wait()
+            async with session_factory() as session:
+                await MediaService(session).remember('a' * 64, sent('AgAC-second'))
+                await session.commit()
+
+        await asyncio.gather(first_send(), second_send())
+        async with session_factory() as session:
+            return (await session.execute(select(MediaFile.content_hash, MediaFile.file_id))).all()
+
+    assert run_db(scenario) == [('a' * 64, 'AgAC-second')]
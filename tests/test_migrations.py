@@ -0,0 +1,92 @@
+"""
+Миграции схемы: новая база и база, созданная до миграций
+"""
+import pytest
+from sqlalchemy import create_engine, inspect, select, text
+
+from src.database.migrations import HEAD_VERSION, ensure_schema, get_version
+from src.database.models import Cart, Order, OrderItem, Product
+from src.utils.images import hash_file
+from src.utils.money import Money
+
+# Схема до миграций (create_all исходных моделей): цены в рублях REAL
+LEGACY_SCHEMA = (
+    "CREATE TABLE products (id INTEGER PRIMARY KEY, name VARCHAR(150) NOT NULL,"
+    " description TEXT, price FLOAT NOT NULL, image VARCHAR(150), available BOOLEAN,"
+    " category VARCHAR(50), created_at DATETIME)",
+    "CREATE TABLE telegram_users (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL UNIQUE,"
+    " username VARCHAR(150), first_name VARCHAR(150), last_name VARCHAR(150),"
+    " phone VARCHAR(20), created_at DATETIME, is_banned BOOLEAN, is_admin BOOLEAN)",
+    "CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL,"
+    " username VARCHAR(150), phone VARCHAR(20), address TEXT, total_price FLOAT NOT NULL,"
+    " status VARCHAR(50), created_at DATETIME, updated_at DATETIME)",
+    "CREATE TABLE order_items (id INTEGER PRIMARY KEY, order_id INTEGER NOT NULL,"
+    " product_id INTEGER NOT NULL, quantity INTEGER, price FLOAT NOT NULL)",
+    "CREATE TABLE cart (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL,"
+    " product_id INTEGER NOT NULL, quantity INTEGER, created_at DATETIME)",
+    "CREATE TABLE admin_tokens (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL,"
+    " token VARCHAR(100) NOT NULL UNIQUE, created_at DATETIME, expires_at DATETIME NOT NULL)",
+)
+
+LEGACY_DATA = (
+    "INSERT INTO products (id, name, price, available) VALUES (1, 'Пицца', 199.99, 1)",
+    "INSERT INTO orders (id, user_id, total_price, status) VALUES (1, 7, 399.98, 'pending')",
+    "INSERT INTO order_items (order_id, product_id, quantity, price) VALUES (1, 1, 2, 199.99)",
+    "INSERT INTO cart (user_id, product_id, quantity) VALUES (7, 1, 1)",
+    "INSERT INTO cart (user_id, product_id, quantity) VALUES (7, 1, 2)",
+)
+
+
+def test_new_database_gets_head_schema(database_url):
+    engine = create_engine(database_url)
+    with engine.connect() as conn:
+        assert ensure_schema(conn) == HEAD_VERSION
+        assert get_version(conn) == HEAD_VERSION
+        assert {'media_files', 'fsm_states', 'broadcasts'} <= set(inspect(conn).get_table_names())
+        # Повторный запуск ничего не меняет
+        assert ensure_schema(conn) == HEAD_VERSION
+    engine.dispose()
+
+
+def test_legacy_database_is_migrated(database_url, tmp_path):
+    image = tmp_path / 'pizza.jpg'
+    image.write_bytes(b'jpeg')
+    engine = create_engine(database_url)
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA + LEGACY_DATA:
+            conn.execute(text(statement))
+        conn.execute(
+            text("INSERT INTO products (id, name, price, image) VALUES (2, 'С фото', 100, :image)"),
+            {'image': str(image)}
+        )
+
+    with engine.connect() as conn:
+        assert ensure_schema(conn) == HEAD_VERSION
+
+        # Цены переведены из рублей в копейки
+        assert conn.scalar(select(Product.price).filter_by(id=1)) == Money(19999)
+        assert conn.scalar(select(Order.total_price)) == Money(39998)
+        assert conn.scalar(select(OrderItem.price)) == Money(19999)
+
+        # Дубли строк корзины слиты в одну
+        assert conn.execute(select(Cart.user_id, Cart.product_id, Cart.quantity)).all() == [(7, 1, 3)]
+        indexes = {index['name'] for index in inspect(conn).get_indexes('cart')}
+        assert 'uq_cart_user_product' in indexes
+
+        # Хэши локальных фото посчитаны при миграции
+        assert conn.execute(select(Product.id, Product.image_hash).order_by(Product.id)).all() == [
+            (1, None), (2, hash_file(str(image)))
+        ]
+    engine.dispose()
+
+
+def test_outdated_schema_without_auto_migrate_fails(database_url):
+    engine = create_engine(database_url)
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.execute(text(statement))
+
+    with engine.connect() as conn:
+        with pytest.raises(RuntimeError):
+            ensure_schema(conn, auto_migrate=False)
+    engine.dispose()
@@ -0,0 +1,128 @@
+"""
+Оформление заказа из корзины и по снимку выставленного счета
+"""
+from sqlalchemy import select
+
+from src.database.models import Cart, Order
+from src.database.read_models import CartLine
+from src.services import CartService, OrderService
+from src.utils.money import Money
+from tests.helpers import PRICES
+
+
+async def _fill_cart(session_factory, user_id, items):
+    async with session_factory() as session:
+        for product_id, quantity in items:
+            await CartService(session).add_to_cart(user_id, product_id, quantity)
+        await session.commit()
+
+
+async def _cart(session, user_id):
+    rows = await session.execute(
+        select(Cart.product_id, Cart.quantity).filter_by(user_id=user_id).order_by(Cart.product_id)
+    )
+    return [tuple(row) for row in rows]
+
+
+def test_checkout_cart_creates_order_and_clears_cart(run_db):
+    async def scenario(session_factory):
+        await _fill_cart(session_factory, 1, [(1, 2), (2, 1)])
+        await _fill_cart(session_factory, 2, [(3, 1)])
+        async with session_factory() as session:
+            service = OrderService(session)
+            order = await service.checkout_cart(1, username='user')
+            await session.commit()
+            details = await service.get_order_details(order.id)
+            return details, await _cart(session, 1), await _cart(session, 2)
+
+    details, cart, other_cart = run_db(scenario)
+    assert details.order.total_price == PRICES[0] * 2 + PRICES[1]
+    assert details.order.status == 'pending'
+    assert [(item.product_id, item.quantity, item.price) for item in details.items] == [
+        (1, 2, PRICES[0]), (2, 1, PRICES[1])
+    ]
+    assert cart == []
+    assert other_cart == [(3, 1)]
+
+
+def test_checkout_empty_cart_creates_no_order(run_db):
+    async def scenario(session_factory):
+        async with session_factory() as session:
+            order = await OrderService(session).checkout_cart(1)
+            await session.commit()
+            return order, list(await session.scalars(select(Order.id)))
+
+    order, orders = run_db(scenario)
+    assert order is None
+    assert orders == []
+
+
+def test_checkout_invoice_uses_snapshot_and_keeps_later_items(run_db):
+    # В счете - цена на момент выставления, корзину потом изменили
+    invoiced_price = Money(45000)
+    lines = [CartLine(1, 1, 'Пицца 1', invoiced_price, 2)]
+
+    async def scenario(session_factory):
+        # После счета: еще одна пицца 1 и новый товар 3
+        await _fill_cart(session_factory, 1, [(1, 3), (3, 1)])
+        async with session_factory() as session:
+            service = OrderService(session)
+            order = await service.checkout_invoice(1, lines, status='paid')
+            await session.commit()
+            return await service.get_order_details(order.id), await _cart(session, 1)
+
+    details, cart = run_db(scenario)
+    assert details.order.status == 'paid'
+    assert details.order.total_price == invoiced_price * 2
+    assert [(item.product_id, item.quantity, item.price) for item in details.items] == [
+        (1, 2, invoiced_price)
+    ]
+    # Списано только оплаченное количество
+    assert cart == [(1, 1), (3, 1)]
+
+
+def test_checkout_invoice_removes_fully_paid_lines(run_db):
+    lines = [CartLine(1, 1, 'Пицца 1', PRICES[0], 2), CartLine(2, 2, 'Пицца 2', PRICES[1], 1)]
+
+    async def scenario(session_factory):
+        await _fill_cart(session_factory, 1, [(1, 2), (2, 1)])
+        async with session_factory() as session:
+            await OrderService(session).checkout_invoice(1, lines)
+            await session.commit()
+            return await _cart(session, 1)
+
+    assert run_db(scenario) == []
+
+
+def test_cart_summary_after_checkout_in_same_session(run_db):
+    lines = [CartLine(1, 1, 'Пицца 1', PRICES[0], 1)]
+
+    async def scenario(session_factory):
+        await _fill_cart(session_factory, 1, [(1, 2), (2, 1)])
+        await _fill_cart(session_factory, 2, [(1, 2), (3, 1)])
+        async with session_factory() as session:
+            # Итоги читаются до и после оформления в одной сессии
+            cart_service = CartService(session)
+            await cart_service.get_cart_summary(1)
+            await cart_service.get_cart_summary(2)
+            await OrderService(session).checkout_cart(1)
+            await OrderService(session).checkout_invoice(2, lines)
+            return await cart_service.get_cart_summary(1), await cart_service.get_cart_summary(2)
+
+    after_cart, after_invoice = run_db(scenario)
+    assert (after_cart.items_count, after_cart.total) == (0, Money(0))
+    assert (after_invoice.total_quantity, after_invoice.total) == (2, PRICES[0] + PRICES[2])
+
+
+def test_cart_summary_is_forgotten_on_rollback(run_db):
+    async def scenario(session_factory):
+        await _fill_cart(session_factory, 1, [(1, 1)])
+        async with session_factory() as session:
+            cart_service = CartService(session)
+            await cart_service.add_to_cart(1, 2, 1)
+            await cart_service.get_cart_summary(1)
+            await session.rollback()
+            return await CartService(session).get_cart_summary(1)
+
+    summary = run_db(scenario)
+    assert (summary.items_count, summary.total) == (1, PRICES[0])
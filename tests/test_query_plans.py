@@ -0,0 +1,21 @@
+"""
+Планы горячих запросов используют индексы (см. benchmarks.query_plans)
+"""
+import asyncio
+
+from benchmarks.query_plans import check_query_plans, seed_database
+from src.database.models import get_async_engine
+
+
+def test_hot_queries_do_not_scan_hot_tables(database_url):
+    async def scenario():
+        engine = get_async_engine(database_url)
+        try:
+            await seed_database(engine, orders=5000, users=1000, products=50)
+            async with engine.begin() as conn:
+                await conn.exec_driver_sql("ANALYZE")
+            return await check_query_plans(engine)
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(scenario())
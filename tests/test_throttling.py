@@ -0,0 +1,62 @@
+"""
+Анти-флуд: скользящее окно и лимиты по обработчикам
+"""
+import asyncio
+from types import SimpleNamespace
+
+from src.bot.middlewares.throttling import (
+    SlidingWindowLimiter, ThrottlingMiddleware, parse_rate, parse_rates
+)
+
+
+def test_parse_rates():
+    assert parse_rate('5/1') == (5, 1.0)
+    assert parse_rate('3') == (3, 1.0)
+    assert parse_rates('show_cart=2/1, successful_payment=0,') == {
+        'show_cart': (2, 1.0),
+        'successful_payment': (0, 1.0),
+    }
+
+
+def test_sliding_window_limits_per_key(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('src.bot.middlewares.throttling.time.monotonic', lambda: now[0])
+    limiter = SlidingWindowLimiter()
+
+    async def hits(key, count):
+        return [await limiter.hit(key, 2, 1.0) for _ in range(count)]
+
+    assert asyncio.run(hits('1:show_cart', 3)) == [True, True, False]
+    # Другой ключ считается отдельно
+    assert asyncio.run(hits('2:show_cart', 1)) == [True]
+    # Окно сдвинулось
+    now[0] += 1.0
+    assert asyncio.run(hits('1:show_cart', 1)) == [True]
+
+
+def _data(user_id, handler_name):
+    return {
+        'event_from_user': SimpleNamespace(id=user_id),
+        'handler': SimpleNamespace(callback=SimpleNamespace(__name__=handler_name)),
+    }
+
+
+def test_middleware_rejects_over_limit_and_skips_unlimited():
+    middleware = ThrottlingMiddleware(
+        SlidingWindowLimiter(), {'successful_payment': (0, 1.0)}, default_rate=(1, 60.0)
+    )
+    calls = []
+
+    async def handler(event, data):
+        calls.append(data['handler'].callback.__name__)
+        return True
+
+    async def scenario():
+        results = []
+        for name in ('show_cart', 'show_cart', 'successful_payment', 'successful_payment'):
+            results.append(await middleware(handler, object(), _data(1, name)))
+        return results
+
+    assert asyncio.run(scenario()) == [True, None, True, True]
+    assert calls == ['show_cart', 'successful_payment', 'successful_payment']
+    assert middleware.stats.rejected == {'show_cart': 1}
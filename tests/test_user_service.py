@@ -0,0 +1,69 @@
+"""
+Пользователи: UPSERT профиля и кэш известных процессу пользователей
+"""
+from sqlalchemy import func, select
+
+from src.database.models import TelegramUser
+from src.services import UserService
+
+
+def test_get_or_create_user_updates_profile(run_db):
+    async def scenario(session_factory):
+        async with session_factory() as session:
+            service = UserService(session)
+            await service.get_or_create_user({'user_id': 101, 'username': 'old', 'first_name': 'A'})
+            await session.commit()
+            user = await service.get_or_create_user({'user_id': 101, 'username': 'new', 'first_name': 'B'})
+            await session.commit()
+            count = await session.scalar(select(func.count(TelegramUser.id)))
+            return user.username, user.first_name, count
+
+    assert run_db(scenario) == ('new', 'B', 1)
+
+
+def test_touch_user_skips_known_profile(run_db):
+    user_data = {'user_id': 202, 'username': 'name', 'first_name': 'A', 'last_name': None}
+
+    async def scenario(session_factory):
+        touched = []
+        for data in (user_data, user_data, {**user_data, 'username': 'renamed'}):
+            async with session_factory() as session:
+                touched.append(await UserService(session).touch_user(data))
+                await session.commit()
+        async with session_factory() as session:
+            username = await session.scalar(select(TelegramUser.username).filter_by(user_id=202))
+        return touched, username
+
+    assert run_db(scenario) == ([True, False, True], 'renamed')
+
+
+def test_touch_user_forgets_rolled_back_profile(run_db):
+    user_data = {'user_id': 303, 'username': 'name', 'first_name': 'A', 'last_name': None}
+
+    async def scenario(session_factory):
+        async with session_factory() as session:
+            await UserService(session).touch_user(user_data)
+            await session.rollback()
+        async with session_factory() as session:
+            return await UserService(session).touch_user(user_data)
+
+    assert run_db(scenario) is True
+
+
+def test_get_or_create_user_without_profile_fields(run_db):
+    async def scenario(session_factory):
+        async with session_factory() as session:
+            service = UserService(session)
+            created = await service.get_or_create_user({'user_id': 404})
+            await session.commit()
+            await service.get_or_create_user({'user_id': 404, 'username': 'name', 'first_name': 'A'})
+            await session.commit()
+            username = (await service.get_or_create_user({'user_id': 404})).username
+            await session.commit()
+            # Без полей профиля пользователь не считается известным процессу
+            touched = await service.touch_user(
+                {'user_id': 404, 'username': None, 'first_name': None, 'last_name': None}
+            )
+            return created.user_id, username, touched
+
+    assert run_db(scenario) == (404, 'name', True)
@@ -0,0 +1,72 @@
+"""
+Очередь записи: пачки в одной транзакции и изоляция ошибок
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from src.database.models import Cart
+from src.database.write_queue import WriteQueue
+from src.services import CartService
+
+
+def test_operations_are_batched(run_db):
+    async def scenario(session_factory):
+        queue = WriteQueue(session_factory, max_batch_size=64, linger=0.01)
+        results = await asyncio.gather(*(
+            queue.submit(lambda s, user_id=user_id: CartService(s).add_to_cart(user_id, 1))
+            for user_id in range(1, 21)
+        ))
+        await queue.close()
+        async with session_factory() as session:
+            rows = list(await session.scalars(select(Cart.user_id).order_by(Cart.user_id)))
+        return results, rows, queue.stats
+
+    results, rows, stats = run_db(scenario)
+    assert [cart.user_id for cart in results] == list(range(1, 21))
+    assert rows == list(range(1, 21))
+    assert stats.completed == 20
+    assert stats.batches < 20
+
+
+def test_failed_operation_does_not_lose_batch(run_db):
+    async def fail(session):
+        await CartService(session).add_to_cart(99, 1)
+        raise ValueError("ошибка операции")
+
+    async def scenario(session_factory):
+        queue = WriteQueue(session_factory, max_batch_size=64, linger=0.01)
+        outcomes = await asyncio.gather(
+            queue.submit(lambda s: CartService(s).add_to_cart(1, 1)),
+            queue.submit(fail),
+            queue.submit(lambda s: CartService(s).add_to_cart(2, 1)),
+            return_exceptions=True
+        )
+        await queue.close()
+        async with session_factory() as session:
+            rows = list(await session.scalars(select(Cart.user_id).order_by(Cart.user_id)))
+        return outcomes, rows, queue.stats
+
+    outcomes, rows, stats = run_db(scenario)
+    assert isinstance(outcomes[1], ValueError)
+    assert outcomes[0].user_id == 1 and outcomes[2].user_id == 2
+    # Изменения упавшей операции откатаны, остальные сохранены
+    assert rows == [1, 2]
+    assert stats.failed == 1
+    assert stats.retried_batches == 1
+
+
+def test_single_failed_operation_raises(run_db):
+    async def fail(session):
+        raise ValueError("ошибка операции")
+
+    async def scenario(session_factory):
+        queue = WriteQueue(session_factory, linger=0)
+        try:
+            await queue.submit(fail)
+        finally:
+            await queue.close()
+
+    with pytest.raises(ValueError):
+        run_db(scenario)